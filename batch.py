@@ -0,0 +1,125 @@
+# coding=utf-8
+"""
+Batch execution of SimpleScript files on a pool of worker processes.
+Every worker imports the interpreter once and then runs script after
+script in its own Engine, which is reset before each script so no
+script ever sees the variables of another one.
+"""
+
+import argparse
+import glob
+import io
+import json
+import multiprocessing
+import os
+import sys
+from time import perf_counter
+
+worker_engine = None  # Engine of the current worker process
+
+
+##########################
+# RUNNING IN THE WORKERS #
+##########################
+
+def start_worker():
+    """Warms up a worker process by importing the interpreter and creating its Engine."""
+    global worker_engine
+    from simplescript import Engine
+    worker_engine = Engine()
+
+
+def run_script(file_name):
+    """
+    Runs a single script in the Engine of the worker.
+    :param file_name: Path of the script to run.
+    :return: Dictionary with the result, error, output and timing of the script.
+    """
+    worker_engine.output = io.StringIO()
+    worker_engine.argv = [file_name]
+    worker_engine.reset()
+    result = error = None
+    start_time = perf_counter()
+    try:
+        with open(file_name, 'r') as f:
+            script = f.read()
+        value, script_error = worker_engine.run(file_name, script)
+        if script_error:
+            error = str(script_error)
+        else:
+            result = repr(value)
+    except Exception as exception:  # Note: One broken script must not take the batch down
+        error = '{}: {}'.format(type(exception).__name__, exception)
+    return {'file': file_name,
+            'result': result,
+            'error': error,
+            'output': worker_engine.output.getvalue(),
+            'time': perf_counter() - start_time,
+            'worker': os.getpid()}
+
+
+##############################
+# DISTRIBUTING THE SCRIPTS   #
+##############################
+
+def collect_scripts(paths, pattern='*'):
+    """
+    Lists the scripts to run.
+    :param paths: Script files, or directories whose matching files are all run.
+    :param pattern: Glob pattern of the scripts to run in directories.
+    :return: List of script file names.
+    """
+    file_names = []
+    for path in paths:
+        if os.path.isdir(path):
+            file_names.extend(file_name for file_name in sorted(glob.glob(os.path.join(path, pattern)))
+                              if os.path.isfile(file_name))
+        else:
+            file_names.append(path)
+    return file_names
+
+
+def run_batch(file_names, workers=None):
+    """
+    Runs scripts on a pool of warm worker processes.
+    :param file_names: List of script file names.
+    :param workers: Number of worker processes, defaults to the number of cores.
+    :return: Generator of the result dictionaries, in the order of the scripts.
+    """
+    workers = min(workers or os.cpu_count() or 1, max(len(file_names), 1))
+    with multiprocessing.Pool(workers, initializer=start_worker) as pool:
+        # Note: Scripts are handed out one at a time, since a single
+        #       long script would otherwise hold up a whole chunk.
+        for result in pool.imap(run_script, file_names):
+            yield result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs SimpleScript files on a pool of worker processes.')
+    parser.add_argument('paths', nargs='+', help='script files, or directories of scripts')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of cores')
+    parser.add_argument('--pattern', default='*', help='glob pattern of the scripts in directories')
+    parser.add_argument('--json', action='store_true', help='print every result as a line of JSON')
+    args = parser.parse_args()
+
+    file_names = collect_scripts(args.paths, args.pattern)
+    failures = 0
+    start_time = perf_counter()
+    for result in run_batch(file_names, args.workers):
+        failures += result['error'] is not None
+        if args.json:
+            print(json.dumps(result))
+            continue
+        print('{} {} ({:.2f}ms)'.format('FAIL' if result['error'] else 'OK  ', result['file'],
+                                        result['time'] * 1000))
+        if result['output']:
+            print(result['output'], end='')
+        if result['error']:
+            print(result['error'])
+    if not args.json:
+        print('{} scripts, {} failed, {:.2f}s'.format(len(file_names), failures, perf_counter() - start_time))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
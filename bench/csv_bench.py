@@ -0,0 +1,131 @@
+# coding=utf-8
+"""
+CSV benchmark for the SimpleScript interpreter.
+A generated CSV file is read with the CSV_READ builtin and,
+for comparison, line by line with READ_LINE, the least work
+any parser written in SimpleScript itself has to do. Writing
+is measured with CSV_WRITE. Every result is reported in rows
+per second.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import simplescript  # noqa: E402
+from runner import summarize  # noqa: E402
+
+# Note: SimpleScript can't look at the characters of a string, so a
+#       parser written in it can't split lines into fields. Reading
+#       every line and collecting it in a list is the part of such a
+#       parser it can express, which makes it a lower bound.
+PROGRAMS = {
+    'csv_read': ('VAR reader = CSV_OPEN(path, TRUE)\n'
+                 'VAR rows = 0\n'
+                 'WHILE reader THEN\n'
+                 '\tVAR row = CSV_READ(reader)\n'
+                 '\tVAR rows = rows + 1\n'
+                 'END\n'
+                 'CLOSE(reader)\n'),
+    'read_line': ('VAR file = OPEN(path)\n'
+                  'READ_LINE(file)\n'
+                  'VAR rows = 0\n'
+                  'WHILE file THEN\n'
+                  '\tVAR row = []\n'
+                  '\tAPPEND(row, READ_LINE(file))\n'
+                  '\tVAR rows = rows + 1\n'
+                  'END\n'
+                  'CLOSE(file)\n'),
+    'csv_write': ('VAR writer = CSV_CREATE(output_path)\n'
+                  'VAR row = [1, 2.5, "text"]\n'
+                  'FOR i = 0 TO row_count THEN\n'
+                  '\tCSV_WRITE(writer, row)\n'
+                  'END\n'
+                  'CLOSE(writer)\n'),
+}
+
+
+def write_data(path, row_count):
+    """
+    Generates the CSV file which is read by the benchmarks.
+    :param path: Path of the file.
+    :param row_count: Number of rows below the header.
+    """
+    with open(path, 'w') as f:
+        f.write('id,name,score,comment\n')
+        for index in range(row_count):
+            f.write('{},name_{},{}.5,"text, with a comma"\n'.format(index, index, index % 100))
+
+
+def measure(row_count, warmup, repeat):
+    """
+    Benchmarks reading and writing CSV files.
+    :param row_count: Number of rows read and written by every run.
+    :param warmup: Number of untimed runs.
+    :param repeat: Number of timed runs.
+    :return: Dictionary of benchmark names mapped to summaries of rows per second.
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'data.csv')
+    output_path = os.path.join(directory, 'output.csv')
+    write_data(path, row_count)
+    results = dict()
+    try:
+        for name, source in PROGRAMS.items():
+            # Note: The file names are globals, so the programs stay free of quoting issues
+            engine = simplescript.Engine()
+            engine.symbol_table.set('path', simplescript.String(path))
+            engine.symbol_table.set('output_path', simplescript.String(output_path))
+            engine.symbol_table.set('row_count', simplescript.Number(row_count))
+            samples = []
+            for run in range(warmup + repeat):
+                start_time = time.perf_counter()
+                _, error = engine.run('<{}>'.format(name), source)
+                elapsed = time.perf_counter() - start_time
+                if error:
+                    raise RuntimeError('{} failed:\n{}'.format(name, error))
+                if run >= warmup:
+                    samples.append(row_count / elapsed)
+            results[name] = summarize(samples)
+    finally:
+        for file_name in (path, output_path):
+            if os.path.exists(file_name):
+                os.remove(file_name)
+        os.rmdir(directory)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the CSV builtins of SimpleScript.')
+    parser.add_argument('--rows', type=int, default=50000, help='rows read and written by every run')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed runs')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs')
+    parser.add_argument('--output', help='file to write the JSON results to')
+    args = parser.parse_args()
+
+    results = {'python': platform.python_version(),
+               'platform': platform.platform(),
+               'rows': args.rows,
+               'warmup': args.warmup,
+               'repeat': args.repeat,
+               'csv': measure(args.rows, args.warmup, args.repeat)}
+    print('{:<12} {:>14}'.format('benchmark', 'rows/s'))
+    for name, summary in results['csv'].items():
+        print('{:<12} {:>14,.0f}'.format(name, summary['median']))
+    read_line = results['csv']['read_line']['median']
+    print('\nCSV_READ is {:.1f}x the READ_LINE loop'.format(results['csv']['csv_read']['median'] / read_line))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+# coding=utf-8
+"""
+Benchmark runner for the SimpleScript interpreter.
+Every benchmark is timed in three separate phases: lexing,
+parsing and interpreting. Results are written as JSON and can
+be compared against a stored baseline to flag regressions.
+The deepest Python stack of every program is reported too, which
+stays flat for programs run on the explicit stack of --stack.
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import simplescript  # noqa: E402
+from bin.context import Context  # noqa: E402
+from bin.interpreter import interpreter_for  # noqa: E402
+from bin.lexer import Lexer  # noqa: E402
+from bin.parser import Parser  # noqa: E402
+
+PHASES = ('lex', 'parse', 'execute')
+
+
+##############################
+# BENCHMARK PROGRAM SOURCES  #
+##############################
+
+def large_source(repeat=400):
+    """
+    Generates a long program which is mostly interesting to lex and parse.
+    :param repeat: Number of times the program body is repeated.
+    :return: Source of the generated program.
+    """
+    chunk = ('# Block {index} of a generated program\n'
+             'FUNC block_{index}(a, b)\n'
+             '\tVAR total = a * {index} + b / 2 - (a % 3)\n'
+             '\tIF total >= 10 AND NOT b == 0 THEN RETURN total ELSE RETURN [a, b, "text {index}"]\n'
+             'END\n'
+             'VAR value_{index} = block_{index}({index}, 2.5)\n')
+    return ''.join(chunk.format(index=index) for index in range(repeat))
+
+
+def load_benchmarks():
+    """
+    Collects every benchmark program.
+    :return: Dictionary of benchmark names mapped to their file name and source.
+    """
+    benchmarks = dict()
+    for file_name in sorted(glob.glob(os.path.join(BENCH_DIR, 'programs', '*.simple'))):
+        name = os.path.splitext(os.path.basename(file_name))[0]
+        with open(file_name, 'r') as f:
+            benchmarks[name] = (file_name, f.read())
+    benchmarks['large_source'] = ('<large_source>', large_source())
+    return benchmarks
+
+
+######################
+# MEASURING PROGRAMS #
+######################
+
+def run_phases(fn, source, explicit_stack=False):
+    """
+    Runs a program once in a fresh Engine, timing every phase separately.
+    Note: Reusing an Engine would leak the globals of one run into the
+          next, so programs could find variables they never defined.
+    :param fn: File name of the program.
+    :param source: Source of the program.
+    :param explicit_stack: True to interpret the program on an explicit stack.
+    :return: Dictionary of phase names mapped to seconds.
+    """
+    timings = dict()
+    start_time = time.perf_counter()
+    tokens, error = Lexer(source, fn).tokenize()
+    timings['lex'] = time.perf_counter() - start_time
+    if error:
+        raise RuntimeError(str(error))
+
+    start_time = time.perf_counter()
+    ast = Parser(tokens, explicit_stack).parse()
+    timings['parse'] = time.perf_counter() - start_time
+    if ast.error:
+        raise RuntimeError(str(ast.error))
+
+    engine = simplescript.Engine()
+    engine.explicit_stack = explicit_stack
+    context = Context('<program>')
+    context.symbol_table = engine.symbol_table
+    context.engine = engine
+    start_time = time.perf_counter()
+    result = interpreter_for(context).visit(ast.node, context)
+    timings['execute'] = time.perf_counter() - start_time
+    engine.flush()
+    engine.close()
+    if result.error:
+        raise RuntimeError(str(result.error))
+    return timings
+
+
+def summarize(samples):
+    """
+    Summarizes the timings of one phase.
+    :param samples: List of timings in seconds.
+    :return: Dictionary with the median, the interquartile range and every sample.
+    """
+    if len(samples) > 1:
+        quartiles = statistics.quantiles(samples, n=4)
+        iqr = quartiles[2] - quartiles[0]
+    else:
+        iqr = 0.0
+    return {'median': statistics.median(samples), 'iqr': iqr, 'samples': samples}
+
+
+def measure_stack_depth(fn, source, explicit_stack):
+    """
+    Finds the deepest Python stack of a run of a program.
+    :param fn: File name of the program.
+    :param source: Source of the program.
+    :param explicit_stack: True to interpret the program on an explicit stack.
+    :return: Number of Python frames above the run at its deepest.
+    """
+    depth = peak_depth = 0
+
+    def profile(frame, event, arg):
+        nonlocal depth, peak_depth
+        if event == 'call':
+            depth += 1
+            peak_depth = max(peak_depth, depth)
+        elif event == 'return':
+            depth -= 1
+
+    sys.setprofile(profile)
+    try:
+        run_phases(fn, source, explicit_stack)
+    finally:
+        sys.setprofile(None)
+    return peak_depth
+
+
+def measure(fn, source, warmup, repeat, explicit_stack=False):
+    """
+    Benchmarks a single program.
+    :param fn: File name of the program.
+    :param source: Source of the program.
+    :param warmup: Number of untimed runs.
+    :param repeat: Number of timed runs.
+    :param explicit_stack: True to interpret the program on an explicit stack.
+    :return: Dictionary with the summary of every phase, the peak memory and stack depth.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(warmup):
+            run_phases(fn, source, explicit_stack)
+        samples = {phase: [] for phase in PHASES}
+        for _ in range(repeat):
+            for phase, timing in run_phases(fn, source, explicit_stack).items():
+                samples[phase].append(timing)
+
+        # Note: Memory and the stack are traced in separate runs
+        #       since tracing slows every allocation and call down.
+        tracemalloc.start()
+        run_phases(fn, source, explicit_stack)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_stack = measure_stack_depth(fn, source, explicit_stack)
+    result = {phase: summarize(timings) for phase, timings in samples.items()}
+    result['total'] = summarize([sum(timings) for timings in zip(*samples.values())])
+    result['peak_memory'] = peak_memory
+    result['peak_stack'] = peak_stack
+    return result
+
+
+#########################
+# COMPARING TO BASELINE #
+#########################
+
+def compare(results, baseline, threshold):
+    """
+    Compares the median of every phase against a baseline.
+    :param results: Benchmark results of the current run.
+    :param baseline: Benchmark results of the baseline run.
+    :param threshold: Relative slowdown above which a phase regressed.
+    :return: List of (benchmark, phase, baseline median, median, change) tuples.
+    """
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            continue
+        for phase in PHASES + ('total',):
+            old_median = baseline['benchmarks'][name][phase]['median']
+            new_median = result[phase]['median']
+            if old_median > 0 and (new_median - old_median) / old_median > threshold:
+                regressions.append((name, phase, old_median, new_median, new_median / old_median - 1))
+    return regressions
+
+
+def print_results(results):
+    """
+    Prints a table of the median timings of every benchmark.
+    :param results: Benchmark results.
+    """
+    print('{:<16} {:>10} {:>10} {:>10} {:>10} {:>10} {:>12} {:>6}'.format(
+        'benchmark', 'lex', 'parse', 'execute', 'total', 'iqr', 'peak memory', 'stack'))
+    for name, result in results['benchmarks'].items():
+        print('{:<16} {:>9.2f}ms {:>9.2f}ms {:>9.2f}ms {:>9.2f}ms {:>9.2f}ms {:>10.1f}KB {:>6}'.format(
+            name,
+            result['lex']['median'] * 1000,
+            result['parse']['median'] * 1000,
+            result['execute']['median'] * 1000,
+            result['total']['median'] * 1000,
+            result['total']['iqr'] * 1000,
+            result['peak_memory'] / 1024,
+            result.get('peak_stack', '')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the SimpleScript interpreter.')
+    parser.add_argument('names', nargs='*', help='benchmarks to run, defaults to all of them')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed runs per benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    parser.add_argument('--output', help='file to write the JSON results to')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression (default: 0.1)')
+    parser.add_argument('--stack', action='store_true',
+                        help='interpret on an explicit stack, immune to Python\'s recursion limit')
+    args = parser.parse_args()
+
+    benchmarks = load_benchmarks()
+    unknown_names = set(args.names) - set(benchmarks)
+    if unknown_names:
+        parser.error('unknown benchmarks: {}'.format(', '.join(sorted(unknown_names))))
+    # Note: The baseline is read first, since --output may replace it
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('stack', False) != args.stack:
+            parser.error('the baseline was {}run with --stack'.format('' if baseline.get('stack') else 'not '))
+    results = {'python': platform.python_version(),
+               'platform': platform.platform(),
+               'warmup': args.warmup,
+               'repeat': args.repeat,
+               'stack': args.stack,
+               'benchmarks': dict()}
+    for name, (fn, source) in benchmarks.items():
+        if not args.names or name in args.names:
+            try:
+                results['benchmarks'][name] = measure(fn, source, args.warmup, args.repeat, args.stack)
+            except RecursionError:
+                print('{} skipped, it recurses deeper than Python allows without --stack'.format(name))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, phase, old_median, new_median, change in regressions:
+            print('REGRESSION {} {}: {:.2f}ms -> {:.2f}ms ({:+.1%})'.format(
+                name, phase, old_median * 1000, new_median * 1000, change))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
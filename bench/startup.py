@@ -0,0 +1,161 @@
+# coding=utf-8
+"""
+Startup benchmark for the SimpleScript interpreter.
+Every measurement starts a fresh Python process, as a batch job
+would: the import of the simplescript module is timed with
+'python -X importtime', and the command line runner is timed
+on a trivial script against a bare Python interpreter.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+from runner import summarize  # noqa: E402
+
+MEASUREMENTS = ('import', 'python', 'runner')
+
+
+######################
+# MEASURING STARTUPS #
+######################
+
+def python_environment():
+    """
+    Builds the environment of the measured processes.
+    Note: Bytecode must be cached, otherwise every process would
+          also be timing the compilation of the interpreter.
+    :return: Dictionary of environment variables.
+    """
+    environment = dict(os.environ)
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+    return environment
+
+
+def import_times(environment):
+    """
+    Imports the simplescript module in a fresh process.
+    :param environment: Environment of the process.
+    :return: Dictionary of module names mapped to (self, cumulative) microseconds.
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import simplescript'],
+                             cwd=ROOT_DIR, env=environment, stderr=subprocess.PIPE,
+                             universal_newlines=True, check=True)
+    modules = dict()
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_time), int(cumulative_time))
+    return modules
+
+
+def process_time(arguments, environment):
+    """
+    Times a fresh process from its start to its exit.
+    :param arguments: Command line of the process.
+    :param environment: Environment of the process.
+    :return: Seconds the process took.
+    """
+    start_time = time.perf_counter()
+    subprocess.run(arguments, cwd=ROOT_DIR, env=environment, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start_time
+
+
+def measure(warmup, repeat, limit):
+    """
+    Benchmarks the startup of the interpreter.
+    :param warmup: Number of untimed runs, which also cache the bytecode.
+    :param repeat: Number of timed runs.
+    :param limit: Number of slowest modules to list.
+    :return: Dictionary with the summary of every measurement and the slowest modules.
+    """
+    environment = python_environment()
+    with tempfile.NamedTemporaryFile('w', suffix='.simple', delete=False) as f:
+        f.write('VAR answer = 42\n')
+    commands = {'python': [sys.executable, '-c', 'pass'],
+                'runner': [sys.executable, '-m', 'simplescript', f.name]}
+    try:
+        for _ in range(warmup):
+            import_times(environment)
+            for arguments in commands.values():
+                process_time(arguments, environment)
+        samples = {name: [] for name in MEASUREMENTS}
+        modules = dict()
+        for _ in range(repeat):
+            times = import_times(environment)
+            samples['import'].append(times['simplescript'][1] / 1e6)
+            for name, (self_time, _) in times.items():
+                modules.setdefault(name, []).append(self_time / 1e6)
+            for name, arguments in commands.items():
+                samples[name].append(process_time(arguments, environment))
+    finally:
+        os.remove(f.name)
+    result = {name: summarize(timings) for name, timings in samples.items()}
+    medians = {name: summarize(timings)['median'] for name, timings in modules.items()}
+    result['modules'] = dict(sorted(medians.items(), key=lambda item: -item[1])[:limit])
+    return result
+
+
+def print_results(result):
+    """
+    Prints the median startup timings and the slowest modules to import.
+    :param result: Startup benchmark results.
+    """
+    print('{:<28} {:>10} {:>10}'.format('measurement', 'median', 'iqr'))
+    for name, label in (('import', 'import simplescript'),
+                        ('python', 'python -c pass'),
+                        ('runner', 'python -m simplescript')):
+        print('{:<28} {:>8.2f}ms {:>8.2f}ms'.format(
+            label, result[name]['median'] * 1000, result[name]['iqr'] * 1000))
+    print('\n{:<28} {:>10}'.format('module', 'self'))
+    for name, median in result['modules'].items():
+        print('{:<28} {:>8.2f}ms'.format(name, median * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the startup of the SimpleScript interpreter.')
+    parser.add_argument('--warmup', type=int, default=2, help='untimed runs')
+    parser.add_argument('--repeat', type=int, default=15, help='timed runs')
+    parser.add_argument('--modules', type=int, default=10, help='slowest modules to list')
+    parser.add_argument('--output', help='file to write the JSON results to')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression (default: 0.1)')
+    args = parser.parse_args()
+
+    results = {'python': platform.python_version(),
+               'platform': platform.platform(),
+               'warmup': args.warmup,
+               'repeat': args.repeat,
+               'startup': measure(args.warmup, args.repeat, args.modules)}
+    print_results(results['startup'])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['startup']
+        regressions = False
+        for name in ('import', 'runner'):
+            old_median = baseline[name]['median']
+            new_median = results['startup'][name]['median']
+            if old_median > 0 and (new_median - old_median) / old_median > args.threshold:
+                regressions = True
+                print('REGRESSION {}: {:.2f}ms -> {:.2f}ms ({:+.1%})'.format(
+                    name, old_median * 1000, new_median * 1000, new_median / old_median - 1))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
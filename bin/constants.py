@@ -2,20 +2,21 @@
 """All constants used in the backend of the SimpleScript language."""
 
 import operator
-from string import ascii_letters, digits
 
 #############
 # OPERATORS #
 #############
 
+# Note: AND and OR are logical rather than bitwise, so their results
+#       agree with the interpreter skipping the right side of them.
 operations = {'>': operator.gt,
               '<': operator.lt,
               '>=': operator.ge,
               '<=': operator.le,
               '==': operator.eq,
               '!=': operator.ne,
-              'AND': operator.and_,
-              'OR': operator.or_}
+              'AND': lambda a, b: a != 0 and b != 0,
+              'OR': lambda a, b: a != 0 or b != 0}
 
 ####################
 # LIST OF KEYWORDS #
@@ -33,6 +34,7 @@ KEYWORDS = [
     'ELIF',
     'ELSE',
     'FOR',
+    'PARALLEL',
     'TO',
     'STEP',
     'WHILE',
@@ -47,8 +49,10 @@ KEYWORDS = [
 # ALL CONSTANTS #
 #################
 
-DIGITS = digits
-LETTERS = ascii_letters
+# Note: Spelled out rather than imported from the string module,
+#       which also imports the re module and slows down every start.
+DIGITS = '0123456789'
+LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
 
 ##################
 # ALL DATA TYPES #
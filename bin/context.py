@@ -16,3 +16,11 @@ class Context:
         self.parent_context = parent_context
         self.parent_entry_pos = parent_entry_pos
         self.symbol_table = None
+
+        # Note: The Engine, execution hooks, metrics and limits are shared by every
+        #       Context of a run so that function calls can find them without a global.
+        self.engine = parent_context.engine if parent_context else None
+        self.hooks = parent_context.hooks if parent_context else None
+        self.metrics = parent_context.metrics if parent_context else None
+        self.limits = parent_context.limits if parent_context else None
+        self.depth = parent_context.depth + 1 if parent_context else 0
@@ -0,0 +1,244 @@
+# coding=utf-8
+"""Represents the CSV files of CSV_OPEN and CSV_CREATE calls."""
+
+from bin.file import BUFFER_SIZE
+from bin.list import List
+from bin.number import Number
+from bin.string import String
+from bin.value import Value
+
+# Rows collected by a CsvWriter before they are written at once
+WRITE_BATCH_SIZE = 512
+
+
+def to_field_value(field):
+    """
+    Converts a field of a CSV file to a Value.
+    Fields which look like numbers become Numbers, all others Strings.
+    :param field: String read from the file.
+    :return: Number or String instance.
+    """
+    try:
+        return Number(int(field))
+    except ValueError:
+        pass
+    try:
+        value = float(field)
+    except ValueError:
+        return String(field)
+    if value != value or value in (float('inf'), float('-inf')):  # Note: 'nan' and 'inf' are words
+        return String(field)
+    return Number(value)
+
+
+def to_field(value):
+    """
+    Converts a Value to a field of a CSV file.
+    :param value: Value instance.
+    :return: String or number written to the file.
+    """
+    if isinstance(value, (Number, String)):
+        return value.value
+    return str(value)
+
+
+class RowStream:
+    """
+    Reads the rows of a CSV file one ahead, so its end is known
+    before it is reached. Shared by every copy of a CsvReader.
+    """
+
+    def __init__(self, handle):
+        """
+        Initializes a RowStream.
+        :param handle: Text file object of the file.
+        """
+        import csv  # Note: Only imported once a CSV file is opened
+        self.error_class = csv.Error
+        self.rows = csv.reader(handle)
+        self.next_row = self.read_ahead()
+
+    def read_ahead(self):
+        """
+        Reads a row from the file.
+        :return: List of the fields of the row as strings, or None at the end of the file.
+        """
+        try:
+            return next(self.rows, None)
+        except self.error_class as exception:
+            raise ValueError(str(exception))
+
+    def read(self):
+        """
+        Reads the next row.
+        :return: List of the fields of the row as strings, or None at the end of the file.
+        """
+        row = self.next_row
+        if row is not None:
+            self.next_row = self.read_ahead()
+        return row
+
+
+class CsvReader(Value):
+    """
+    Represents a CSV file opened for reading rows.
+    Rows are read one at a time and returned as Lists, so files
+    far larger than the memory can be walked through. The next row
+    is always read ahead, which makes a CsvReader TRUE exactly while
+    it has rows left.
+    """
+
+    def __init__(self, path, handle, header=None, stream=None):
+        """
+        Initializes a CsvReader instance.
+        :param path: Path of the file.
+        :param handle: Text file object of the file.
+        :param header: List of column names, or None if the file has no header.
+        :param stream: RowStream of the file, created when None.
+        """
+        super().__init__()
+        self.path = path
+        self.handle = handle
+        self.header = header
+        self.stream = stream if stream is not None else RowStream(handle)
+
+    @staticmethod
+    def open(path, has_header=False):
+        """
+        Opens a CSV file for reading.
+        :param path: Path of the file.
+        :param has_header: True to read the first row as the names of the columns.
+        :return: CsvReader instance.
+        """
+        handle = open(path, 'r', newline='', encoding='utf-8', errors='replace', buffering=BUFFER_SIZE)
+        try:
+            stream = RowStream(handle)
+            if not has_header:
+                return CsvReader(path, handle, stream=stream)
+            header = stream.read() or []
+            return CsvReader(path, handle, List([String(name) for name in header]), stream)
+        except ValueError:
+            handle.close()
+            raise
+
+    def __repr__(self):
+        return '<csv reader "{}">'.format(self.path)
+
+    @property
+    def closed(self):
+        return self.handle.closed
+
+    def read_row(self):
+        """
+        Reads the next row.
+        :return: List of the fields of the row, or None at the end of the file.
+        """
+        row = self.stream.read()
+        if row is None:
+            return None
+        return List([to_field_value(field) for field in row])
+
+    def close(self):
+        """Closes the file. Closing it again does nothing."""
+        self.handle.close()
+
+    def is_true(self):
+        """
+        Returns TRUE while there are rows left to read.
+        :return: TRUE if the CsvReader is open and not at its end.
+        """
+        return not self.closed and self.stream.next_row is not None
+
+    def copy(self):
+        """
+        Makes a copy of the CsvReader instance, which reads from the same file.
+        :return: A copy of the CsvReader instance.
+        """
+        copy = CsvReader(self.path, self.handle, self.header, self.stream)
+        copy.set_position(self.start_pos, self.end_pos)
+        copy.set_context(self.context)
+        return copy
+
+
+class CsvWriter(Value):
+    """
+    Represents a CSV file opened for writing rows.
+    Rows are collected and written WRITE_BATCH_SIZE at a time, and
+    the rows left over are written when the file is closed, or by
+    the Engine at the end of every run.
+    """
+
+    def __init__(self, path, handle, writer, pending):
+        """
+        Initializes a CsvWriter instance.
+        :param path: Path of the file.
+        :param handle: Text file object of the file.
+        :param writer: csv.writer of the handle, shared by every copy.
+        :param pending: List of the rows not written yet, shared by every copy.
+        """
+        super().__init__()
+        self.path = path
+        self.handle = handle
+        self.writer = writer
+        self.pending = pending
+
+    @staticmethod
+    def create(path):
+        """
+        Creates a CSV file for writing, replacing any file at the path.
+        :param path: Path of the file.
+        :return: CsvWriter instance.
+        """
+        import csv  # Note: Only imported once a CSV file is created
+        handle = open(path, 'w', newline='', encoding='utf-8', buffering=BUFFER_SIZE)
+        return CsvWriter(path, handle, csv.writer(handle), [])
+
+    def __repr__(self):
+        return '<csv writer "{}">'.format(self.path)
+
+    @property
+    def closed(self):
+        return self.handle.closed
+
+    def write_row(self, row):
+        """
+        Writes a row.
+        :param row: List of the fields of the row.
+        """
+        self.pending.append([to_field(value) for value in row.elements])
+        if len(self.pending) >= WRITE_BATCH_SIZE:
+            self.write_out()
+
+    def write_out(self):
+        """Writes the collected rows to the file."""
+        self.writer.writerows(self.pending)
+        self.pending.clear()  # Note: Cleared in place, since copies share the list
+
+    def flush(self):
+        """Writes the collected rows through to the file, keeping it open."""
+        if not self.closed:
+            self.write_out()
+            self.handle.flush()
+
+    def close(self):
+        """Writes the collected rows and closes the file. Closing it again does nothing."""
+        if not self.closed:
+            self.write_out()
+        self.handle.close()
+
+    def is_true(self):
+        """
+        Returns TRUE while rows can be written.
+        :return: TRUE if the CsvWriter is open.
+        """
+        return not self.closed
+
+    def copy(self):
+        """
+        Makes a copy of the CsvWriter instance, which writes to the same file.
+        :return: A copy of the CsvWriter instance.
+        """
+        copy = CsvWriter(self.path, self.handle, self.writer, self.pending)
+        copy.set_position(self.start_pos, self.end_pos)
+        copy.set_context(self.context)
+        return copy
@@ -23,6 +23,19 @@ class Error:
     def __str__(self):
         return repr(self)
 
+    def locate(self, start_pos, end_pos):
+        """
+        Gives the Error the positions of the Node which failed, unless it has some.
+        Values carry no positions, so their Errors are only located once they reach a Node.
+        :param start_pos: Starting position of the Node.
+        :param end_pos: Ending position of the Node.
+        :return: Error instance.
+        """
+        if self.start_pos is None:
+            self.start_pos = start_pos
+            self.end_pos = end_pos
+        return self
+
     def __repr__(self):
         """Pretty-print error message."""
         error_msg = '\nFile {}, on line {}\n'.format(self.start_pos.fn, self.start_pos.ln + 1)
@@ -63,7 +76,8 @@ class ActiveRuntimeError(Error):
     def __repr__(self):
         error_msg = self.generate_traceback()
         error_msg += '{}\n'.format(self.error_details)
-        error_msg += string_with_arrows(self.start_pos.ftxt, self.start_pos, self.end_pos) + '\n'
+        if self.start_pos is not None:
+            error_msg += string_with_arrows(self.start_pos.ftxt, self.start_pos, self.end_pos) + '\n'
         return error_msg
 
     def generate_traceback(self):
@@ -77,9 +91,12 @@ class ActiveRuntimeError(Error):
         while context:
             # Add result instead of using += because we wish to keep
             # the stack trace chronological when it's printed out
-            result = 'File {}, line {}, in {}\n'.format(position.fn,
-                                                        position.ln + 1,
-                                                        context.display_name) + result
+            if position is None:  # Note: Calls made from Python have no position
+                result = 'In {}\n'.format(context.display_name) + result
+            else:
+                result = 'File {}, line {}, in {}\n'.format(position.fn,
+                                                            position.ln + 1,
+                                                            context.display_name) + result
             position = context.parent_entry_pos
             context = context.parent_context
         return '\nTraceback (most recent call last):\n' + result
@@ -91,3 +108,15 @@ class ExpectedCharError(Error):
                                                 'Expected Character ({})'.format(details),
                                                 start_pos,
                                                 end_pos)
+
+
+class ScriptError(Exception):
+    """Raised when a SimpleScript function called from Python fails."""
+
+    def __init__(self, error):
+        """
+        Wraps the Error of the failed call.
+        :param error: Error instance of the failed call.
+        """
+        super(ScriptError, self).__init__(str(error))
+        self.error = error
@@ -0,0 +1,116 @@
+# coding=utf-8
+"""Represents a File instance, the handle of an OPEN call."""
+
+from bin.value import Value
+
+# Bytes read from the disk at once by buffered Files
+BUFFER_SIZE = 64 * 1024
+
+
+class File(Value):
+    """
+    Represents a file opened for reading lines.
+    Lines are read one at a time, so files far larger than the
+    memory can be walked through. A File is either buffered, reading
+    ahead in blocks of BUFFER_SIZE, or memory mapped, leaving the
+    paging to the operating system, which suits jumping around with
+    SEEK. Both count positions in bytes.
+    """
+
+    def __init__(self, path, handle, mapping=None):
+        """
+        Initializes a File instance.
+        :param path: Path of the file.
+        :param handle: Binary file object of the file.
+        :param mapping: mmap of the file, or None if the file is buffered.
+        """
+        super().__init__()
+        self.path = path
+        self.handle = handle
+        self.mapping = mapping
+        self.reader = handle if mapping is None else mapping
+
+    @staticmethod
+    def open(path, memory_mapped=False):
+        """
+        Opens a file for reading.
+        :param path: Path of the file.
+        :param memory_mapped: True to map the file into memory rather than buffering it.
+        :return: File instance.
+        """
+        handle = open(path, 'rb', buffering=BUFFER_SIZE)
+        if memory_mapped:
+            import mmap  # Note: Only imported once a file is mapped
+            try:
+                return File(path, handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+            except ValueError:  # Empty files can't be mapped, and have no lines anyway
+                pass
+            except OSError:
+                handle.close()
+                raise
+        return File(path, handle)
+
+    def __repr__(self):
+        return '<file "{}">'.format(self.path)
+
+    @property
+    def closed(self):
+        return self.handle.closed
+
+    def read_line(self):
+        """
+        Reads the next line.
+        :return: Line without its line break, or None at the end of the file.
+        """
+        line = self.reader.readline()
+        if not line:
+            return None
+        if line.endswith(b'\n'):
+            line = line[:-2] if line.endswith(b'\r\n') else line[:-1]
+        return line.decode('utf-8', errors='replace')
+
+    def at_end(self):
+        """
+        Checks whether every line has been read, without reading any.
+        :return: True at the end of the file.
+        """
+        if self.mapping is not None:
+            return self.mapping.tell() >= self.mapping.size()
+        return not self.handle.peek(1)
+
+    def seek(self, offset):
+        """
+        Moves to a byte offset of the file.
+        :param offset: Offset from the start, or from the end if it is negative.
+        """
+        self.reader.seek(offset, 0 if offset >= 0 else 2)
+
+    def tell(self):
+        """
+        Finds the byte offset the next line is read from.
+        :return: Offset from the start of the file.
+        """
+        return self.reader.tell()
+
+    def close(self):
+        """Closes the file. Closing it again does nothing."""
+        if self.mapping is not None and not self.mapping.closed:
+            self.mapping.close()
+        self.handle.close()
+
+    def is_true(self):
+        """
+        Returns TRUE while there are lines left to read.
+        :return: TRUE if the File is open and not at its end.
+        """
+        return not self.closed and not self.at_end()
+
+    def copy(self):
+        """
+        Makes a copy of the File instance, which reads from the same file.
+        :return: A copy of the File instance.
+        """
+        copy = File(self.path, self.handle, self.mapping)
+        copy.set_position(self.start_pos, self.end_pos)
+        copy.set_context(self.context)
+        return copy
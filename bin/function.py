@@ -9,6 +9,7 @@ Note: The Function() class definition is implemented in
 
 from bin.context import Context
 from bin.errors import ActiveRuntimeError
+from bin.number import Number
 from bin.runtime_result import RuntimeResult
 from bin.symbol_table import SymbolTable
 from bin.value import Value
@@ -40,11 +41,51 @@ class BaseFunction(Value):
         context.symbol_table = SymbolTable(context.parent_context.symbol_table)
         return context
 
-    def check_args(self, arg_names, args):
+    def enter(self):
+        """
+        Generates the Context of a call, unless the call exceeds the depth limit.
+        :return: Tuple of the new Context and the failed RuntimeResult, if any.
+        """
+        exec_context = self.generate_new_context()
+        limits = exec_context.limits
+        if limits is not None and limits.max_depth is not None and exec_context.depth > limits.max_depth:
+            return exec_context, RuntimeResult().failure(ActiveRuntimeError(
+                'Call depth limit of {} exceeded'.format(limits.max_depth),
+                self.start_pos,
+                self.end_pos,
+                self.context))
+        return exec_context, None
+
+    def execute(self, args):
+        """
+        Executes the function in a new Context.
+        Execution hooks are notified when any are installed,
+        and the call fails once it exceeds the depth limit.
+        :param args: List of all arguments.
+        :return: RuntimeResult of the function call.
+        """
+        exec_context, failure = self.enter()
+        if failure:
+            return failure
+        hooks = exec_context.hooks
+        if hooks is None:
+            return self.execute_in_context(args, exec_context)
+        if hooks.on_call is not None:
+            hooks.on_call(self, args, exec_context)
+        result = self.execute_in_context(args, exec_context)
+        if hooks.on_return is not None:
+            hooks.on_return(self, result, exec_context)
+        return result
+
+    def execute_in_context(self, args, exec_context):
+        raise Exception('No execute_in_context method defined')
+
+    def check_args(self, arg_names, args, optional_arg_count=0):
         """
         Checks that correct number of args are present.
         :param arg_names: List of argument names.
         :param args: List of arguments passed into func.
+        :param optional_arg_count: Number of trailing arguments which may be omitted.
         :return: None, if there are no issues.
         """
         runtime_result = RuntimeResult()
@@ -54,7 +95,7 @@ class BaseFunction(Value):
                 self.start_pos,
                 self.end_pos,
                 self.context))
-        if len(args) < len(arg_names):
+        if len(args) < len(arg_names) - optional_arg_count:
             return runtime_result.failure(ActiveRuntimeError(
                 'Too few arguments'.format(len(arg_names) - len(args)),
                 self.start_pos,
@@ -65,6 +106,8 @@ class BaseFunction(Value):
     def populate_args(self, arg_names, args, exec_context):
         """
         Populates the args for a given Context.
+        Omitted optional args are populated with NULL so that
+        they never resolve to a variable of the caller.
         :param arg_names: Name of all args.
         :param args: List of all arg values.
         :param exec_context: Context to update.
@@ -74,17 +117,20 @@ class BaseFunction(Value):
             arg_value = args[index]
             arg_value.set_context(exec_context)
             exec_context.symbol_table.set(arg_name, arg_value)
+        for arg_name in arg_names[len(args):]:
+            exec_context.symbol_table.set(arg_name, Number(0))
 
-    def check_and_populate_args(self, arg_names, args, exec_context):
+    def check_and_populate_args(self, arg_names, args, exec_context, optional_arg_count=0):
         """
         Checks args before populating the Context.
         :param arg_names: Names of all args.
         :param args: Values of all args.
         :param exec_context: Context we wish to update.
+        :param optional_arg_count: Number of trailing arguments which may be omitted.
         :return: None, if there are no issues.
         """
         runtime_result = RuntimeResult()
-        runtime_result.register(self.check_args(arg_names, args))
+        runtime_result.register(self.check_args(arg_names, args, optional_arg_count))
         if runtime_result.error:
             return runtime_result
         self.populate_args(arg_names, args, exec_context)
@@ -0,0 +1,107 @@
+# coding=utf-8
+"""Execution hooks for tracing, metering and debugging SimpleScript runs."""
+
+
+class ExecutionHook:
+    """
+    Superclass of all execution hooks.
+    Subclasses override only the events they care about. Events
+    which no installed hook overrides are never dispatched.
+    """
+
+    def on_call(self, function, args, context):
+        """
+        Called before a Function or BuiltInFunction is executed.
+        :param function: BaseFunction instance being called.
+        :param args: List of argument values.
+        :param context: Context the function is executed in.
+        """
+
+    def on_return(self, function, result, context):
+        """
+        Called after a Function or BuiltInFunction has been executed.
+        :param function: BaseFunction instance which was called.
+        :param result: RuntimeResult of the call.
+        :param context: Context the function was executed in.
+        """
+
+    def on_node(self, node, context):
+        """
+        Called before a Node is evaluated.
+        :param node: Node about to be evaluated.
+        :param context: Context of the evaluation.
+        """
+
+    def on_node_return(self, node, result, context):
+        """
+        Called after a Node has been evaluated.
+        :param node: Node which was evaluated.
+        :param result: RuntimeResult of the evaluation.
+        :param context: Context of the evaluation.
+        """
+
+    def on_loop_iteration(self, node, context):
+        """
+        Called before every iteration of a for- or while-loop.
+        :param node: ForNode or WhileNode instance.
+        :param context: Context of the loop.
+        """
+
+    def on_error(self, error, context):
+        """
+        Called once when a runtime error is raised.
+        :param error: ActiveRuntimeError instance.
+        :param context: Context the error surfaced in.
+        """
+
+
+class Hooks:
+    """
+    Dispatches events to a list of ExecutionHook instances.
+    Every event attribute is None when no hook handles it, so that
+    callers can skip the event with a single check.
+    """
+
+    EVENTS = ('on_call', 'on_return', 'on_node', 'on_node_return', 'on_loop_iteration', 'on_error')
+
+    def __init__(self, hooks):
+        """
+        Initializes a Hooks instance.
+        :param hooks: List of ExecutionHook instances, in order of installation.
+        """
+        self.hooks = list(hooks)
+        self.last_error = None
+        for event in self.EVENTS:
+            methods = [getattr(hook, event) for hook in self.hooks if self.handles(hook, event)]
+            if event in ('on_return', 'on_node_return'):
+                methods.reverse()  # Exit events run innermost hook first
+            setattr(self, event, self.dispatcher(methods))
+
+    @staticmethod
+    def handles(hook, event):
+        """
+        Checks whether a hook overrides the no-op method of an event.
+        :param hook: ExecutionHook instance.
+        :param event: Name of the event method.
+        :return: True if the hook handles the event.
+        """
+        method = getattr(hook, event, None)
+        return method is not None and getattr(method, '__func__', None) is not getattr(ExecutionHook, event)
+
+    @staticmethod
+    def dispatcher(methods):
+        """
+        Builds a single callable for a list of hook methods.
+        :param methods: Bound methods handling one event.
+        :return: Callable invoking every method, or None if there are none.
+        """
+        if not methods:
+            return None
+        if len(methods) == 1:
+            return methods[0]
+
+        def dispatch(*args):
+            for method in methods:
+                method(*args)
+
+        return dispatch
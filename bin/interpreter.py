@@ -5,9 +5,14 @@ from bin.constants import *
 from bin.errors import ActiveRuntimeError
 from bin.function import BaseFunction
 from bin.list import List
+from bin.nodes import BinOpNode, CallNode, ForNode, IfNode, ListNode, ParallelForNode, ReturnNode, StringNode, \
+    UnaryOpNode, VarAssignNode, WhileNode
 from bin.number import Number
+from bin.parallel import attach, capture_environment, find_shared_write, run_chunk, split_chunks
 from bin.runtime_result import RuntimeResult
+from bin.specialization import SPECIALIZE_BACKOFF, specialize
 from bin.string import String
+from bin.symbol_table import SymbolTable
 
 
 class Interpreter:
@@ -45,7 +50,7 @@ class Interpreter:
         :return: Number instance with the Node value.
         """
         return RuntimeResult().success(
-            Number(node.token.value).set_context(context).set_position(node.start_pos, node.end_pos))
+            Number(node.token.value).set_context(context))
 
     def visit_binopnode(self, node, context):
         """
@@ -54,12 +59,52 @@ class Interpreter:
         :param context: Context of the caller.
         :return: Result of the binary operation on both child Nodes.
         """
-        result, error = None, None
         runtime_result = RuntimeResult()
         left_node = runtime_result.register(self.visit(node.left_node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        if node.op_token.type == TP_KEYWORD:  # Note: AND and OR skip the right side once the left decides
+            result = self.short_circuit(node, left_node)
+            if result is not None:
+                return runtime_result.success(result)
         right_node = runtime_result.register(self.visit(node.right_node, context))
         if runtime_result.should_return():
             return runtime_result
+        operation = node.specialized
+        if operation is not None:
+            result = operation(left_node, right_node)
+            if result is not None:
+                return runtime_result.success(result)
+        result, error = self.operate(node, left_node, right_node)
+        if error:
+            return runtime_result.failure(error.locate(node.start_pos, node.end_pos))
+        return runtime_result.success(result)
+
+    @staticmethod
+    def short_circuit(node, left_node):
+        """
+        Finds the result of AND and OR when their left operand alone decides it.
+        :param node: BinOpNode of the operation.
+        :param left_node: Value of the left operand.
+        :return: Number with the result, or None if the right operand is needed.
+        """
+        if isinstance(left_node, Number) and left_node.is_true() == (node.op_token.value == 'OR'):
+            return Number(int(left_node.is_true())).set_context(left_node.context)
+        return None
+
+    @staticmethod
+    def operate(node, left_node, right_node):
+        """
+        Applies the operator of a binary operation generically, and
+        specializes the operation for its operand types once it has
+        run a few times. An operation whose specialized version no
+        longer fits its operands backs off to the generic one.
+        :param node: BinOpNode of the operation.
+        :param left_node: Value of the left operand.
+        :param right_node: Value of the right operand.
+        :return: Tuple of the resulting Value and the error.
+        """
+        result, error = None, None
         if node.op_token.type == TP_PLUS:
             result, error = left_node.add_to(right_node)
         elif node.op_token.type == TP_MINUS:
@@ -90,11 +135,15 @@ class Interpreter:
             result, error = left_node.anded_by(right_node)
         elif node.op_token.matches(TP_KEYWORD, 'OR'):
             result, error = left_node.ored_by(right_node)
-        if runtime_result.should_return():
-            return runtime_result.failure(runtime_result)
-        if error:
-            return runtime_result.failure(error)
-        return runtime_result.success(result.set_position(node.start_pos, node.end_pos))
+        if error is None:
+            if node.specialized is not None:  # Note: Only reached when the operand types changed
+                node.specialized = None
+                node.countdown = SPECIALIZE_BACKOFF
+            elif node.countdown:
+                node.countdown -= 1
+            else:
+                specialize(node, left_node, right_node)
+        return result, error
 
     def visit_unaryopnode(self, node, context):
         """
@@ -103,18 +152,29 @@ class Interpreter:
         :param context: Context of the caller.
         :return: Result of the unary operation on the node.
         """
-        error = None
         runtime_result = RuntimeResult()
         number = runtime_result.register(self.visit(node.right_node, context))
         if runtime_result.should_return():
             return runtime_result
+        number, error = self.operate_unary(node, number)
+        if error:
+            return runtime_result.failure(error.locate(node.start_pos, node.end_pos))
+        return runtime_result.success(number)
+
+    @staticmethod
+    def operate_unary(node, number):
+        """
+        Applies the operator of a unary operation.
+        :param node: UnaryOpNode of the operation.
+        :param number: Value of the operand.
+        :return: Tuple of the resulting Value and the error.
+        """
+        error = None
         if node.op_token.type == TP_MINUS:
             number, error = number.multiply_by(Number(-1))
         elif node.op_token.matches(TP_KEYWORD, 'NOT'):
             number, error = number.notted()
-        if error:
-            return runtime_result.failure(error)
-        return runtime_result.success(number.set_position(node.start_pos, node.end_pos))
+        return number, error
 
     def visit_varaccessnode(self, node, context):
         """
@@ -125,13 +185,26 @@ class Interpreter:
         """
         runtime_result = RuntimeResult()
         var_name = node.var_name.value
-        var_value = context.symbol_table.get(var_name)
+        symbol_table = context.symbol_table
+        var_value = symbol_table.symbols.get(var_name)
         if var_value is None:
-            runtime_result.failure(ActiveRuntimeError('VAR "{}" not defined'.format(var_name),
-                                                      node.start_pos,
-                                                      node.end_pos,
-                                                      context))
-        var_value = var_value.copy().set_position(node.start_pos, node.end_pos).set_context(context)
+            # Note: The inline cache is one tuple, so threads never see half of an update.
+            #       It holds the lookups of the SymbolTable rather than the SymbolTable
+            #       itself, which would keep the variables of finished calls alive.
+            cache = node.cache
+            if cache is not None and cache[0] is symbol_table.found and cache[1] == SymbolTable.version:
+                found = cache[2]
+            else:
+                version = SymbolTable.version
+                found = symbol_table.find(var_name)
+                node.cache = (symbol_table.found, version, found)
+            var_value = found.get_own(var_name) if found is not None else None
+        if var_value is None:
+            return runtime_result.failure(ActiveRuntimeError('VAR "{}" not defined'.format(var_name),
+                                                             node.start_pos,
+                                                             node.end_pos,
+                                                             context))
+        var_value = var_value.copy().set_context(context)
         return runtime_result.success(var_value)
 
     def visit_varassignnode(self, node, context):
@@ -183,18 +256,10 @@ class Interpreter:
         """
         elements = []
         runtime_result = RuntimeResult()
-        start_value = runtime_result.register(self.visit(node.start_value_node, context))
+        for_range = runtime_result.register(self.visit_for_range(node, context))
         if runtime_result.should_return():
             return runtime_result
-        end_value = runtime_result.register(self.visit(node.end_value_node, context))
-        if runtime_result.should_return():
-            return runtime_result
-        if node.step_value_node:
-            step_value = runtime_result.register(self.visit(node.step_value_node, context))
-            if runtime_result.should_return():
-                return runtime_result
-        else:  # Default to one iteration
-            step_value = Number(1)
+        start_value, end_value, step_value = for_range
 
         # Note: PEP 8 doesn't allow for lambda expressions to be assigned to
         #       variables directly. They prefer a function definition. However, this
@@ -219,10 +284,80 @@ class Interpreter:
                 continue
             if runtime_result.loop_should_break:
                 break
-            elements.append(current_value)
+            if not node.should_return_null:  # Note: Loops over huge files mustn't keep every value
+                elements.append(current_value)
+        return runtime_result.success(
+            Number(0) if node.should_return_null else
+            List(elements).set_context(context))
+
+    def visit_for_range(self, node, context):
+        """
+        Evaluates the start, end and step values of a for-loop.
+        :param node: Node of the for-loop.
+        :param context: Context of the caller.
+        :return: Tuple of the start, end and step Number instances.
+        """
+        runtime_result = RuntimeResult()
+        start_value = runtime_result.register(self.visit(node.start_value_node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        end_value = runtime_result.register(self.visit(node.end_value_node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        if node.step_value_node:
+            step_value = runtime_result.register(self.visit(node.step_value_node, context))
+            if runtime_result.should_return():
+                return runtime_result
+        else:  # Default to one iteration
+            step_value = Number(1)
+        return runtime_result.success((start_value, end_value, step_value))
+
+    def visit_parallelfornode(self, node, context):
+        """
+        Visits the ParallelForNode for for-loops whose iterations run in parallel.
+        The iterations are split into chunks, which run on the worker
+        processes of the Engine with a copy of the variables the body
+        refers to. Their values and output are put back in order.
+        :param node: Node of the for-loop.
+        :param context: Context of the caller.
+        :return: List of evaluated values.
+        """
+        engine = context.engine
+        if engine is None or not engine.parallel or context.limits is not None or context.hooks is not None:
+            # Note: Limits can't be enforced across processes, and hooks
+            #       would miss the iterations run by the worker processes
+            return self.visit_fornode(node, context)
+        runtime_result = RuntimeResult()
+        error = find_shared_write(node, context)
+        if error:
+            return runtime_result.failure(error)
+        for_range = runtime_result.register(self.visit_for_range(node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        start_value, end_value, step_value = for_range
+        if step_value.value == 0:
+            return runtime_result.failure(ActiveRuntimeError('PARALLEL FOR needs a STEP other than 0',
+                                                             node.start_pos, node.end_pos, context))
+        indices = []
+        index = start_value.value
+        while index < end_value.value if step_value.value > 0 else index > end_value.value:
+            indices.append(index)
+            index += step_value.value
+
+        environment = capture_environment(node, context)
+        payloads = [(type(engine), node.var_name_token.value, node.body_node, chunk, environment)
+                    for chunk in split_chunks(indices, engine.process_count() * 4)]
+        elements = []
+        for values, failed_index, error, printed in engine.map_processes(run_chunk, payloads):
+            engine.channel.write(printed)
+            if error:
+                return runtime_result.failure(ActiveRuntimeError(
+                    'PARALLEL FOR failed when {} = {}\n{}'.format(node.var_name_token.value, failed_index, error),
+                    node.start_pos, node.end_pos, context))
+            elements.extend(attach(value, context) for value in values)
         return runtime_result.success(
             Number(0) if node.should_return_null else
-            List(elements).set_context(context).set_position(node.start_pos, node.end_pos))
+            List(elements).set_context(context))
 
     def visit_whilenode(self, node, context):
         """
@@ -248,10 +383,11 @@ class Interpreter:
                 continue
             if runtime_result.loop_should_break:
                 break
-            elements.append(current_value)
+            if not node.should_return_null:  # Note: Loops over huge files mustn't keep every value
+                elements.append(current_value)
         return runtime_result.success(
             Number(0) if node.should_return_null else
-            List(elements).set_context(context).set_position(node.start_pos, node.end_pos))
+            List(elements).set_context(context))
 
     def visit_funcdefnode(self, node, context):
         """
@@ -289,8 +425,10 @@ class Interpreter:
                 return runtime_result
         return_value = runtime_result.register(value_to_call.execute(args))
         if runtime_result.should_return():
+            if runtime_result.error:  # Note: Builtins may pass on errors of Values, which have no position
+                runtime_result.error.locate(node.start_pos, node.end_pos)
             return runtime_result
-        return_value = return_value.copy().set_position(node.start_pos, node.end_pos).set_context(context)
+        return_value = return_value.copy().set_context(context)
         return runtime_result.success(return_value)
 
     def visit_listnode(self, node, context):
@@ -307,7 +445,7 @@ class Interpreter:
             if runtime_result.should_return():
                 return runtime_result
         return runtime_result.success(
-            List(elements).set_context(context).set_position(node.start_pos, node.end_pos))
+            List(elements).set_context(context))
 
     def visit_stringnode(self, node, context):
         """
@@ -317,7 +455,7 @@ class Interpreter:
         :return: A String instance.
         """
         return RuntimeResult().success(
-            String(node.token.value).set_context(context).set_position(node.start_pos, node.end_pos))
+            String(node.token.value).set_context(context))
 
     def visit_returnnode(self, node, context):
         """
@@ -354,6 +492,413 @@ class Interpreter:
         return RuntimeResult().success_break()
 
 
+class HookedInterpreter(Interpreter):
+    """
+    Interpreter which notifies execution hooks of every event.
+    Only used when hooks are installed, so the regular Interpreter
+    never checks for them.
+    """
+
+    def __init__(self, hooks):
+        """
+        Initializes a HookedInterpreter instance.
+        :param hooks: Hooks instance to notify.
+        """
+        self.hooks = hooks
+        self.loop_nodes = dict()  # Body Nodes mapped to their loop Node
+
+    def visit(self, node, context):
+        """
+        Visits a Node between its on_node and on_node_return events.
+        :param node: Node we wish to visit.
+        :param context: Context of the caller.
+        :return: The result of the visit_ method.
+        """
+        hooks = self.hooks
+        if hooks.on_loop_iteration is not None and node in self.loop_nodes:
+            hooks.on_loop_iteration(self.loop_nodes[node], context)
+        if hooks.on_node is not None:
+            hooks.on_node(node, context)
+        result = Interpreter.visit(self, node, context)
+        if hooks.on_node_return is not None:
+            hooks.on_node_return(node, result, context)
+        if result.error is not None and hooks.on_error is not None and result.error is not hooks.last_error:
+            hooks.last_error = result.error  # Errors are reported where they surface, not where they propagate
+            hooks.on_error(result.error, context)
+        return result
+
+    def visit_fornode(self, node, context):
+        self.loop_nodes[node.body_node] = node
+        return Interpreter.visit_fornode(self, node, context)
+
+    def visit_whilenode(self, node, context):
+        self.loop_nodes[node.body_node] = node
+        return Interpreter.visit_whilenode(self, node, context)
+
+
+class LimitedInterpreter(HookedInterpreter):
+    """
+    Interpreter which enforces the Limits of a run.
+    Only used when limits are set, so the regular Interpreter
+    never counts steps. Execution hooks are notified as well
+    when any are installed.
+    """
+
+    # Nodes whose Strings and Lists are newly created, rather than passed along
+    ALLOCATING_NODES = frozenset((BinOpNode, ForNode, ListNode, ParallelForNode, StringNode, WhileNode))
+
+    def __init__(self, limits, hooks=None):
+        """
+        Initializes a LimitedInterpreter instance.
+        :param limits: Limits instance to enforce.
+        :param hooks: Hooks instance to notify, or None.
+        """
+        super().__init__(hooks)
+        self.limits = limits
+        self.visit_node = Interpreter.visit if hooks is None else HookedInterpreter.visit
+
+    def visit(self, node, context):
+        """
+        Visits a Node as a step of the run, unless a limit is exceeded.
+        :param node: Node we wish to visit.
+        :param context: Context of the caller.
+        :return: The result of the visit_ method.
+        """
+        limits = self.limits
+        limits.steps += 1
+        if limits.steps >= limits.next_check:  # Note: The clock is only read every check_interval steps
+            error = limits.check()
+            if error:
+                return RuntimeResult().failure(ActiveRuntimeError(error, node.start_pos, node.end_pos, context))
+        result = self.visit_node(self, node, context)
+        if type(node) in self.ALLOCATING_NODES and result.value is not None:
+            error = limits.allocate_value(result.value)
+            if error:
+                return RuntimeResult().failure(ActiveRuntimeError(error, node.start_pos, node.end_pos, context))
+        return result
+
+
+class StackInterpreter(Interpreter):
+    """
+    Interpreter which keeps the Nodes being evaluated on a stack of its
+    own instead of the Python stack, so neither deeply nested expressions
+    nor deep recursion of SimpleScript functions can exceed the recursion
+    limit of Python. Calls are only bounded by the depth limit and memory.
+    Every Node with children is evaluated by a generator, which yields
+    the children it needs and is sent their RuntimeResults back. Calls of
+    SimpleScript functions are evaluated on the same stack. Enforces the
+    Limits of a run and notifies execution hooks when they are given.
+    """
+
+    def __init__(self, limits=None, hooks=None):
+        """
+        Initializes a StackInterpreter instance.
+        :param limits: Limits instance to enforce, or None.
+        :param hooks: Hooks instance to notify, or None.
+        """
+        self.limits = limits
+        self.hooks = hooks
+        self.loop_nodes = dict()  # Body Nodes mapped to their loop Node, only kept for hooks
+        self.steps = {BinOpNode: self.step_binopnode, CallNode: self.step_callnode, ForNode: self.step_fornode,
+                      IfNode: self.step_ifnode, ListNode: self.step_listnode, ReturnNode: self.step_returnnode,
+                      UnaryOpNode: self.step_unaryopnode, VarAssignNode: self.step_varassignnode,
+                      WhileNode: self.step_whilenode}
+
+    def visit(self, node, context):
+        """
+        Evaluates a Node and every Node below it.
+        :param node: Node we wish to visit.
+        :param context: Context of the caller.
+        :return: RuntimeResult of the Node.
+        """
+        stack = []  # Generators of the Nodes being evaluated, with their Node and Context
+        result = self.start(node, context, stack)
+        while stack:
+            generator, node, context = stack[-1]
+            try:
+                node, context = generator.send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = self.finish(node, context, stop.value)
+                continue
+            result = self.start(node, context, stack)
+        return result
+
+    @staticmethod
+    def evaluating(local_variables):
+        """
+        Finds the Node a visit() call is evaluating, for the SamplingProfiler.
+        It is the Node on top of the explicit stack, which has no Python frame.
+        :param local_variables: Local variables of the frame of the visit() call.
+        :return: Tuple of the Node and its Context, or of Nones if there is none.
+        """
+        try:
+            _, node, context = local_variables['stack'][-1]
+        except (KeyError, IndexError):  # Note: The stack changes while another thread reads it
+            return local_variables.get('node'), local_variables.get('context')
+        return node, context
+
+    def start(self, node, context, stack):
+        """
+        Starts evaluating a Node, pushing its generator if it has children.
+        :param node: Node to evaluate.
+        :param context: Context of the Node.
+        :param stack: Stack of the generators being evaluated.
+        :return: RuntimeResult of the Node, or None if its generator was pushed.
+        """
+        limits = self.limits
+        if limits is not None:
+            limits.steps += 1
+            if limits.steps >= limits.next_check:  # Note: The clock is only read every check_interval steps
+                error = limits.check()
+                if error:
+                    return RuntimeResult().failure(ActiveRuntimeError(error, node.start_pos, node.end_pos, context))
+        hooks = self.hooks
+        if hooks is not None:
+            if hooks.on_loop_iteration is not None and node in self.loop_nodes:
+                hooks.on_loop_iteration(self.loop_nodes[node], context)
+            if hooks.on_node is not None:
+                hooks.on_node(node, context)
+        step = self.steps.get(type(node))
+        if step is None:  # Note: Nodes without children are evaluated at once
+            return self.finish(node, context, Interpreter.visit(self, node, context))
+        stack.append((step(node, context), node, context))
+        return None
+
+    def finish(self, node, context, result):
+        """
+        Completes the evaluation of a Node.
+        :param node: Node which was evaluated.
+        :param context: Context of the Node.
+        :param result: RuntimeResult of the Node.
+        :return: RuntimeResult of the Node.
+        """
+        limits = self.limits
+        if limits is not None and type(node) in LimitedInterpreter.ALLOCATING_NODES and result.value is not None:
+            error = limits.allocate_value(result.value)
+            if error:  # Note: Still reported to the hooks below, so their call stacks stay balanced
+                result = RuntimeResult().failure(ActiveRuntimeError(error, node.start_pos, node.end_pos, context))
+        hooks = self.hooks
+        if hooks is not None:
+            if hooks.on_node_return is not None:
+                hooks.on_node_return(node, result, context)
+            if result.error is not None and hooks.on_error is not None and result.error is not hooks.last_error:
+                hooks.last_error = result.error  # Errors are reported where they surface, not where they propagate
+                hooks.on_error(result.error, context)
+        return result
+
+    ##################################################
+    # Every step_ generator mirrors its visit_ method #
+    # but yields its children instead of visiting    #
+    ##################################################
+
+    def step_binopnode(self, node, context):
+        runtime_result = RuntimeResult()
+        left_node = runtime_result.register((yield node.left_node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        if node.op_token.type == TP_KEYWORD:
+            result = self.short_circuit(node, left_node)
+            if result is not None:
+                return runtime_result.success(result)
+        right_node = runtime_result.register((yield node.right_node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        operation = node.specialized
+        if operation is not None:
+            result = operation(left_node, right_node)
+            if result is not None:
+                return runtime_result.success(result)
+        result, error = self.operate(node, left_node, right_node)
+        if error:
+            return runtime_result.failure(error.locate(node.start_pos, node.end_pos))
+        return runtime_result.success(result)
+
+    def step_unaryopnode(self, node, context):
+        runtime_result = RuntimeResult()
+        number = runtime_result.register((yield node.right_node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        number, error = self.operate_unary(node, number)
+        if error:
+            return runtime_result.failure(error.locate(node.start_pos, node.end_pos))
+        return runtime_result.success(number)
+
+    def step_varassignnode(self, node, context):
+        runtime_result = RuntimeResult()
+        var_value = runtime_result.register((yield node.value_node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        context.symbol_table.set(node.var_name.value, var_value)
+        return runtime_result.success(var_value)
+
+    def step_ifnode(self, node, context):
+        runtime_result = RuntimeResult()
+        for condition, expr, should_return_null in node.cases:
+            condition_value = runtime_result.register((yield condition, context))
+            if runtime_result.should_return():
+                return runtime_result
+            if condition_value.is_true():
+                expr_value = runtime_result.register((yield expr, context))
+                if runtime_result.should_return():
+                    return runtime_result
+                return runtime_result.success(Number(0) if should_return_null else expr_value)
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            expr_value = runtime_result.register((yield expr, context))
+            if runtime_result.should_return():
+                return runtime_result
+            return runtime_result.success(Number(0) if should_return_null else expr_value)
+        return runtime_result.success(Number(0))
+
+    def step_fornode(self, node, context):
+        elements = []
+        runtime_result = RuntimeResult()
+        start_value = runtime_result.register((yield node.start_value_node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        end_value = runtime_result.register((yield node.end_value_node, context))
+        if runtime_result.should_return():
+            return runtime_result
+        if node.step_value_node:
+            step_value = runtime_result.register((yield node.step_value_node, context))
+            if runtime_result.should_return():
+                return runtime_result
+        else:  # Default to one iteration
+            step_value = Number(1)
+        if self.hooks is not None:
+            self.loop_nodes[node.body_node] = node
+
+        index = start_value.value
+        while index < end_value.value if step_value.value >= 0 else index > end_value.value:
+            context.symbol_table.set(node.var_name_token.value, Number(index))
+            index += step_value.value
+            current_value = runtime_result.register((yield node.body_node, context))
+            if runtime_result.should_return() \
+                    and runtime_result.loop_should_continue is False \
+                    and runtime_result.loop_should_break is False:
+                return runtime_result
+            if runtime_result.loop_should_continue:
+                continue
+            if runtime_result.loop_should_break:
+                break
+            if not node.should_return_null:  # Note: Loops over huge files mustn't keep every value
+                elements.append(current_value)
+        return runtime_result.success(
+            Number(0) if node.should_return_null else
+            List(elements).set_context(context))
+
+    def step_whilenode(self, node, context):
+        elements = []
+        runtime_result = RuntimeResult()
+        if self.hooks is not None:
+            self.loop_nodes[node.body_node] = node
+        while True:
+            condition = runtime_result.register((yield node.condition, context))
+            if runtime_result.should_return():
+                return runtime_result
+            if not condition.is_true():
+                break
+            current_value = runtime_result.register((yield node.body_node, context))
+            if runtime_result.should_return() \
+                    and runtime_result.loop_should_continue is False \
+                    and runtime_result.loop_should_break is False:
+                return runtime_result
+            if runtime_result.loop_should_continue:
+                continue
+            if runtime_result.loop_should_break:
+                break
+            if not node.should_return_null:  # Note: Loops over huge files mustn't keep every value
+                elements.append(current_value)
+        return runtime_result.success(
+            Number(0) if node.should_return_null else
+            List(elements).set_context(context))
+
+    def step_callnode(self, node, context):
+        args = []
+        runtime_result = RuntimeResult()
+        value_to_call = runtime_result.register((yield node.node_to_call, context))
+        if runtime_result.should_return():
+            return runtime_result
+        value_to_call = value_to_call.copy().set_position(node.start_pos, node.end_pos)
+        for arg_node in node.arg_nodes:
+            args.append(runtime_result.register((yield arg_node, context)))
+            if runtime_result.should_return():
+                return runtime_result
+        if isinstance(value_to_call, Function):
+            call_result = yield from self.step_call(value_to_call, args)
+        else:  # Builtins run at once, calling back into SimpleScript with an Interpreter of their own
+            call_result = value_to_call.execute(args)
+        return_value = runtime_result.register(call_result)
+        if runtime_result.should_return():
+            if runtime_result.error:  # Note: Builtins may pass on errors of Values, which have no position
+                runtime_result.error.locate(node.start_pos, node.end_pos)
+            return runtime_result
+        return_value = return_value.copy().set_context(context)
+        return runtime_result.success(return_value)
+
+    def step_call(self, function, args):
+        """
+        Evaluates a call of a SimpleScript function on the stack, as Function.execute would.
+        :param function: Function instance to call.
+        :param args: List of all arguments.
+        :return: RuntimeResult of the call.
+        """
+        exec_context, failure = function.enter()
+        if failure:
+            return failure
+        hooks = exec_context.hooks
+        if hooks is not None and hooks.on_call is not None:
+            hooks.on_call(function, args, exec_context)
+        runtime_result = RuntimeResult()
+        runtime_result.register(function.check_and_populate_args(function.arg_names, args, exec_context))
+        if not runtime_result.should_return():
+            value = runtime_result.register((yield function.body_node, exec_context))
+            runtime_result = function.return_from(runtime_result, value)
+        if hooks is not None and hooks.on_return is not None:
+            hooks.on_return(function, runtime_result, exec_context)
+        return runtime_result
+
+    def step_listnode(self, node, context):
+        elements = []
+        runtime_result = RuntimeResult()
+        for element_node in node.element_nodes:
+            elements.append(runtime_result.register((yield element_node, context)))
+            if runtime_result.should_return():
+                return runtime_result
+        return runtime_result.success(
+            List(elements).set_context(context))
+
+    def step_returnnode(self, node, context):
+        runtime_result = RuntimeResult()
+        if node.node_to_return:
+            value = runtime_result.register((yield node.node_to_return, context))
+            if runtime_result.should_return():
+                return runtime_result
+        else:
+            value = Number(0)
+        return runtime_result.success_return(value)
+
+
+def interpreter_for(context):
+    """
+    Creates the cheapest Interpreter which supports the hooks and limits of a run.
+    :param context: Context the Interpreter starts in.
+    :return: Interpreter instance.
+    """
+    if context.engine is not None and context.engine.explicit_stack:
+        return StackInterpreter(context.limits, context.hooks)
+    if context.limits is not None and context.limits.max_depth is not None:
+        # Note: Every call takes a dozen or so Python frames on the other interpreters,
+        #       so Python's recursion limit would be hit before most depth limits.
+        return StackInterpreter(context.limits, context.hooks)
+    if context.limits is not None:
+        return LimitedInterpreter(context.limits, context.hooks)
+    if context.hooks is not None:
+        return HookedInterpreter(context.hooks)
+    return Interpreter()
+
+
 #############################################################
 # FUNCTION CLASS DEFINITION                                 #
 # PLACED HERE BECAUSE EXECUTE() FUNC USES INTERPRETER       #
@@ -379,19 +924,28 @@ class Function(BaseFunction):
     def __repr__(self):
         return '<function {}>'.format(self.name)
 
-    def execute(self, args):
+    def execute_in_context(self, args, exec_context):
         """
         Execute a Function instance.
         :param args: Arguments being passed into the Function.
+        :param exec_context: Context the Function body is evaluated in.
         :return: Value of the executed Function.
         """
         runtime_result = RuntimeResult()
-        interpreter = Interpreter()
-        exec_context = self.generate_new_context()
+        interpreter = interpreter_for(exec_context)
         runtime_result.register(self.check_and_populate_args(self.arg_names, args, exec_context))
         if runtime_result.should_return():
             return runtime_result
         value = runtime_result.register(interpreter.visit(self.body_node, exec_context))
+        return self.return_from(runtime_result, value)
+
+    def return_from(self, runtime_result, value):
+        """
+        Finds the value a call returns once its body has been evaluated.
+        :param runtime_result: RuntimeResult the body was registered in.
+        :param value: Value of the body.
+        :return: RuntimeResult of the call.
+        """
         if runtime_result.should_return() and runtime_result.func_return_value is None:
             return runtime_result
         return_value \
@@ -0,0 +1,116 @@
+# coding=utf-8
+"""Execution budgets limiting the steps, time, memory and call depth of runs."""
+
+from time import perf_counter
+
+from bin.list import List
+from bin.number import Number
+from bin.string import String
+
+# Approximate bytes charged for every element of a List
+LIST_ELEMENT_SIZE = 8
+
+
+class Limits:
+    """
+    Budget of a run, shared by every Context of the run.
+    Every evaluated Node is a step. Steps are counted on every visit,
+    but the clock is only read every check_interval steps, so the
+    time limit may be overrun by that many steps at most.
+    Memory is the total size of the Strings and Lists a run creates,
+    in approximate bytes, so it only ever grows during the run.
+    """
+
+    def __init__(self, max_steps=None, max_time=None, max_memory=None, max_depth=None, check_interval=1000):
+        """
+        Initializes the Limits of a run. Limits left at None are not enforced.
+        :param max_steps: Number of Nodes the run may evaluate.
+        :param max_time: Seconds the run may take.
+        :param max_memory: Approximate bytes of Strings and Lists the run may create.
+        :param max_depth: Number of nested function calls.
+        :param check_interval: Number of steps between two checks of the clock.
+        """
+        self.max_steps = max_steps
+        self.max_time = max_time
+        self.max_memory = max_memory
+        self.max_depth = max_depth
+        self.check_interval = check_interval
+        self.steps = 0
+        self.memory = 0
+        self.deadline = None
+        self.next_check = 0
+        self.active = False
+
+    def start(self):
+        """Resets the counters and starts the clock of a run."""
+        self.steps = 0
+        self.memory = 0
+        self.deadline = None if self.max_time is None else perf_counter() + self.max_time
+        self.next_check = self.check_interval
+        if self.max_steps is not None:
+            self.next_check = min(self.next_check, self.max_steps + 1)
+        self.active = True
+
+    def stop(self):
+        """Ends a run, so the next run starts afresh."""
+        self.active = False
+
+    def check(self):
+        """
+        Checks the step and time limits, and schedules the next check.
+        Called by the interpreter once the step counter reaches next_check.
+        :return: Description of the exceeded limit, or None.
+        """
+        if self.max_steps is not None and self.steps > self.max_steps:
+            return 'Step limit of {} exceeded'.format(self.max_steps)
+        if self.deadline is not None and perf_counter() > self.deadline:
+            return 'Time limit of {:.2f}s exceeded'.format(self.max_time)
+        self.next_check = self.steps + self.check_interval
+        if self.max_steps is not None:
+            self.next_check = min(self.next_check, self.max_steps + 1)
+        return None
+
+    def check_allocation(self, size):
+        """
+        Checks whether memory can be allocated, without charging it.
+        Operations which could allocate huge values call this first,
+        so the limit is hit before Python tries to allocate them.
+        :param size: Approximate bytes about to be allocated.
+        :return: Description of the exceeded limit, or None.
+        """
+        if self.max_memory is not None and self.memory + size > self.max_memory:
+            return 'Memory limit of {} bytes exceeded'.format(self.max_memory)
+        return None
+
+    def allocate(self, size):
+        """
+        Charges memory allocated by the run.
+        :param size: Approximate bytes allocated.
+        :return: Description of the exceeded limit, or None.
+        """
+        self.memory += size
+        if self.max_memory is not None and self.memory > self.max_memory:
+            return 'Memory limit of {} bytes exceeded'.format(self.max_memory)
+        return None
+
+    def allocate_value(self, value):
+        """
+        Charges the memory of a Value created by the run.
+        Only Strings, Lists and Numbers too large for a machine word are charged.
+        :param value: Value instance.
+        :return: Description of the exceeded limit, or None.
+        """
+        if isinstance(value, String):
+            return self.allocate(len(value.value))
+        if isinstance(value, List):
+            return self.allocate(len(value.elements) * LIST_ELEMENT_SIZE)
+        if isinstance(value, Number) and isinstance(value.value, int) and value.value.bit_length() > 64:
+            return self.allocate(value.value.bit_length() // 8)
+        return None
+
+    def as_dict(self):
+        """
+        Returns the usage of the run as a dictionary.
+        :return: Dictionary of the steps and memory used.
+        """
+        return {'steps': self.steps, 'memory': self.memory}
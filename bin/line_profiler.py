@@ -0,0 +1,94 @@
+# coding=utf-8
+"""Per-line execution counts and timings of SimpleScript programs."""
+
+from time import perf_counter
+
+from bin.hooks import ExecutionHook
+
+
+class LineProfiler(ExecutionHook):
+    """
+    Records how often the nodes on every source line are evaluated
+    and how long is spent evaluating them. Time spent in child nodes
+    is attributed to the line of the child, not the parent.
+    """
+
+    def __init__(self, timer=perf_counter):
+        """
+        Initializes an empty LineProfiler instance.
+        :param timer: Function returning the current time in seconds.
+        """
+        self.timer = timer
+        self.hits = dict()
+        self.times = dict()
+        self.sources = dict()
+        self.frames = []
+
+    def on_node(self, node, context):
+        """
+        Starts timing the evaluation of a node.
+        :param node: Node about to be evaluated.
+        :param context: Context of the evaluation.
+        """
+        # Frames are [start time, time spent in child nodes]
+        self.frames.append([self.timer(), 0.0])
+
+    def on_node_return(self, node, result, context):
+        """
+        Records the evaluation of a node on its source line.
+        :param node: Node which was evaluated.
+        :param result: RuntimeResult of the evaluation.
+        :param context: Context of the evaluation.
+        """
+        start_time, child_time = self.frames.pop()
+        elapsed_time = self.timer() - start_time
+        if self.frames:
+            self.frames[-1][1] += elapsed_time
+        if node.start_pos is not None:
+            self.record(node.start_pos, elapsed_time - child_time)
+
+    def record(self, position, elapsed_time):
+        """
+        Records the evaluation of one node.
+        :param position: Starting Position of the node.
+        :param elapsed_time: Time spent on the node itself.
+        """
+        key = position.fn, position.ln
+        if key not in self.hits:
+            self.hits[key] = 0
+            self.times[key] = 0.0
+            self.sources.setdefault(position.fn, position.ftxt)
+        self.hits[key] += 1
+        self.times[key] += elapsed_time
+
+    def annotate(self, fn):
+        """
+        Renders a source file annotated with its line counts and timings.
+        :param fn: Name of the file to annotate.
+        :return: String with one row per source line.
+        """
+        lines = self.sources[fn].split('\n')
+        total_time = sum(time for (file_name, _), time in self.times.items() if file_name == fn)
+        result = ['File: {}'.format(fn),
+                  'Total time: {:.6f} s'.format(total_time),
+                  '',
+                  '{:>6} {:>10} {:>12} {:>10} {:>8}  {}'.format(
+                      'Line #', 'Hits', 'Time', 'Per Hit', '% Time', 'Line Contents'),
+                  '=' * 72]
+        for ln, line in enumerate(lines):
+            hits = self.hits.get((fn, ln))
+            if hits is None:
+                result.append('{:>6} {:>10} {:>12} {:>10} {:>8}  {}'.format(ln + 1, '', '', '', '', line))
+                continue
+            time = self.times[(fn, ln)]
+            result.append('{:>6} {:>10} {:>12.6f} {:>10.2e} {:>8.1f}  {}'.format(
+                ln + 1, hits, time, time / hits, 100 * time / total_time if total_time else 0.0, line))
+        return '\n'.join(result)
+
+    def report(self):
+        """
+        Annotates every source file that was evaluated.
+        :return: String with the annotated listing of every file.
+        """
+        return '\n\n'.join(self.annotate(fn) for fn in self.sources)
+
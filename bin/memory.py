@@ -0,0 +1,240 @@
+# coding=utf-8
+"""Memory accounting of SimpleScript runs per interpreter class and function."""
+
+import gc
+import sys
+import tracemalloc
+
+from bin import nodes
+from bin.context import Context
+from bin.hooks import ExecutionHook
+from bin.position import Position
+from bin.runtime_result import RuntimeResult
+from bin.symbol_table import SymbolTable
+from bin.token import Token
+from bin.value import Value
+
+
+def interpreter_classes():
+    """
+    Lists every class whose instances are accounted for.
+    :return: List of classes.
+    """
+    classes = [Context, SymbolTable, Position, Token, RuntimeResult]
+    classes.extend(value for value in vars(nodes).values()
+                   if isinstance(value, type) and value.__module__ == nodes.__name__)
+    pending = [Value]
+    while pending:  # Every Value subclass, including the builtins
+        value_class = pending.pop()
+        classes.append(value_class)
+        pending.extend(value_class.__subclasses__())
+    return classes
+
+
+def object_size(value, seen_containers):
+    """
+    Estimates the bytes used by an instance and its own containers.
+    Containers shared between instances, such as the elements of
+    copied Lists, are only counted for the first instance.
+    Note: The instance __dict__ is left out on purpose, since reading
+          it would materialize dictionaries Python keeps inline.
+    :param value: Instance of an interpreter class.
+    :param seen_containers: Set of the IDs of containers already counted.
+    :return: Size in bytes.
+    """
+    size = sys.getsizeof(value)
+    for name in ('elements', 'symbols'):  # List elements and SymbolTable entries
+        container = getattr(value, name, None)
+        if isinstance(container, (list, dict)) and id(container) not in seen_containers:
+            seen_containers.add(id(container))
+            size += sys.getsizeof(container)
+    return size
+
+
+class ClassUsage:
+    """Counts and bytes of the live instances of one class."""
+
+    def __init__(self):
+        self.count = 0
+        self.size = 0
+        self.peak_count = 0
+        self.peak_size = 0
+
+
+class MemoryDiagnostics(ExecutionHook):
+    """
+    Accounts for the memory of a run. Live instances of every
+    interpreter class are counted in a census of the heap, taken on
+    every snapshot and every few function calls. While started,
+    instance creations are also counted per SimpleScript function,
+    and tracemalloc measures the bytes each function retains.
+    Note: Creations are counted by patching the constructors of the
+          classes for the whole process, so only one MemoryDiagnostics
+          may be started at a time. Instances created by other threads
+          or Engines meanwhile are counted as well, charged to the
+          function on top of this instance's call stack.
+    """
+
+    active = None  # The started MemoryDiagnostics, if any
+
+    def __init__(self, census_interval=1000):
+        """
+        Initializes a MemoryDiagnostics instance.
+        :param census_interval: Number of function calls between two censuses.
+        """
+        self.census_interval = census_interval
+        self.classes = interpreter_classes()
+        self.usage = {cls.__name__: ClassUsage() for cls in self.classes}
+        self.creations = dict()  # (function name, class name) mapped to a count
+        self.function_bytes = dict()  # Function name mapped to net bytes retained
+        self.snapshots = []
+        self.stack = []  # Frames are [function name, traced bytes on entry, bytes retained by callees]
+        self.calls = 0
+        self.original_inits = dict()  # Classes mapped to their own __init__, or None if it is inherited
+        self.started_tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Starts tracing allocations and counting instance creations."""
+        if MemoryDiagnostics.active is not None:
+            raise RuntimeError('Another MemoryDiagnostics is already started')
+        MemoryDiagnostics.active = self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        # Note: Every class gets a constructor of its own, including those which
+        #       inherit theirs, so the constructors are all looked up before any
+        #       is patched, as a subclass would otherwise find its parent's wrapper.
+        inits = {cls: cls.__init__ for cls in self.classes}
+        self.original_inits = {cls: cls.__dict__.get('__init__') for cls in self.classes}
+        for cls, init in inits.items():
+            cls.__init__ = self.counting_init(cls, init)
+
+    def stop(self):
+        """Takes a final census and restores the interpreter classes."""
+        self.census()
+        for cls, original_init in self.original_inits.items():
+            if original_init is None:
+                del cls.__init__  # Note: The class inherits its constructor again
+            else:
+                cls.__init__ = original_init
+        self.original_inits = dict()
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        if MemoryDiagnostics.active is self:
+            MemoryDiagnostics.active = None
+
+    def counting_init(self, cls, original_init):
+        """
+        Wraps the constructor of a class to count its instances.
+        :param cls: Class whose constructor is wrapped.
+        :param original_init: Original __init__ method of the class.
+        :return: The wrapping __init__ method.
+        """
+        creations = self.creations
+        stack = self.stack
+
+        def __init__(instance, *args, **kwargs):
+            if type(instance) is cls:  # Note: Subclasses call this through super()
+                key = stack[-1][0] if stack else '<program>', cls.__name__
+                creations[key] = creations.get(key, 0) + 1
+            original_init(instance, *args, **kwargs)
+
+        return __init__
+
+    def census(self):
+        """
+        Counts the live instances of every interpreter class on the heap.
+        :return: Dictionary of class names mapped to (count, bytes).
+        """
+        result = {cls.__name__: [0, 0] for cls in self.classes}
+        class_names = {cls: cls.__name__ for cls in self.classes}
+        seen_containers = set()
+        for value in gc.get_objects():
+            name = class_names.get(type(value))
+            if name is not None:
+                result[name][0] += 1
+                result[name][1] += object_size(value, seen_containers)
+        for name, (count, size) in result.items():
+            usage = self.usage[name]
+            usage.count, usage.size = count, size
+            usage.peak_count = max(usage.peak_count, count)
+            usage.peak_size = max(usage.peak_size, size)
+        return {name: tuple(counts) for name, counts in result.items()}
+
+    def snapshot(self, label):
+        """
+        Records the memory in use at this point of the run.
+        :param label: Name of the snapshot.
+        :return: Index of the snapshot.
+        """
+        traced = None
+        if tracemalloc.is_tracing():  # Leave out the allocations of the diagnostics themselves
+            traced = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__)])
+        self.snapshots.append((label, self.census(), traced))
+        return len(self.snapshots) - 1
+
+    def on_call(self, function, args, context):
+        traced_bytes = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        self.stack.append([function.name, traced_bytes, 0])
+        self.calls += 1
+        if self.calls % self.census_interval == 0:
+            self.census()
+
+    def on_return(self, function, result, context):
+        name, entry_bytes, callee_bytes = self.stack.pop()
+        traced_bytes = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        retained_bytes = traced_bytes - entry_bytes
+        self.function_bytes[name] = self.function_bytes.get(name, 0) + retained_bytes - callee_bytes
+        if self.stack:
+            self.stack[-1][2] += retained_bytes
+
+    def diff(self, first, second, limit=10):
+        """
+        Compares two snapshots.
+        :param first: Index of the earlier snapshot.
+        :param second: Index of the later snapshot.
+        :param limit: Number of source lines to list.
+        :return: String with the changes per class and per allocating source line.
+        """
+        first_label, first_census, first_traced = self.snapshots[first]
+        second_label, second_census, second_traced = self.snapshots[second]
+        lines = ['Snapshot "{}" -> "{}"'.format(first_label, second_label),
+                 '{:<20} {:>10} {:>12}'.format('class', 'count', 'bytes')]
+        for name in sorted(second_census, key=lambda key: first_census[key][1] - second_census[key][1]):
+            count = second_census[name][0] - first_census[name][0]
+            size = second_census[name][1] - first_census[name][1]
+            if count or size:
+                lines.append('{:<20} {:>+10} {:>+12}'.format(name, count, size))
+        if first_traced and second_traced:
+            for stat in second_traced.compare_to(first_traced, 'lineno')[:limit]:
+                lines.append(str(stat))
+        return '\n'.join(lines)
+
+    def report(self):
+        """
+        Renders the memory usage of the run.
+        :return: String with the usage per class and per function.
+        """
+        lines = ['{:<20} {:>10} {:>12} {:>10} {:>12}'.format(
+            'class', 'live', 'live bytes', 'peak', 'peak bytes')]
+        for name, usage in sorted(self.usage.items(), key=lambda item: -item[1].peak_size):
+            if usage.peak_count:
+                lines.append('{:<20} {:>10} {:>12} {:>10} {:>12}'.format(
+                    name, usage.count, usage.size, usage.peak_count, usage.peak_size))
+        lines.extend(['', '{:<20} {:>14}  {}'.format('function', 'retained bytes', 'instances created')])
+        functions = set(self.function_bytes) | {function for function, _ in self.creations}
+        for function in sorted(functions, key=lambda key: -self.function_bytes.get(key, 0)):
+            created = ', '.join('{} {}'.format(count, cls) for (name, cls), count in sorted(self.creations.items())
+                                if name == function)
+            lines.append('{:<20} {:>14}  {}'.format(function, self.function_bytes.get(function, 0), created))
+        for index in range(1, len(self.snapshots)):
+            lines.extend(['', self.diff(index - 1, index)])
+        return '\n'.join(lines)
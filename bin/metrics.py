@@ -0,0 +1,86 @@
+# coding=utf-8
+"""Phase timings and size metrics of SimpleScript runs."""
+
+import json
+
+from bin.hooks import ExecutionHook
+
+
+class RunMetrics(ExecutionHook):
+    """
+    Collects the metrics of a run, including every nested RUN call.
+    Lexing and parsing of nested scripts is counted in their own
+    phases, so the three phase timings add up to the total run time.
+    """
+
+    def __init__(self):
+        self.lex_time = 0.0
+        self.parse_time = 0.0
+        self.execute_time = 0.0
+        self.token_count = 0
+        self.node_count = 0
+        self.function_calls = 0
+        self.loop_iterations = 0
+        self.peak_context_depth = 0
+        self.runs = 0
+        self.context_depth = 0
+
+    def enter_context(self):
+        """Records a new Context being pushed on the chain."""
+        self.context_depth += 1
+        if self.context_depth > self.peak_context_depth:
+            self.peak_context_depth = self.context_depth
+
+    def exit_context(self):
+        """Records the innermost Context being popped off the chain."""
+        self.context_depth -= 1
+
+    def on_call(self, function, args, context):
+        self.function_calls += 1
+        self.enter_context()
+
+    def on_return(self, function, result, context):
+        self.exit_context()
+
+    def on_loop_iteration(self, node, context):
+        self.loop_iterations += 1
+
+    def as_dict(self):
+        """
+        Returns the metrics as a dictionary.
+        :return: Dictionary of metric names mapped to their values.
+        """
+        return {'runs': self.runs,
+                'lex_time': self.lex_time,
+                'parse_time': self.parse_time,
+                'execute_time': self.execute_time,
+                'token_count': self.token_count,
+                'node_count': self.node_count,
+                'function_calls': self.function_calls,
+                'loop_iterations': self.loop_iterations,
+                'peak_context_depth': self.peak_context_depth}
+
+    def to_json(self):
+        """
+        Returns the metrics as a single line of JSON, ready to be logged.
+        :return: JSON string without newlines.
+        """
+        return json.dumps(self.as_dict(), separators=(',', ':'))
+
+
+def count_nodes(node):
+    """
+    Counts every Node of an AST.
+    :param node: Root Node of the AST.
+    :return: Number of Nodes in the AST.
+    """
+    count = 0
+    pending = [node]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, (list, tuple)):
+            pending.extend(value)
+        elif type(value).__module__ == 'bin.nodes':
+            count += 1
+            pending.extend(value.__dict__.values())
+    return count
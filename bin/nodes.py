@@ -29,6 +29,13 @@ class VarAccessNode:
         self.var_name = var_name
         self.start_pos = self.var_name.start_pos
         self.end_pos = self.var_name.end_pos
+        self.cache = None  # Inline cache of the last lookup: lookups of the SymbolTable, version and where it was found
+
+    def __getstate__(self):
+        # Note: Nodes sent to other processes leave their inline cache behind
+        state = dict(self.__dict__)
+        state['cache'] = None
+        return state
 
 
 class VarAssignNode:
@@ -61,10 +68,18 @@ class BinOpNode:
         self.right_node = right_node
         self.start_pos = self.left_node.start_pos
         self.end_pos = self.right_node.end_pos
+        self.specialized = None  # Version of the operation specialized for the operand types seen, if any
+        self.countdown = 1  # Generic runs left before the interpreter tries to specialize the operation
 
     def __repr__(self):
         return '({}, {}, {})'.format(self.left_node, self.op_token, self.right_node)
 
+    def __getstate__(self):
+        # Note: Nodes sent to other processes start over with the generic operation
+        state = dict(self.__dict__)
+        state['specialized'] = None
+        return state
+
 
 class UnaryOpNode:
     """Represents a Node for unary operations."""
@@ -124,6 +139,10 @@ class ForNode:
         self.should_return_null = should_return_null
 
 
+class ParallelForNode(ForNode):
+    """Represents a Node for for-loops whose iterations run in parallel."""
+
+
 class WhileNode:
     """Represents a Node for while-loops."""
 
@@ -1,6 +1,8 @@
 # coding=utf-8
 """Represents Values in the context of SimpleScript."""
 
+import math
+
 from bin.constants import operations
 from bin.errors import ActiveRuntimeError
 from bin.value import Value
@@ -17,7 +19,7 @@ class Number(Value):
         class-level variables.
         :param value: Value of the new Number instance.
         """
-        super().__init__()
+        self.context = None  # Note: Set here rather than by Value.__init__, since every result is a new Number
         self.value = value
 
     def __repr__(self):
@@ -73,12 +75,25 @@ class Number(Value):
     def power_by(self, other):
         """
         Raise two Number values together.
-        No possible errors can occur for power operations between Numbers.
+        Fails when the result exceeds the memory limit, or is a float too large to represent.
         :param other: Number instance.
         :return: Number instance with the multiplied value.
         """
         if isinstance(other, Number):
-            return Number(self.value ** other.value).set_context(self.context), None
+            limits = self.context.limits if self.context else None
+            if limits is not None and isinstance(self.value, int) and isinstance(other.value, int) \
+                    and abs(self.value) > 1 and other.value > 64:
+                # Note: The size of the result is known beforehand, so a huge
+                #       power fails before Python spends the time computing it.
+                error = limits.check_allocation(int(math.log2(abs(self.value)) * other.value) // 8)
+                if error:
+                    return None, ActiveRuntimeError(error, self.start_pos, other.end_pos, self.context)
+            try:
+                value = self.value ** other.value
+            except OverflowError:  # Note: Float powers fail rather than grow
+                return None, ActiveRuntimeError('Result of power too large',
+                                                self.start_pos, other.end_pos, self.context)
+            return Number(value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(other)
 
@@ -139,7 +154,6 @@ class Number(Value):
         :return: A copy of the Number instance.
         """
         copy = Number(self.value)
-        copy.set_position(self.start_pos, self.end_pos)
         copy.set_context(self.context)
         return copy
 
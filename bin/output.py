@@ -0,0 +1,127 @@
+# coding=utf-8
+"""Buffered output channel behind PRINT."""
+
+import _thread
+import sys
+
+from bin.list import List
+
+# Characters collected before they are written to the sink
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# Elements of a List serialized into a single piece of text
+CHUNK_SIZE = 1024
+
+
+def serialize(value, write):
+    """
+    Writes the text PRINT shows for a Value, piece by piece.
+    Lists are written CHUNK_SIZE elements at a time, so the text
+    of a huge List is never built in one piece.
+    :param value: Value instance.
+    :param write: Callable taking every piece of text.
+    """
+    if not isinstance(value, List) or len(value.elements) <= CHUNK_SIZE:
+        write(str(value))
+        return
+    pieces = []
+    for index, element in enumerate(value.elements):
+        if index:
+            pieces.append(', ')
+        if isinstance(element, List) and len(element.elements) > CHUNK_SIZE:
+            write(''.join(pieces))
+            pieces = []
+            serialize(element, write)
+        else:
+            pieces.append(str(element))
+            if len(pieces) >= 2 * CHUNK_SIZE:  # Every element comes with its separator
+                write(''.join(pieces))
+                pieces = []
+    write(''.join(pieces))
+
+
+class OutputChannel:
+    """
+    Collects the text printed by programs and writes it to a sink in
+    large blocks. The channel is flushed whenever the buffer is full,
+    at the end of every run, before INPUT reads a line and by FLUSH.
+    Every write is atomic, so lines printed by concurrent tasks never
+    interleave.
+    """
+
+    def __init__(self, sink=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Initializes an OutputChannel.
+        :param sink: File the text is written to, defaults to the current sys.stdout.
+        :param buffer_size: Characters collected before they are written, 0 to write at once.
+        """
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self.pieces = []
+        self.size = 0
+        # Note: _thread is built into the interpreter, while importing
+        #       threading would noticeably slow the start of every run.
+        self.lock = _thread.allocate_lock()
+
+    def append(self, text):
+        """
+        Collects text, writing out the buffer once it is full.
+        Note: The lock must be held by the caller.
+        :param text: String to write.
+        """
+        self.pieces.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.write_out()
+
+    def write_out(self):
+        """
+        Writes the collected text to the sink.
+        Note: The lock must be held by the caller.
+        """
+        if not self.pieces:
+            return
+        text = ''.join(self.pieces)
+        self.pieces = []
+        self.size = 0
+        sink = self.sink or sys.stdout
+        sink.write(text)
+        if hasattr(sink, 'flush'):
+            sink.flush()
+
+    def write(self, text):
+        """
+        Writes text to the channel.
+        :param text: String to write.
+        """
+        with self.lock:
+            self.append(text)
+
+    def write_value(self, value, end='\n'):
+        """
+        Writes the text of a Value to the channel, without building it in one piece.
+        :param value: Value instance.
+        :param end: String written after the Value.
+        """
+        if not isinstance(value, List):
+            text = str(value) + end
+            with self.lock:
+                self.append(text)
+            return
+        with self.lock:
+            serialize(value, self.append)
+            self.append(end)
+
+    def flush(self):
+        """Writes the collected text to the sink."""
+        with self.lock:
+            self.write_out()
+
+    def redirect(self, sink):
+        """
+        Sends the text written from now on to another sink.
+        :param sink: File the text is written to, or None for the current sys.stdout.
+        """
+        with self.lock:
+            self.write_out()
+            self.sink = sink
@@ -0,0 +1,312 @@
+# coding=utf-8
+"""
+Support for PARALLEL FOR loops, whose iterations run in chunks on
+worker processes. Every chunk gets a copy of the variables the loop
+body refers to, so a body may only write to variables of its own.
+"""
+
+import io
+
+from bin.errors import ActiveRuntimeError
+from bin.function import BaseFunction
+from bin.list import List
+from bin.nodes import BreakNode, CallNode, FuncDefNode, ListNode, ReturnNode, VarAccessNode, VarAssignNode
+from bin.number import Number
+from bin.string import String
+from bin.symbol_table import FrozenSymbolTable
+
+# Builtins which change the list passed as their first argument
+MUTATING_BUILT_INS = ('APPEND', 'POP', 'EXTEND', 'SORT_IN_PLACE')
+
+
+#############################
+# CHECKING THE LOOP BODY    #
+# BEFORE ANY ITERATION RUNS #
+#############################
+
+def child_nodes(node):
+    """
+    Lists the Nodes directly below a Node.
+    :param node: Node of the AST.
+    :return: List of the child Nodes.
+    """
+    children = []
+    pending = list(node.__dict__.values())
+    while pending:
+        value = pending.pop()
+        if isinstance(value, (list, tuple)):
+            pending.extend(value)
+        elif type(value).__module__ == 'bin.nodes':
+            children.append(value)
+    return children
+
+
+def scope_nodes(node):
+    """
+    Lists the Nodes of the scope a Node belongs to.
+    Function bodies are left out, since they run in a scope of their own.
+    :param node: Root Node of the scope.
+    :return: Generator of Nodes.
+    """
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        yield node
+        if not isinstance(node, FuncDefNode):
+            pending.extend(child_nodes(node))
+
+
+def referenced_names(node):
+    """
+    Finds every variable name a Node refers to, including in function bodies.
+    :param node: Root Node.
+    :return: Set of variable names.
+    """
+    names = set()
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, VarAccessNode):
+            names.add(node.var_name.value)
+        pending.extend(child_nodes(node))
+    return names
+
+
+def assigned_name(node):
+    """
+    Finds the variable name a Node assigns to.
+    :param node: Node of the AST.
+    :return: Variable name, or None if the Node doesn't assign to a variable.
+    """
+    if isinstance(node, VarAssignNode):
+        return node.var_name.value
+    if isinstance(node, FuncDefNode) and node.var_name_token:
+        return node.var_name_token.value
+    return None
+
+
+def held_functions(value):
+    """
+    Finds the functions a Value holds, including in its elements.
+    :param value: Value instance, or None.
+    :return: Generator of BaseFunction instances.
+    """
+    pending, seen_lists = [value], set()
+    while pending:
+        value = pending.pop()
+        if isinstance(value, List):
+            if id(value) not in seen_lists:  # Note: Lists may contain themselves
+                seen_lists.add(id(value))
+                pending.extend(value.elements)
+        elif isinstance(value, BaseFunction):
+            yield value
+
+
+def is_mutating_built_in(function):
+    """
+    Checks whether a function is one of the builtins which change a list.
+    :param function: BaseFunction instance.
+    :return: True if the function is such a builtin.
+    """
+    return getattr(function, 'body_node', None) is None and function.name.upper() in MUTATING_BUILT_INS
+
+
+def reachable_nodes(node, context):
+    """
+    Lists every Node a loop body may run: its own, those of the functions
+    it defines, and those of every function it refers to, however
+    indirectly. Names are looked up in the Context of the loop.
+    :param node: Root Node of the loop body.
+    :param context: Context the loop runs in.
+    :return: Generator of Nodes.
+    """
+    pending, seen_bodies = [node], {id(node)}
+    while pending:
+        node = pending.pop()
+        yield node
+        pending.extend(child_nodes(node))
+        if isinstance(node, VarAccessNode):
+            for function in held_functions(context.symbol_table.get(node.var_name.value)):
+                body_node = getattr(function, 'body_node', None)
+                if body_node is not None and id(body_node) not in seen_bodies:
+                    seen_bodies.add(id(body_node))
+                    pending.append(body_node)
+
+
+def find_list_change(node, context):
+    """
+    Finds the first use of a builtin which changes a list, anywhere the
+    loop body may run, unless the list is a literal created on the spot.
+    Lists are shared by reference, so a change to any other list, even
+    through a variable of the body's own, may be a change to an outer
+    list which the copy of a chunk would lose.
+    :param node: ParallelForNode instance.
+    :param context: Context the loop runs in.
+    :return: ActiveRuntimeError describing the change, or None if there is none.
+    """
+    callees = set()
+    for child in reachable_nodes(node.body_node, context):
+        problem = None
+        if isinstance(child, CallNode) and isinstance(child.node_to_call, VarAccessNode):
+            callees.add(id(child.node_to_call))  # Note: Calls are reached before the Nodes below them
+            name = child.node_to_call.var_name.value
+            if name in MUTATING_BUILT_INS and not (child.arg_nodes and isinstance(child.arg_nodes[0], ListNode)):
+                problem = 'changes a list which may be shared with {}'.format(name)
+        elif isinstance(child, VarAccessNode):
+            name = child.var_name.value
+            if name in MUTATING_BUILT_INS:
+                if id(child) not in callees:
+                    problem = 'passes {} around, so the lists it changes can\'t be checked'.format(name)
+            elif any(is_mutating_built_in(function)
+                     for function in held_functions(context.symbol_table.get(name))):
+                problem = 'refers to a builtin which changes lists through "{}"'.format(name)
+        if problem:
+            return ActiveRuntimeError('PARALLEL FOR body ' + problem, child.start_pos, child.end_pos, context)
+    return None
+
+
+def find_shared_write(node, context):
+    """
+    Finds the first statement of a loop body which would change
+    state shared with the rest of the program. Variables which are
+    only defined inside the body are local to every iteration.
+    :param node: ParallelForNode instance.
+    :param context: Context the loop runs in.
+    :return: ActiveRuntimeError describing the statement, or None if the body is safe.
+    """
+    local_names = {node.var_name_token.value}
+    for child in scope_nodes(node.body_node):
+        name = assigned_name(child)
+        if name is not None and context.symbol_table.get(name) is None:
+            local_names.add(name)
+
+    for child in scope_nodes(node.body_node):
+        problem = None
+        name = assigned_name(child)
+        if name is not None and name not in local_names:
+            problem = 'assigns to the outer variable "{}"'.format(name)
+        elif isinstance(child, BreakNode):
+            problem = 'uses BREAK, which depends on the order of the iterations'
+        elif isinstance(child, ReturnNode):
+            problem = 'uses RETURN, which depends on the order of the iterations'
+        if problem:
+            return ActiveRuntimeError('PARALLEL FOR body ' + problem, child.start_pos, child.end_pos, context)
+    return find_list_change(node, context)
+
+
+###########################
+# COPYING THE ENVIRONMENT #
+# TO AND FROM WORKERS     #
+###########################
+
+def detach(value):
+    """
+    Copies a Value without its Context, so it can be sent to another process.
+    :param value: Value instance.
+    :return: Copy of the Value.
+    """
+    if isinstance(value, List):
+        return List([detach(element) for element in value.elements])
+    if isinstance(value, (Number, String, BaseFunction)):
+        return value.copy().set_context(None)
+    raise TypeError('{} values can\'t be copied to another process'.format(type(value).__name__))
+
+
+def attach(value, context):
+    """
+    Sets the Context of a detached Value, and of its elements.
+    :param value: Detached Value instance.
+    :param context: Context the Value belongs to.
+    :return: The Value.
+    """
+    if isinstance(value, List):
+        for element in value.elements:
+            attach(element, context)
+    return value.set_context(context)
+
+
+def capture_environment(node, context):
+    """
+    Copies the variables a loop body refers to.
+    The builtins are left out, since every process has them.
+    :param node: ParallelForNode instance.
+    :param context: Context the loop runs in.
+    :return: Dictionary of variable names mapped to detached Values.
+    """
+    environment = dict()
+    pending = referenced_names(node.body_node)
+    while pending:
+        name = pending.pop()
+        symbol_table = context.symbol_table
+        while symbol_table and not isinstance(symbol_table, FrozenSymbolTable):
+            if name in symbol_table.symbols:
+                break
+            symbol_table = symbol_table.parent
+        if not symbol_table or isinstance(symbol_table, FrozenSymbolTable):
+            continue
+        try:
+            environment[name] = detach(symbol_table.symbols[name])
+        except TypeError:  # Note: Using the variable in the loop reports it as undefined
+            continue
+        body_node = getattr(environment[name], 'body_node', None)
+        if body_node is not None:  # Functions bring along the variables they refer to
+            pending.update(referenced_names(body_node) - set(environment))
+    return environment
+
+
+######################################
+# RUNNING A CHUNK OF THE ITERATIONS  #
+# IN A WORKER PROCESS                #
+######################################
+
+def run_chunk(payload):
+    """
+    Runs some iterations of a loop body in a fresh Engine.
+    :param payload: Tuple of the Engine class, loop variable name, body Node,
+                    iteration values and environment.
+    :return: Tuple of the detached values, the failed iteration value, its error and the output.
+    """
+    # Note: Imported here since the interpreter imports this module
+    from bin.context import Context
+    from bin.interpreter import Interpreter
+
+    engine_class, var_name, body_node, indices, environment = payload
+    engine = engine_class(output=io.StringIO(), buffer_size=0)
+    engine.parallel = False  # Nested parallel loops run one iteration after the other
+    context = Context('<parallel>')
+    context.symbol_table = engine.symbol_table
+    context.engine = engine
+    for name, value in environment.items():
+        engine.symbol_table.set(name, attach(value, context))
+
+    interpreter = Interpreter()
+    values = []
+    for index in indices:
+        engine.symbol_table.set(var_name, Number(index))
+        result = interpreter.visit(body_node, context)
+        if result.error:
+            return None, index, str(result.error), engine.output.getvalue()
+        if result.loop_should_continue:
+            continue
+        try:
+            values.append(detach(result.value))
+        except TypeError as exception:
+            return None, index, str(exception), engine.output.getvalue()
+    return values, None, None, engine.output.getvalue()
+
+
+def split_chunks(indices, count):
+    """
+    Splits the iteration values into contiguous chunks of about the same size.
+    :param indices: List of iteration values.
+    :param count: Number of chunks.
+    :return: List of the chunks.
+    """
+    count = max(1, min(count, len(indices)))
+    size, remainder = divmod(len(indices), count)
+    chunks, start = [], 0
+    for chunk_index in range(count):
+        end = start + size + (chunk_index < remainder)
+        chunks.append(indices[start:end])
+        start = end
+    return chunks
@@ -6,21 +6,37 @@ for the BASIC language (and by extension the
 SimpleScript language too).
 """
 
+import sys
+
 from bin.constants import *
 from bin.errors import InvalidSyntaxError
 from bin.nodes import *
 from bin.parse_result import ParseResult
 
+# Parsing functions which call each other, and are yielded by the StackParser instead
+GRAMMAR_RULES = frozenset(('arithmetic_expr', 'atom', 'binary_operation', 'call', 'comparison_expr', 'expr',
+                           'factor', 'for_expr', 'func_def', 'if_expr', 'if_expr_b', 'if_expr_b_or_c',
+                           'if_expr_c', 'if_expr_cases', 'list_expr', 'power', 'statement', 'statements',
+                           'term', 'while_expr'))
+
 
 class Parser:
-    """Represents the Parser object for Nodes."""
+    """
+    Represents the Parser object for Nodes.
+    The grammar rules call each other recursively, which is the fastest
+    way to parse. Source nested too deeply for Python's recursion limit
+    is parsed again by the StackParser, which runs the same rules on a
+    stack of its own.
+    """
 
-    def __init__(self, tokens):
+    def __init__(self, tokens, explicit_stack=False):
         """
         Initializes the Parser instance.
         :param tokens: Tokens to be parsed by the Parser.
+        :param explicit_stack: True to parse on a stack of its own right away.
         """
         self.tokens = tokens
+        self.explicit_stack = explicit_stack
         self.token_idx = -1
         self.current_token = None
         self.advance()
@@ -60,13 +76,35 @@ class Parser:
         Triggers the parsing of the input stream.
         :return: Parser instance.
         """
-        parser = self.statements()
+        if self.explicit_stack:
+            return stack_parser_class()(self.tokens).parse_program()
+        try:
+            return self.parse_program()
+        except RecursionError:  # Note: Only deeply nested source pays for the explicit stack
+            return stack_parser_class()(self.tokens).parse_program()
+
+    def parse_program(self):
+        """
+        Parses the statements of the whole input stream.
+        :return: Parser instance.
+        """
+        parser = self.run(self.statements())
         if not parser.error and self.current_token.type != TP_EOF:
             return parser.failure(InvalidSyntaxError(self.current_token.start_pos,
                                                      self.current_token.end_pos,
                                                      'Expected "+", "-", "*", or "/"'))
         return parser
 
+    @staticmethod
+    def run(parse_result):
+        """
+        Runs a grammar rule. The recursive rules have already run by
+        the time they return, so their ParseResult is all there is.
+        :param parse_result: ParseResult of the rule.
+        :return: ParseResult of the rule.
+        """
+        return parse_result
+
     def call(self):
         """
         Returns a CallNode for calling functions. Also returns
@@ -168,6 +206,13 @@ class Parser:
             if parse_result.error:
                 return parse_result
             return parse_result.success(for_expr)
+        elif token.matches(TP_KEYWORD, 'PARALLEL'):
+            parse_result.register_advancement()
+            self.advance()
+            for_expr = parse_result.register(self.for_expr(parallel=True))
+            if parse_result.error:
+                return parse_result
+            return parse_result.success(for_expr)
         elif token.matches(TP_KEYWORD, 'WHILE'):
             while_expr = parse_result.register(self.while_expr())
             if parse_result.error:
@@ -644,12 +689,14 @@ class Parser:
             cases.extend(new_cases)
         return parse_result.success((cases, else_case))
 
-    def for_expr(self):
+    def for_expr(self, parallel=False):
         """
         Parses the for-loop expression of the grammar.
-        :return: ForNode with the for-loop expression.
+        :param parallel: True if the loop follows the PARALLEL keyword.
+        :return: ForNode, or ParallelForNode, with the for-loop expression.
         """
         parse_result = ParseResult()
+        for_node_class = ParallelForNode if parallel else ForNode
         if not self.current_token.matches(TP_KEYWORD, 'FOR'):
             return parse_result.failure(InvalidSyntaxError(
                 "Expected 'FOR'",
@@ -711,12 +758,12 @@ class Parser:
             parse_result.register_advancement()
             self.advance()
             return parse_result.success(
-                ForNode(var_name, start_value, end_value, step_value, body, True))
+                for_node_class(var_name, start_value, end_value, step_value, body, True))
         body = parse_result.register(self.statement())
         if parse_result.error:
             return parse_result
         return parse_result.success(
-            ForNode(var_name, start_value, end_value, step_value, body, False))
+            for_node_class(var_name, start_value, end_value, step_value, body, False))
 
     def while_expr(self):
         """
@@ -759,3 +806,81 @@ class Parser:
         if parse_result.error:
             return parse_result
         return parse_result.success(WhileNode(condition, body, False))
+
+
+###########################################
+# GRAMMAR RULES ON AN EXPLICIT STACK      #
+# BUILT FROM THE RULES OF THE PARSER SO   #
+# THE GRAMMAR IS ONLY WRITTEN DOWN ONCE   #
+###########################################
+
+StackParser = None  # Built by stack_parser_class() the first time it is needed
+
+
+def run_on_stack(rule):
+    """
+    Runs a grammar rule on a stack of its own, instead of Python's.
+    Every rule is a generator which yields the generators of the
+    rules it depends on, and is sent their ParseResults back, so
+    deeply nested source can't run into Python's recursion limit.
+    :param rule: Generator of the grammar rule.
+    :return: ParseResult of the rule.
+    """
+    stack, result = [], None
+    push, pop = stack.append, stack.pop
+    while True:
+        try:
+            child = rule.send(result)
+        except StopIteration as stop:
+            if not stack:
+                return stop.value
+            rule, result = pop(), stop.value
+            continue
+        push(rule)
+        rule, result = child, None
+
+
+def stack_parser_class():
+    """
+    Builds the StackParser class, a Parser whose grammar rules are
+    generators. The source of every grammar rule of the Parser is
+    compiled again with each call of another rule turned into a
+    yield of it, which run_on_stack() evaluates instead of Python.
+    Note: Only built when needed, since compiling the rules takes a
+          few milliseconds which most programs never have to spend.
+    :return: StackParser class.
+    """
+    global StackParser
+    if StackParser is not None:
+        return StackParser
+    import ast
+    import inspect
+
+    def is_rule_call(node):
+        function = node.func
+        if isinstance(function, ast.Attribute):  # self.expr() and the like
+            return isinstance(function.value, ast.Name) and function.value.id == 'self' \
+                and function.attr in GRAMMAR_RULES
+        return isinstance(function, ast.Name) and function.id in ('func_a', 'func_b')  # binary_operation()
+
+    class YieldRuleCalls(ast.NodeTransformer):
+        def visit_Call(self, node):
+            self.generic_visit(node)
+            if is_rule_call(node):
+                return ast.copy_location(ast.Yield(value=node), node)
+            return node
+
+    module = sys.modules[__name__]
+    parser_class, = (node for node in ast.parse(inspect.getsource(module)).body
+                     if isinstance(node, ast.ClassDef) and node.name == Parser.__name__)
+    rules = [YieldRuleCalls().visit(node) for node in parser_class.body
+             if isinstance(node, ast.FunctionDef) and node.name in GRAMMAR_RULES]
+    class_node = ast.ClassDef(name='StackParser', bases=[ast.Name(id='Parser', ctx=ast.Load())],
+                              keywords=[], body=rules, decorator_list=[])
+    tree = ast.fix_missing_locations(ast.Module(body=[ast.copy_location(class_node, parser_class)],
+                                                type_ignores=[]))
+    namespace = dict(vars(module))
+    exec(compile(tree, module.__file__, 'exec'), namespace)  # Note: Line numbers still point into this file
+    StackParser = namespace['StackParser']
+    StackParser.run = staticmethod(run_on_stack)
+    return StackParser
@@ -0,0 +1,141 @@
+# coding=utf-8
+"""Deterministic profiler for SimpleScript functions."""
+
+import marshal
+from time import perf_counter
+
+from bin.hooks import ExecutionHook
+
+
+class FunctionStats:
+    """Accumulated timings of one function at one call site."""
+
+    def __init__(self):
+        self.primitive_calls = 0
+        self.calls = 0
+        self.exclusive_time = 0.0
+        self.inclusive_time = 0.0
+
+        # Caller keys mapped to [calls, primitive calls, exclusive time, inclusive time]
+        self.callers = dict()
+
+
+class Profiler(ExecutionHook):
+    """
+    Records every call of a SimpleScript function. Functions are
+    identified by their name and the position of their call site, so
+    the same function called from two places is reported twice.
+    """
+
+    def __init__(self, timer=perf_counter):
+        """
+        Initializes an empty Profiler instance.
+        :param timer: Function returning the current time in seconds.
+        """
+        self.timer = timer
+        self.stats = dict()
+        self.stack = []
+        self.active = dict()
+
+    @staticmethod
+    def function_key(function):
+        """
+        Builds the key of a function from its call site.
+        :param function: BaseFunction instance being called.
+        :return: Tuple of the file name, line number and function name.
+        """
+        position = function.start_pos
+        if position is None:
+            return '<unknown>', 0, function.name
+        return position.fn, position.ln + 1, function.name
+
+    def on_call(self, function, args, context):
+        """
+        Records the start of a function call.
+        :param function: BaseFunction instance being called.
+        :param args: List of argument values.
+        :param context: Context the function is executed in.
+        """
+        key = self.function_key(function)
+        self.active[key] = self.active.get(key, 0) + 1
+
+        # Frames are [key, start time, time spent in callees]
+        self.stack.append([key, self.timer(), 0.0])
+
+    def on_return(self, function, result, context):
+        """
+        Records the end of the innermost function call.
+        :param function: BaseFunction instance which was called.
+        :param result: RuntimeResult of the call.
+        :param context: Context the function was executed in.
+        """
+        key, start_time, callee_time = self.stack.pop()
+        inclusive_time = self.timer() - start_time
+        exclusive_time = inclusive_time - callee_time
+        self.active[key] -= 1
+        is_primitive = self.active[key] == 0
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = FunctionStats()
+        stats.calls += 1
+        stats.exclusive_time += exclusive_time
+        if is_primitive:  # Recursive calls are already timed by the outermost call
+            stats.primitive_calls += 1
+            stats.inclusive_time += inclusive_time
+        if self.stack:
+            caller = self.stack[-1]
+            caller[2] += inclusive_time
+            edge = stats.callers.get(caller[0])
+            if edge is None:
+                edge = stats.callers[caller[0]] = [0, 0, 0.0, 0.0]
+            edge[0] += 1
+            edge[1] += is_primitive
+            edge[2] += exclusive_time
+            edge[3] += inclusive_time if is_primitive else 0.0
+
+    def callees(self, key):
+        """
+        Finds every function called by the given function.
+        :param key: Key of the calling function.
+        :return: List of callee keys with their call counts.
+        """
+        return [(callee_key, stats.callers[key][0])
+                for callee_key, stats in self.stats.items() if key in stats.callers]
+
+    def report(self, sort_by='exclusive', limit=None):
+        """
+        Renders the recorded timings as a text table.
+        :param sort_by: One of 'exclusive', 'inclusive' or 'calls'.
+        :param limit: Maximum number of rows, or None for all.
+        :return: String with one row per function and call site.
+        """
+        sort_keys = {'exclusive': lambda item: item[1].exclusive_time,
+                     'inclusive': lambda item: item[1].inclusive_time,
+                     'calls': lambda item: item[1].calls}
+        rows = sorted(self.stats.items(), key=sort_keys[sort_by], reverse=True)[:limit]
+        lines = ['{:>9} {:>11} {:>11} {:>11} {:>11}  {}'.format(
+            'ncalls', 'exclusive', 'percall', 'inclusive', 'percall', 'function (call site)')]
+        for (fn, ln, name), stats in rows:
+            calls = str(stats.calls)
+            if stats.primitive_calls != stats.calls:
+                calls = '{}/{}'.format(stats.calls, stats.primitive_calls)
+            lines.append('{:>9} {:>11.6f} {:>11.6f} {:>11.6f} {:>11.6f}  {} ({}:{})'.format(
+                calls,
+                stats.exclusive_time, stats.exclusive_time / stats.calls,
+                stats.inclusive_time, stats.inclusive_time / max(stats.primitive_calls, 1),
+                name, fn, ln))
+            for caller_key, edge in sorted(stats.callers.items(), key=lambda item: -item[1][3]):
+                lines.append('{:>9} {:>11} {:>11} {:>11.6f} {:>11}    <- {} ({}:{})'.format(
+                    edge[0], '', '', edge[3], '', caller_key[2], caller_key[0], caller_key[1]))
+        return '\n'.join(lines)
+
+    def dump_stats(self, file_name):
+        """
+        Writes the timings in the format read by Python's pstats module.
+        :param file_name: Path of the file to write.
+        """
+        stats = {key: (value.primitive_calls, value.calls, value.exclusive_time, value.inclusive_time,
+                       {caller: tuple(edge) for caller, edge in value.callers.items()})
+                 for key, value in self.stats.items()}
+        with open(file_name, 'wb') as f:
+            marshal.dump(stats, f)
@@ -0,0 +1,109 @@
+# coding=utf-8
+"""Low-overhead sampling profiler built on the Context chain."""
+
+import sys
+import threading
+
+
+class SamplingProfiler:
+    """
+    Periodically snapshots the SimpleScript stack of a running thread.
+    A background thread inspects the Python frames of the profiled
+    thread, so the interpreter itself does no extra work per node.
+    """
+
+    def __init__(self, interval=0.01, thread_id=None):
+        """
+        Initializes a SamplingProfiler instance.
+        :param interval: Seconds between two samples.
+        :param thread_id: Identifier of the thread to profile, defaults to the caller.
+        """
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.samples = dict()
+        self.sample_count = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Starts sampling on a daemon thread."""
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.sample_loop, name='simplescript-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops sampling and waits for the sampling thread to finish."""
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def sample_loop(self):
+        """Takes one sample every interval until stopped."""
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = self.sample(frame)
+            del frame  # Note: Holding on to the frame would keep its locals alive
+            if stack:
+                self.samples[stack] = self.samples.get(stack, 0) + 1
+                self.sample_count += 1
+
+    @staticmethod
+    def sample(frame):
+        """
+        Rebuilds the SimpleScript stack of a Python frame.
+        The innermost Interpreter visit_ method, or the innermost
+        StackInterpreter, gives the node being evaluated and its Context.
+        The rest of the stack follows the parent Contexts and the
+        positions they were entered from.
+        :param frame: Innermost Python frame of the profiled thread.
+        :return: Tuple of 'name (file:line)' frames, outermost first.
+        """
+        from bin.interpreter import StackInterpreter  # Note: Imported here to keep the profiler light to import
+        node = context = None
+        while frame is not None:
+            if frame.f_code.co_name.startswith('visit_'):
+                node, context = frame.f_locals.get('node'), frame.f_locals.get('context')
+                break
+            if frame.f_code is StackInterpreter.visit.__code__:
+                # Note: Nodes evaluated on the explicit stack have no Python frames of their own
+                node, context = StackInterpreter.evaluating(frame.f_locals)
+                break
+            frame = frame.f_back
+        if context is None or node is None:
+            return None  # Not evaluating SimpleScript code
+        stack = []
+        position = node.start_pos
+        while context:
+            if position is None:
+                stack.append(context.display_name)
+            else:
+                stack.append('{} ({}:{})'.format(context.display_name, position.fn, position.ln + 1))
+            position = context.parent_entry_pos
+            context = context.parent_context
+        return tuple(reversed(stack))
+
+    def collapsed(self):
+        """
+        Renders the samples in the collapsed-stack format of flame graph tools.
+        :return: String with one 'frame;frame;frame count' line per stack.
+        """
+        return '\n'.join('{} {}'.format(';'.join(stack), count)
+                         for stack, count in sorted(self.samples.items()))
+
+    def write_collapsed(self, file_name):
+        """
+        Writes the collapsed stacks to a file.
+        :param file_name: Path of the file to write.
+        """
+        with open(file_name, 'w') as f:
+            f.write(self.collapsed() + '\n')
@@ -0,0 +1,117 @@
+# coding=utf-8
+"""
+Type-specialized versions of binary operations. Once an operation has
+run a few times, the interpreter installs the version made for the
+types of its operands on its BinOpNode, skipping the generic dispatch
+on the operator and the methods of the Values ("quickening").
+Every version checks that it still gets the types it was made for,
+and returns None when it doesn't, or when the generic operation would
+fail, so the operation falls back to the generic path.
+"""
+
+import operator
+
+from bin.constants import *
+from bin.number import Number
+from bin.string import String
+
+# Generic runs of an operation before it is specialized again, after its operand types changed
+SPECIALIZE_BACKOFF = 64
+
+
+def number_operation(operate, value_type):
+    """
+    Specializes an arithmetic operation on two Numbers.
+    :param operate: Function applying the operation to two Python numbers.
+    :param value_type: Python type of the values of both Numbers, int or float.
+    :return: Specialized operation.
+    """
+    def operation(left, right):
+        if type(left) is Number and type(right) is Number:
+            a, b = left.value, right.value
+            if type(a) is value_type and type(b) is value_type:
+                result = Number(operate(a, b))
+                result.context = left.context
+                return result
+        return None
+    return operation
+
+
+def number_division(operate, value_type):
+    """
+    Specializes a division of two Numbers, leaving division by 0 to the generic path.
+    :param operate: Function applying the division to two Python numbers.
+    :param value_type: Python type of the values of both Numbers, int or float.
+    :return: Specialized operation.
+    """
+    def operation(left, right):
+        if type(left) is Number and type(right) is Number:
+            a, b = left.value, right.value
+            if type(a) is value_type and type(b) is value_type and b != 0:
+                result = Number(operate(a, b))
+                result.context = left.context
+                return result
+        return None
+    return operation
+
+
+def number_comparison(operate, value_type):
+    """
+    Specializes a comparison of two Numbers.
+    :param operate: Function comparing two Python numbers.
+    :param value_type: Python type of the values of both Numbers, int or float.
+    :return: Specialized operation.
+    """
+    def operation(left, right):
+        if type(left) is Number and type(right) is Number:
+            a, b = left.value, right.value
+            if type(a) is value_type and type(b) is value_type:
+                result = Number(1 if operate(a, b) else 0)
+                result.context = left.context
+                return result
+        return None
+    return operation
+
+
+def concatenate_strings(left, right):
+    """
+    Specialized concatenation of two Strings.
+    :param left: Left operand.
+    :param right: Right operand.
+    :return: Concatenated String, or None if the operands aren't both Strings.
+    """
+    if type(left) is String and type(right) is String:
+        result = String(left.value + right.value)
+        result.context = left.context
+        return result
+    return None
+
+
+# Note: Powers are left out since they check the Limits of the run
+#       first, and Strings support nothing but concatenation.
+SPECIALIZED_OPERATIONS = {(TP_PLUS, str): concatenate_strings}
+for value_type in (int, float):
+    for op_type, operate in ((TP_PLUS, operator.add), (TP_MINUS, operator.sub), (TP_MUL, operator.mul)):
+        SPECIALIZED_OPERATIONS[op_type, value_type] = number_operation(operate, value_type)
+    for op_type, operate in ((TP_DIV, operator.truediv), (TP_CLEAN_DIV, operator.floordiv),
+                             (TP_MODULO, operator.mod)):
+        SPECIALIZED_OPERATIONS[op_type, value_type] = number_division(operate, value_type)
+    for op_type, operate in ((TP_EE, operator.eq), (TP_NE, operator.ne), (TP_LT, operator.lt),
+                             (TP_LTE, operator.le), (TP_GT, operator.gt), (TP_GTE, operator.ge)):
+        SPECIALIZED_OPERATIONS[op_type, value_type] = number_comparison(operate, value_type)
+
+
+def specialize(node, left, right):
+    """
+    Installs the specialized version of an operation for the types of
+    its operands, or backs off for a while when there is none.
+    :param node: BinOpNode of the operation.
+    :param left: Value of the left operand.
+    :param right: Value of the right operand.
+    """
+    operation = None
+    if type(left) is type(right) and type(left) in (Number, String) \
+            and type(left.value) is type(right.value):
+        operation = SPECIALIZED_OPERATIONS.get((node.op_token.type, type(left.value)))
+    node.specialized = operation
+    node.countdown = 0 if operation is not None else SPECIALIZE_BACKOFF
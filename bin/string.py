@@ -1,6 +1,7 @@
 # coding=utf-8
 """Represents a String instance."""
 
+from bin.errors import ActiveRuntimeError
 from bin.number import Number
 from bin.value import Value
 
@@ -39,6 +40,11 @@ class String(Value):
         :return: New String written out Number-times.
         """
         if isinstance(other, Number):
+            limits = self.context.limits if self.context else None
+            if limits is not None and isinstance(other.value, int):
+                error = limits.check_allocation(len(self.value) * other.value)
+                if error:
+                    return None, ActiveRuntimeError(error, self.start_pos, other.end_pos, self.context)
             return String(self.value * other.value).set_context(self.context), None
         return None, Value.illegal_operation(self, other)
 
@@ -55,6 +61,5 @@ class String(Value):
         :return: A copy of the String instance.
         """
         copy = String(self.value)
-        copy.set_position(self.start_pos, self.end_pos)
         copy.set_context(self.context)
         return copy
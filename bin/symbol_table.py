@@ -1,25 +1,54 @@
 # coding=utf-8
 """Represents a SymbolTable meant for tracking variables."""
 
+from itertools import count
+
 from bin.number import Number
 
+# Note: next() of a count is atomic, so threads changing SymbolTables
+#       at once never publish the same version, as += could.
+VERSIONS = count(1)
+
 
 class SymbolTable:
     """Keep track of all new variable names and their values."""
 
+    # Note: Bumped whenever a variable is added to or removed from a
+    #       SymbolTable with children, since that may change where the
+    #       lookups of the children find their variables. Rebinding a
+    #       variable leaves it untouched. Lookups remember where they
+    #       found a variable for as long as the version stays the same.
+    #       It is bumped after the change, so a lookup racing with it
+    #       can't remember the old layout under the new version.
+    version = 0
+
     def __init__(self, parent=None):
         """
         Initialize an empty dictionary for the symbol table
         as well as a copy of the parent's symbol table.
         :param parent: Parent SymbolTable instance.
         """
-        self.symbols = dict()
         self.parent = parent
+        self.has_children = False
+        self.found = dict()  # Variable names mapped to the version and the SymbolTable they were found in
+        if parent is not None:
+            parent.has_children = True
+        self.clear()
 
+    def clear(self):
+        """
+        Discards every variable of the SymbolTable.
+        The variables of the parent are left untouched.
+        """
+        symbols = dict()
         # Special values in the language
-        self.symbols['NULL'] = Number(0)
-        self.symbols['TRUE'] = Number(1)
-        self.symbols['FALSE'] = Number(0)
+        symbols['NULL'] = Number(0)
+        symbols['TRUE'] = Number(1)
+        symbols['FALSE'] = Number(0)
+        self.symbols = symbols
+        self.lazy_symbols = dict()  # Variable names mapped to the loader of their value
+        if self.has_children:
+            SymbolTable.version = next(VERSIONS)
 
     def get(self, variable_name, default=None):
         """
@@ -28,9 +57,64 @@ class SymbolTable:
         :param default: Default value to return.
         :return: The value of the requested variable in memory.
         """
-        variable_value = self.symbols.get(variable_name, default)
-        if variable_value is None and self.parent:
-            variable_value = self.parent.get(variable_name, default)
+        variable_value = self.symbols.get(variable_name)
+        if variable_value is not None:
+            return variable_value
+        symbol_table = self.find(variable_name)
+        if symbol_table is None:
+            return default
+        return symbol_table.get_own(variable_name, default)
+
+    def get_own(self, variable_name, default=None):
+        """
+        Get the variable value from this SymbolTable alone, ignoring its parents.
+        :param variable_name: Name of variable whose value we wish to fetch.
+        :param default: Default value to return.
+        :return: The value of the requested variable in memory.
+        """
+        variable_value = self.symbols.get(variable_name)
+        if variable_value is None:
+            if variable_name in self.lazy_symbols:
+                return self.load(variable_name)
+            return self.symbols.get(variable_name, default)  # Note: Another thread may have loaded it
+        return variable_value
+
+    def find(self, variable_name):
+        """
+        Finds the SymbolTable holding a variable, starting with this one.
+        Where a variable is found is remembered until the version changes,
+        so lookups from deep call stacks stop at the first parent which
+        looked the variable up before, rather than walking every parent.
+        :param variable_name: Name of the variable to find.
+        :return: SymbolTable instance holding the variable, or None if it is not defined.
+        """
+        if variable_name in self.symbols or variable_name in self.lazy_symbols:
+            return self
+        version = SymbolTable.version
+        symbol_table = self
+        while True:
+            found = symbol_table.found.get(variable_name)
+            if found is not None and found[0] == version:
+                symbol_table = found[1]
+                break
+            symbol_table = symbol_table.parent
+            if symbol_table is None \
+                    or variable_name in symbol_table.symbols or variable_name in symbol_table.lazy_symbols:
+                break
+        self.found[variable_name] = (version, symbol_table)
+        return symbol_table
+
+    def load(self, variable_name):
+        """
+        Creates the value of a lazy variable and stores it in the SymbolTable.
+        :param variable_name: Name of the lazy variable.
+        :return: The value of the variable.
+        """
+        # Note: Frozen tables are shared between threads, which may both load
+        #       the same variable. Either value is fine, but never pop twice.
+        variable_value = self.lazy_symbols[variable_name](variable_name)
+        self.symbols[variable_name] = variable_value
+        self.lazy_symbols.pop(variable_name, None)
         return variable_value
 
     def set(self, variable_name, variable_value):
@@ -39,11 +123,63 @@ class SymbolTable:
         :param variable_name: Name of the new variable in memory.
         :param variable_value: Value of the new variable.
         """
+        added = self.has_children and variable_name not in self.symbols and variable_name not in self.lazy_symbols
         self.symbols[variable_name] = variable_value
+        if self.lazy_symbols:  # A variable set before its first lookup is never loaded
+            self.lazy_symbols.pop(variable_name, None)
+        if added:
+            SymbolTable.version = next(VERSIONS)
+
+    def set_lazy(self, variable_name, loader):
+        """
+        Declares a variable whose value is only created on its first lookup.
+        :param variable_name: Name of the new variable in memory.
+        :param loader: Function called with the variable name which returns its value.
+        """
+        self.symbols.pop(variable_name, None)
+        self.lazy_symbols[variable_name] = loader
+        if self.has_children:
+            SymbolTable.version = next(VERSIONS)
 
     def remove(self, variable_name):
         """
         Removes a variable from the SymbolTable.
         :param variable_name: Name of the variable to remove.
         """
-        del self.symbols[variable_name]
+        if variable_name in self.lazy_symbols:
+            del self.lazy_symbols[variable_name]
+        else:
+            del self.symbols[variable_name]
+        if self.has_children:
+            SymbolTable.version = next(VERSIONS)
+
+
+class FrozenSymbolTable(SymbolTable):
+    """
+    SymbolTable whose variables can no longer be changed.
+    Meant as the parent of the SymbolTables which programs write to,
+    so it can be shared between them and never needs to be restored.
+    """
+
+    def __init__(self, symbol_table):
+        """
+        Freezes a copy of the variables of a SymbolTable.
+        :param symbol_table: SymbolTable instance to copy.
+        """
+        self.parent = symbol_table.parent
+        self.has_children = symbol_table.has_children
+        self.found = dict()
+        self.symbols = dict(symbol_table.symbols)
+        self.lazy_symbols = dict(symbol_table.lazy_symbols)
+
+    def set(self, variable_name, variable_value):
+        raise TypeError('Cannot set "{}" in a frozen SymbolTable'.format(variable_name))
+
+    def set_lazy(self, variable_name, loader):
+        raise TypeError('Cannot set "{}" in a frozen SymbolTable'.format(variable_name))
+
+    def remove(self, variable_name):
+        raise TypeError('Cannot remove "{}" from a frozen SymbolTable'.format(variable_name))
+
+    def clear(self):
+        raise TypeError('Cannot clear a frozen SymbolTable')
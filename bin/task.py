@@ -0,0 +1,38 @@
+# coding=utf-8
+"""Represents a Task instance, the handle of a SPAWN call."""
+
+from bin.value import Value
+
+
+class Task(Value):
+    """Represents a function call running in the background."""
+
+    def __init__(self, name, future):
+        """
+        Initializes a Task instance.
+        :param name: Name of the function being called.
+        :param future: Future of the RuntimeResult of the call.
+        """
+        super().__init__()
+        self.name = name
+        self.future = future
+
+    def __repr__(self):
+        return '<task {}>'.format(self.name)
+
+    def is_true(self):
+        """
+        Returns TRUE once the function call has finished.
+        :return: TRUE if the call is done.
+        """
+        return self.future.done()
+
+    def copy(self):
+        """
+        Makes a copy of the Task instance, which refers to the same call.
+        :return: A copy of the Task instance.
+        """
+        copy = Task(self.name, self.future)
+        copy.set_position(self.start_pos, self.end_pos)
+        copy.set_context(self.context)
+        return copy
@@ -0,0 +1,126 @@
+# coding=utf-8
+"""Reference execution hook writing a compact binary trace file."""
+
+import struct
+from time import perf_counter_ns
+
+from bin.hooks import ExecutionHook
+
+#######################
+# TRACE FILE FORMAT   #
+# ALL INTS ARE LITTLE #
+# ENDIAN AND UNSIGNED #
+#######################
+
+TRACE_MAGIC = b'SSTRACE1'
+
+EVENT_STRING = 0
+EVENT_CALL = 1
+EVENT_RETURN = 2
+EVENT_LOOP_ITERATION = 3
+EVENT_ERROR = 4
+EVENT_NODE = 5
+
+# Event, name string ID, file string ID, line, nanoseconds since the trace started
+RECORD = struct.Struct('<BIIIQ')
+
+# Event, string ID, length of the UTF-8 bytes which follow
+STRING_RECORD = struct.Struct('<BIH')
+
+
+class BinaryTraceHook(ExecutionHook):
+    """
+    Writes every call, return, loop iteration and error to a file.
+    Names and file names are written once and then referred to by
+    ID, so every event takes a fixed 21 bytes.
+    """
+
+    def __init__(self, file_name, trace_nodes=False):
+        """
+        Opens a new trace file.
+        :param file_name: Path of the trace file to write.
+        :param trace_nodes: True to also record every evaluated Node.
+        """
+        self.file = open(file_name, 'wb')
+        self.file.write(TRACE_MAGIC)
+        self.string_ids = dict()
+        self.start_time = perf_counter_ns()
+        if trace_nodes:  # Note: Only bound when asked for since there are many nodes
+            self.on_node = self.trace_node
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Flushes and closes the trace file."""
+        self.file.close()
+
+    def string_id(self, string):
+        """
+        Finds the ID of a string, writing it to the file the first time.
+        :param string: Name or file name to refer to.
+        :return: Integer ID of the string.
+        """
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = self.string_ids[string] = len(self.string_ids)
+            data = string.encode('utf-8')
+            if len(data) > 0xFFFF:
+                # Note: Cutting the bytes could split a character, which is dropped whole instead
+                data = data[:0xFFFF].decode('utf-8', 'ignore').encode('utf-8')
+            self.file.write(STRING_RECORD.pack(EVENT_STRING, string_id, len(data)) + data)
+        return string_id
+
+    def write(self, event, name, position):
+        """
+        Writes a single event record.
+        :param event: One of the EVENT_ constants.
+        :param name: Name of the function or node.
+        :param position: Position the event refers to, or None.
+        """
+        if position is None:
+            file_id, line = self.string_id('<unknown>'), 0
+        else:
+            file_id, line = self.string_id(position.fn), position.ln + 1
+        self.file.write(RECORD.pack(event, self.string_id(name), file_id, line,
+                                    perf_counter_ns() - self.start_time))
+
+    def on_call(self, function, args, context):
+        self.write(EVENT_CALL, function.name, function.start_pos)
+
+    def on_return(self, function, result, context):
+        self.write(EVENT_RETURN, function.name, function.start_pos)
+
+    def on_loop_iteration(self, node, context):
+        self.write(EVENT_LOOP_ITERATION, type(node).__name__, node.start_pos)
+
+    def on_error(self, error, context):
+        self.write(EVENT_ERROR, error.error_name, error.start_pos)
+
+    def trace_node(self, node, context):
+        self.write(EVENT_NODE, type(node).__name__, node.start_pos)
+
+
+def read_trace(file_name):
+    """
+    Decodes a trace file written by BinaryTraceHook.
+    :param file_name: Path of the trace file to read.
+    :return: Generator of (event, name, file name, line, nanoseconds) tuples.
+    """
+    strings = dict()
+    with open(file_name, 'rb') as f:
+        if f.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError('"{}" is not a SimpleScript trace file'.format(file_name))
+        while True:
+            event = f.read(1)
+            if not event:
+                break
+            if event[0] == EVENT_STRING:
+                _, string_id, length = STRING_RECORD.unpack(event + f.read(STRING_RECORD.size - 1))
+                strings[string_id] = f.read(length).decode('utf-8')
+                continue
+            _, name_id, file_id, line, time = RECORD.unpack(event + f.read(RECORD.size - 1))
+            yield event[0], strings[name_id], strings[file_id], line, time
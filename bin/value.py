@@ -8,12 +8,14 @@ from bin.runtime_result import RuntimeResult
 class Value:
     """Superclass of all possible values."""
 
+    # Note: Values only carry positions when they are set explicitly, as for
+    #       functions, whose position is the call site shown in tracebacks.
+    #       Errors are given the positions of their failing Node instead.
+    start_pos = None
+    end_pos = None
+
     def __init__(self):
-        self.start_pos = None
-        self.end_pos = None
         self.context = None
-        self.set_position()
-        self.set_context()
 
     def set_position(self, start_pos=None, end_pos=None):
         """
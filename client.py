@@ -0,0 +1,55 @@
+# coding=utf-8
+"""Client library for the SimpleScript execution daemon in 'server.py'."""
+
+import socket
+
+from server import read_frame, write_frame
+
+
+class Client:
+    """Connection to an execution server, reused for any number of requests."""
+
+    def __init__(self, address):
+        """
+        Connects to an execution server.
+        :param address: Path of a UNIX domain socket, or (host, port) tuple.
+        """
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.connect(address)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the connection."""
+        self.sock.close()
+
+    def run(self, source=None, script_id=None, argv=(), input_text='', timeout=None):
+        """
+        Runs a program on the server.
+        Send the source of a program once, then its script ID.
+        :param source: Source of the program.
+        :param script_id: Script ID returned by an earlier run of the source.
+        :param argv: Strings exposed to the program in ARGV.
+        :param input_text: Text read by INPUT.
+        :param timeout: Seconds the program may take, at most the server's timeout.
+        :return: Response dictionary with 'ok', 'script_id', 'result', 'output', 'error' and 'time'.
+        """
+        request = {'argv': list(argv), 'input': input_text}
+        if source is not None:
+            request['source'] = source
+        else:
+            request['script_id'] = script_id
+        if timeout is not None:
+            request['timeout'] = timeout
+        write_frame(self.sock, request)
+        response = read_frame(self.sock)
+        if response is None:
+            raise ConnectionError('Execution server closed the connection')
+        return response
@@ -0,0 +1,432 @@
+# coding=utf-8
+"""
+Execution daemon for SimpleScript programs.
+Clients send programs over a UNIX domain socket or a localhost TCP
+port, and the server runs them on a pool of warm worker processes.
+Programs run within the limits of the server, the timeout of the
+request included, and fail with a runtime error once they exceed
+one. A worker which still runs past the timeout is killed and
+replaced, so a runaway program never blocks the server.
+
+Every message, in both directions, is a frame: the length of
+the payload as a 4 byte big endian integer, then the payload,
+a UTF-8 encoded JSON object. A request holds either the 'source'
+of a program or the 'script_id' the server returned for an
+earlier source, and optionally the 'argv' list, the 'input' text
+read by INPUT and a 'timeout' in seconds. The response holds
+'ok', 'script_id', 'result', 'output', 'error' and 'time'.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import socketserver
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from time import perf_counter
+
+FRAME_HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+KILL_GRACE = 0.5  # Seconds a worker gets to report a timed out program before it is killed
+
+
+###################
+# FRAMED PROTOCOL #
+###################
+
+def read_exactly(sock, size):
+    """
+    Reads a number of bytes from a socket.
+    :param sock: Connected socket.
+    :param size: Number of bytes to read.
+    :return: The bytes, or None if the connection was closed first.
+    """
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def read_frame(sock):
+    """
+    Reads a framed JSON message.
+    :param sock: Connected socket.
+    :return: Decoded message, or None if the connection was closed.
+    """
+    header = read_exactly(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    size, = FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ValueError('Frame of {} bytes is too large'.format(size))
+    payload = read_exactly(sock, size)
+    if payload is None:
+        return None
+    return json.loads(payload.decode('utf-8'))
+
+
+def write_frame(sock, message):
+    """
+    Writes a framed JSON message.
+    :param sock: Connected socket.
+    :param message: JSON serializable message.
+    """
+    payload = json.dumps(message).encode('utf-8')
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+##########################
+# RUNNING IN THE WORKERS #
+##########################
+
+def serve_worker(connection, cache_size, limits):
+    """
+    Runs programs sent by the server until the connection is closed.
+    Every worker keeps one Engine, reset before every program, and
+    caches the ASTs of the programs it compiled by their script ID.
+    :param connection: Worker end of the Pipe to the server.
+    :param cache_size: Number of compiled programs to keep.
+    :param limits: Dictionary of the Limits arguments every program runs within.
+    """
+    from bin.limits import Limits
+    from simplescript import Engine
+    engine = Engine()
+    compiled = OrderedDict()
+    while True:
+        try:
+            script_id, source, argv, input_text, timeout = connection.recv()
+        except EOFError:
+            return
+        engine.output = io.StringIO()
+        engine.input = io.StringIO(input_text)
+        engine.argv = argv
+        engine.reset()
+        start_time = perf_counter()
+        try:
+            node = compiled.get(script_id)
+            error = None
+            if node is None:
+                node, error = engine.compile('<{}>'.format(script_id[:12]), source)
+                if not error:
+                    compiled[script_id] = node
+                    if len(compiled) > cache_size:
+                        compiled.popitem(last=False)
+            else:
+                compiled.move_to_end(script_id)
+            result = None
+            if not error:
+                result, error = engine.execute(node, limits=Limits(max_time=timeout, **limits))
+            response = {'ok': error is None,
+                        'result': None if error else repr(result),
+                        'error': str(error) if error else None}
+        except Exception as exception:  # Note: Interpreter bugs are reported to the client
+            response = {'ok': False, 'result': None,
+                        'error': '{}: {}'.format(type(exception).__name__, exception)}
+        response['output'] = engine.output.getvalue()
+        response['time'] = perf_counter() - start_time
+        connection.send(response)
+
+
+class Worker:
+    """Warm worker process with a Pipe to send it programs."""
+
+    def __init__(self, cache_size, limits):
+        """
+        Starts a worker process.
+        :param cache_size: Number of compiled programs the worker keeps.
+        :param limits: Dictionary of the Limits arguments every program runs within.
+        """
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=serve_worker,
+                                               args=(worker_connection, cache_size, limits),
+                                               daemon=True)
+        self.process.start()
+        worker_connection.close()
+
+    def run(self, script_id, source, argv, input_text, timeout):
+        """
+        Runs a program on the worker.
+        :param script_id: ID of the program the worker caches its AST under.
+        :param source: Source of the program.
+        :param argv: Strings exposed to the program in ARGV.
+        :param input_text: Text read by INPUT.
+        :param timeout: Seconds the program may take.
+        :return: Response dictionary, or None if the program timed out.
+        """
+        self.connection.send((script_id, source, argv, input_text, timeout))
+        if not self.connection.poll(timeout + KILL_GRACE):
+            return None
+        return self.connection.recv()
+
+    def kill(self):
+        """Stops the worker process, whatever it is running."""
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+#############################
+# ACCEPTING CLIENT REQUESTS #
+#############################
+
+class ExecutionServer:
+    """
+    Runs the programs of client requests on warm worker processes.
+    At most one request runs per worker, and requests wait for a free
+    worker up to their timeout. Requests beyond the pending limit are
+    turned away at once rather than queued.
+    """
+
+    def __init__(self, workers=None, timeout=10.0, cache_size=256, max_pending=64, limits=None):
+        """
+        Initializes an ExecutionServer and starts its workers.
+        :param workers: Number of worker processes, defaults to the number of cores.
+        :param timeout: Longest time in seconds a request may take.
+        :param cache_size: Number of programs kept by their script ID.
+        :param max_pending: Number of requests running or waiting for a worker at once.
+        :param limits: Dictionary of the max_steps, max_memory and max_depth every program runs within.
+        """
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.limits = dict(limits or {})
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.scripts = OrderedDict()  # Script IDs mapped to their source
+        self.scripts_lock = threading.Lock()
+        self.workers = set()  # Every live worker, idle or busy
+        self.workers_lock = threading.Lock()
+        self.closed = False
+        self.idle_workers = queue.Queue()
+        for _ in range(workers or os.cpu_count() or 1):
+            self.idle_workers.put(self.start_worker())
+
+    def start_worker(self):
+        """
+        Starts a worker process, unless the server is closed.
+        :return: Worker instance, or None once the server is closed.
+        """
+        with self.workers_lock:
+            if self.closed:
+                return None
+            worker = Worker(self.cache_size, self.limits)
+            self.workers.add(worker)
+        return worker
+
+    def store_script(self, source):
+        """
+        Stores the source of a program under its script ID.
+        :param source: Source of the program.
+        :return: Script ID, the SHA-256 digest of the source.
+        """
+        script_id = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        with self.scripts_lock:
+            self.scripts[script_id] = source
+            self.scripts.move_to_end(script_id)
+            if len(self.scripts) > self.cache_size:
+                self.scripts.popitem(last=False)
+        return script_id
+
+    def find_script(self, script_id):
+        """
+        Finds the source of a program stored earlier.
+        :param script_id: Script ID returned for the source.
+        :return: Source of the program, or None if it is unknown.
+        """
+        with self.scripts_lock:
+            return self.scripts.get(script_id)
+
+    def handle(self, request):
+        """
+        Runs the program of a request.
+        :param request: Request dictionary.
+        :return: Response dictionary.
+        """
+        error = self.find_request_error(request)
+        if error:
+            return self.failure(None, 'Bad request: {}'.format(error))
+        if 'source' in request:
+            source = request['source']
+            script_id = self.store_script(source)
+        else:
+            script_id = request['script_id']
+            source = self.find_script(script_id)
+            if source is None:
+                return self.failure(script_id, 'Unknown script ID, send the source again')
+        timeout = self.timeout if request.get('timeout') is None else min(request['timeout'], self.timeout)
+        argv = [str(value) for value in request.get('argv', [])]
+        input_text = request.get('input', '')
+
+        if not self.pending.acquire(blocking=False):
+            return self.failure(script_id, 'Server busy, too many pending requests')
+        try:
+            return self.run(script_id, source, argv, input_text, timeout)
+        finally:
+            self.pending.release()
+
+    @staticmethod
+    def find_request_error(request):
+        """
+        Checks the fields of a request before anything is run.
+        :param request: Decoded request.
+        :return: Description of the first invalid field, or None if the request is valid.
+        """
+        if not isinstance(request, dict):
+            return 'expected a JSON object'
+        if 'source' in request:
+            if not isinstance(request['source'], str):
+                return "'source' must be a string"
+        elif not isinstance(request.get('script_id'), str):
+            return "expected a 'source' or a 'script_id' string"
+        timeout = request.get('timeout')
+        if timeout is not None:
+            # Note: bool is an int in Python, but not a number of seconds
+            if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+                return "'timeout' must be a number"
+            if not timeout > 0:  # Note: Also rejects NaN
+                return "'timeout' must be greater than 0"
+        if not isinstance(request.get('argv', []), list):
+            return "'argv' must be a list"
+        if not isinstance(request.get('input', ''), str):
+            return "'input' must be a string"
+        return None
+
+    def run(self, script_id, source, argv, input_text, timeout):
+        """
+        Runs a program on the next free worker.
+        :param script_id: ID of the program.
+        :param source: Source of the program.
+        :param argv: Strings exposed to the program in ARGV.
+        :param input_text: Text read by INPUT.
+        :param timeout: Seconds the request may take, including the wait for a worker.
+        :return: Response dictionary.
+        """
+        start_time = perf_counter()
+        try:
+            worker = self.idle_workers.get(timeout=timeout)
+        except queue.Empty:
+            return self.failure(script_id, 'Server busy, no worker became free in time')
+        error = None
+        try:
+            response = worker.run(script_id, source, argv, input_text, timeout - (perf_counter() - start_time))
+            if response is None:
+                error = 'Timed out after {:.2f}s'.format(timeout)
+        except (EOFError, OSError):
+            response, error = None, 'Worker crashed'
+        if response is None:
+            # Note: A worker still running a program can't be interrupted,
+            #       so it is replaced by a fresh one.
+            worker.kill()
+            with self.workers_lock:
+                self.workers.discard(worker)
+            worker = self.start_worker()
+            response = self.failure(script_id, error, perf_counter() - start_time)
+        if worker is not None:
+            self.idle_workers.put(worker)
+        response['script_id'] = script_id
+        return response
+
+    @staticmethod
+    def failure(script_id, error, time=0.0):
+        """
+        Builds the response of a request which could not be run.
+        :param script_id: ID of the program.
+        :param error: Description of the failure.
+        :param time: Seconds spent on the request.
+        :return: Response dictionary.
+        """
+        return {'ok': False, 'script_id': script_id, 'result': None, 'output': '', 'error': error, 'time': time}
+
+    def close(self):
+        """
+        Stops every worker, including those still running a program.
+        Their requests fail as if the worker had crashed.
+        """
+        with self.workers_lock:
+            self.closed = True
+            workers = list(self.workers)
+            self.workers.clear()
+        for worker in workers:
+            worker.kill()
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    """Reads the requests of one client connection until it is closed."""
+
+    def handle(self):
+        while True:
+            try:
+                request = read_frame(self.request)
+            except (ValueError, OSError) as exception:
+                write_frame(self.request, {'ok': False, 'error': 'Bad request: {}'.format(exception)})
+                return
+            if request is None:
+                return
+            write_frame(self.request, self.server.execution_server.handle(request))
+
+
+class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def create_server(address, execution_server):
+    """
+    Creates a socket server for an address.
+    :param address: Path of a UNIX domain socket, or (host, port) tuple.
+    :param execution_server: ExecutionServer handling the requests.
+    :return: Socket server, ready to serve_forever().
+    """
+    if isinstance(address, str):
+        if os.path.exists(address):
+            os.remove(address)
+        server = ThreadingUnixServer(address, RequestHandler)
+    else:
+        server = ThreadingTCPServer(address, RequestHandler)
+    server.execution_server = execution_server
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs SimpleScript programs sent over a socket.')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--socket', help='path of the UNIX domain socket to listen on')
+    group.add_argument('--port', type=int, help='localhost TCP port to listen on')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of cores')
+    parser.add_argument('--timeout', type=float, default=10.0, help='longest time a request may take')
+    parser.add_argument('--cache-size', type=int, default=256, help='programs kept by their script ID')
+    parser.add_argument('--max-pending', type=int, default=64, help='requests running or waiting at once')
+    parser.add_argument('--max-steps', type=int, help='nodes a program may evaluate')
+    parser.add_argument('--max-memory', type=int, help='bytes of strings and lists a program may create')
+    parser.add_argument('--max-depth', type=int, help='nested function calls a program may make')
+    args = parser.parse_args()
+
+    limits = {'max_steps': args.max_steps, 'max_memory': args.max_memory, 'max_depth': args.max_depth}
+    execution_server = ExecutionServer(args.workers, args.timeout, args.cache_size, args.max_pending, limits)
+    server = create_server(args.socket or ('127.0.0.1', args.port), execution_server)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # Note: Clean up when stopped as a service
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        execution_server.close()
+        if args.socket:
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
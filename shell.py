@@ -1,7 +1,14 @@
 # coding=utf-8
 """Interactive shell for SimpleScript programming language"""
 
+import sys
+
 import simplescript
+from bin.line_profiler import LineProfiler
+from bin.memory import MemoryDiagnostics
+from bin.metrics import RunMetrics
+from bin.profiler import Profiler
+from bin.sampling_profiler import SamplingProfiler
 
 ##################
 # TERMINAL FLAGS #
@@ -9,6 +16,55 @@ import simplescript
 
 print_errors = False
 
+
+def flag_value(flag):
+    """
+    Finds the argument following a flag of the shell.
+    :param flag: Flag, such as '--profile'.
+    :return: The argument, or None if the flag is missing or followed by another flag.
+    """
+    if flag not in sys.argv:
+        return None
+    index = sys.argv.index(flag) + 1
+    if index < len(sys.argv) and not sys.argv[index].startswith('--'):
+        return sys.argv[index]
+    return None
+
+
+# Note: Launch the shell with '--profile' to print a timing table
+#       of every function after each command. An optional file name
+#       after the flag also saves the timings in the pstats format.
+should_profile = '--profile' in sys.argv
+profile_output = flag_value('--profile')
+
+# Note: Launch the shell with '--sample' followed by a file name to
+#       sample the running functions in the background. The collapsed
+#       stacks are saved to that file after each command.
+sampler = None
+sample_output = flag_value('--sample')
+if '--sample' in sys.argv and sample_output is None:
+    print('--sample needs the name of the file to write the stacks to', file=sys.stderr)
+    sys.exit(2)
+if sample_output:
+    sampler = SamplingProfiler()
+    sampler.start()
+
+# Note: Launch the shell with '--lines' to print every program
+#       annotated with how often each line ran after each command.
+should_profile_lines = '--lines' in sys.argv
+
+# Note: Launch the shell with '--metrics' to print the phase timings
+#       and sizes of each command as a single line of JSON.
+should_measure = '--metrics' in sys.argv
+
+# Note: Launch the shell with '--memory' to print the memory used
+#       per interpreter class and per function after each command.
+should_account_memory = '--memory' in sys.argv
+
+# Note: Launch the shell with '--stack' to evaluate every command on
+#       a stack of its own, so deep recursion can't exhaust Python's.
+simplescript.default_engine.explicit_stack = '--stack' in sys.argv
+
 ###################
 # WELCOME MESSAGE #
 ###################
@@ -30,13 +86,37 @@ while True:
     if input_stream.strip() == '':
         continue
     elif input_stream.startswith('EXIT'):
-        exit(0)  # Terminate from the shell
+        simplescript.exit_process(0)  # Terminate from the shell
     elif input_stream.startswith('DEBUG'):
         print_errors = not print_errors
         continue
+    elif input_stream.startswith('RESET'):
+        simplescript.default_engine.reset()  # Forget every variable and function defined so far
+        continue
 
-    result, error = simplescript.run('<stdin>', input_stream)
+    profiler = Profiler() if should_profile else None
+    line_profiler = LineProfiler() if should_profile_lines else None
+    memory_diagnostics = MemoryDiagnostics() if should_account_memory else None
+    hooks = [hook for hook in (profiler, line_profiler, memory_diagnostics) if hook]
+    if memory_diagnostics:
+        memory_diagnostics.start()
+    metrics = RunMetrics() if should_measure else None
+    result, error = simplescript.run('<stdin>', input_stream, hooks, metrics)
+    if memory_diagnostics:
+        memory_diagnostics.stop()
     if result:
         print(repr(result))
     if error and print_errors:
         print(error)
+    if profiler:
+        print(profiler.report())
+        if profile_output:
+            profiler.dump_stats(profile_output)
+    if sampler:
+        sampler.write_collapsed(sample_output)
+    if line_profiler:
+        print(line_profiler.report())
+    if metrics:
+        print(metrics.to_json())
+    if memory_diagnostics:
+        print(memory_diagnostics.report())
@@ -9,24 +9,28 @@ transforms executes the AST.
 
 import math
 import os
+import sys
+from operator import attrgetter
+from time import perf_counter
 
 from bin.context import Context
-from bin.errors import ActiveRuntimeError
+from bin.csv_file import CsvReader, CsvWriter
+from bin.errors import ActiveRuntimeError, ScriptError
+from bin.file import File
 from bin.function import BaseFunction
-from bin.interpreter import Interpreter
+from bin.hooks import Hooks
+from bin.interpreter import interpreter_for
 from bin.lexer import Lexer
+from bin.limits import LIST_ELEMENT_SIZE, Limits
 from bin.list import List
 from bin.number import Number
+from bin.output import DEFAULT_BUFFER_SIZE, OutputChannel, serialize
 from bin.parser import Parser
 from bin.runtime_result import RuntimeResult
 from bin.string import String
-from bin.symbol_table import SymbolTable
-
-##############################
-# DEFINE GLOBAL SYMBOL TABLE #
-##############################
-
-global_symbol_table = SymbolTable()
+from bin.symbol_table import FrozenSymbolTable, SymbolTable
+from bin.task import Task
+from bin.value import Value
 
 ########################
 # DEFINE ALL CONSTANTS #
@@ -57,17 +61,19 @@ class BuiltInFunction(BaseFunction):
     def __repr__(self):
         return '<built-in function {}>'.format(self.name)
 
-    def execute(self, args):
+    def execute_in_context(self, args, exec_context):
         """
         Executes the BuiltInFunction instance.
         :param args: List of all arguments.
+        :param exec_context: Context of the builtin call.
         :return: Value of whichever of the exec methods were called.
         """
         runtime_result = RuntimeResult()
-        exec_context = self.generate_new_context()
         method_name = 'execute_{}'.format(self.name.lower())
         method = getattr(self, method_name, self.no_visit_method)
-        runtime_result.register(self.check_and_populate_args(method.arg_names, args, exec_context))
+        optional_arg_count = getattr(method, 'optional_arg_count', 0)
+        runtime_result.register(self.check_and_populate_args(method.arg_names, args, exec_context,
+                                                             optional_arg_count))
         if runtime_result.error:
             return runtime_result
         return_value = runtime_result.register(method(exec_context))
@@ -94,30 +100,48 @@ class BuiltInFunction(BaseFunction):
         raise Exception('No "execute_{} method defined"'.format(self.name))
 
     def execute_print(self, exec_context):
-        print(str(exec_context.symbol_table.get('value')))
+        exec_context.engine.channel.write_value(exec_context.symbol_table.get('value'))
         return RuntimeResult().success(Number(0))
 
     execute_print.arg_names = ['value']
 
     def execute_print_ret(self, exec_context):
-        return RuntimeResult().success(String(str(exec_context.symbol_table.get('value'))))
+        pieces = []
+        serialize(exec_context.symbol_table.get('value'), pieces.append)
+        return RuntimeResult().success(String(''.join(pieces)))
 
     execute_print_ret.arg_names = ['value']
 
+    def execute_flush(self, exec_context):
+        exec_context.engine.flush()
+        return RuntimeResult().success(Number(0))
+
+    execute_flush.arg_names = []
+
     def execute_input(self, exec_context):
-        text = input()
+        text = self.read_line(exec_context)
+        if text is None:
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "No more input to read",
+                self.start_pos, self.end_pos,
+                exec_context))
         return RuntimeResult().success(String(text))
 
     execute_input.arg_names = []
 
     def execute_input_int(self, exec_context):
         while True:
-            text = input()
+            text = self.read_line(exec_context)
+            if text is None:
+                return RuntimeResult().failure(ActiveRuntimeError(
+                    "No more input to read",
+                    self.start_pos, self.end_pos,
+                    exec_context))
             try:  # Try converting to int
                 number = int(text)
                 break
             except ValueError:
-                print("'{}' must be an integer. Try again!".format(text))
+                exec_context.engine.channel.write("'{}' must be an integer. Try again!\n".format(text))
         return RuntimeResult().success(Number(number))
 
     execute_input_int.arg_names = []
@@ -160,6 +184,9 @@ class BuiltInFunction(BaseFunction):
                 "First argument must be list",
                 self.start_pos, self.end_pos,
                 exec_context))
+        failure = self.allocate(LIST_ELEMENT_SIZE, exec_context)
+        if failure:
+            return failure
         list_.elements.append(value)
         return RuntimeResult().success(Number(0))
 
@@ -202,6 +229,9 @@ class BuiltInFunction(BaseFunction):
                 "Second argument must be list",
                 self.start_pos, self.end_pos,
                 exec_context))
+        failure = self.allocate(len(end_list.elements) * LIST_ELEMENT_SIZE, exec_context)
+        if failure:
+            return failure
         first_list.elements.extend(end_list.elements)
         return RuntimeResult().success(Number(0))
 
@@ -234,66 +264,823 @@ class BuiltInFunction(BaseFunction):
                 "Failed to load script \"{}\"\n".format(file_name) + str(exception),
                 self.start_pos, self.end_pos,
                 exec_context))
-        _, error = run(file_name, script)
+        hooks = exec_context.hooks.hooks if exec_context.hooks else None
+        _, error = exec_context.engine.run(file_name, script, hooks, exec_context.metrics, exec_context.limits)
         if error:
             return RuntimeResult().failure(ActiveRuntimeError(
-                "Failed to finish executing script \"{}\"\n".format(file_name) + error.as_string(),
+                "Failed to finish executing script \"{}\"\n".format(file_name) + str(error),
                 self.start_pos, self.end_pos,
                 exec_context))
         return RuntimeResult().success(Number(0))
 
     execute_run.arg_names = ["fn"]
 
+    def execute_sort(self, exec_context):
+        list_ = exec_context.symbol_table.get("list")
+        key_func = exec_context.symbol_table.get("key")
+        runtime_result = RuntimeResult()
+        order = runtime_result.register(self.sort_order(list_, key_func, exec_context))
+        if runtime_result.error:
+            return runtime_result
+        if order is None:  # Elements are their own sort keys
+            return runtime_result.success(List(sorted(list_.elements, key=attrgetter('value'))))
+        return runtime_result.success(List([list_.elements[index] for index in order]))
+
+    execute_sort.arg_names = ["list", "key"]
+    execute_sort.optional_arg_count = 1
+
+    def execute_sort_in_place(self, exec_context):
+        list_ = exec_context.symbol_table.get("list")
+        key_func = exec_context.symbol_table.get("key")
+        runtime_result = RuntimeResult()
+        order = runtime_result.register(self.sort_order(list_, key_func, exec_context))
+        if runtime_result.error:
+            return runtime_result
+        if order is None:  # Elements are their own sort keys
+            list_.elements.sort(key=attrgetter('value'))
+        else:  # Rearrange the existing list rather than replacing it
+            list_.elements[:] = [list_.elements[index] for index in order]
+        return runtime_result.success(Number(0))
+
+    execute_sort_in_place.arg_names = ["list", "key"]
+    execute_sort_in_place.optional_arg_count = 1
+
+    def execute_mem_snapshot(self, exec_context):
+        label = exec_context.symbol_table.get("label")
+        if not isinstance(label, String):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Argument must be string",
+                self.start_pos, self.end_pos,
+                exec_context))
+        # Note: Scripts may take snapshots whether or not memory
+        #       diagnostics are enabled, in which case this does nothing.
+        #       Imported here as tracemalloc slows down every start.
+        from bin.memory import MemoryDiagnostics
+        hooks = exec_context.hooks.hooks if exec_context.hooks else []
+        for hook in hooks:
+            if isinstance(hook, MemoryDiagnostics):
+                return RuntimeResult().success(Number(hook.snapshot(label.value)))
+        return RuntimeResult().success(Number(0))
+
+    execute_mem_snapshot.arg_names = ["label"]
+
+    def execute_spawn(self, exec_context):
+        function = exec_context.symbol_table.get("func")
+        args = exec_context.symbol_table.get("args")
+        if not isinstance(function, BaseFunction):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "First argument must be function",
+                self.start_pos, self.end_pos,
+                exec_context))
+        if not isinstance(args, List) and args.is_true():
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Second argument must be list",
+                self.start_pos, self.end_pos,
+                exec_context))
+        args = [arg.copy() for arg in args.elements] if isinstance(args, List) else []
+        return RuntimeResult().success(Task(function.name, exec_context.engine.spawn(function, args)))
+
+    execute_spawn.arg_names = ["func", "args"]
+    execute_spawn.optional_arg_count = 1
+
+    def execute_await(self, exec_context):
+        task = exec_context.symbol_table.get("task")
+        if not isinstance(task, Task):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Argument must be task",
+                self.start_pos, self.end_pos,
+                exec_context))
+        # Note: The error of a failed task is raised again by every AWAIT
+        try:
+            return task.future.result()
+        except Exception as exception:  # Note: Cancelled futures raise a CancelledError
+            if task.future.cancelled():
+                details = "Task {} was cancelled before it started".format(task.name)
+            else:
+                details = "Task {} failed\n".format(task.name) + repr(exception)
+            return RuntimeResult().failure(ActiveRuntimeError(
+                details,
+                self.start_pos, self.end_pos,
+                exec_context))
+
+    execute_await.arg_names = ["task"]
+
+    def execute_open(self, exec_context):
+        path = exec_context.symbol_table.get("path")
+        memory_mapped = exec_context.symbol_table.get("mapped")
+        if not isinstance(path, String):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "First argument must be string",
+                self.start_pos, self.end_pos,
+                exec_context))
+        try:
+            file_ = File.open(path.value, memory_mapped.is_true())
+        except OSError as exception:
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Failed to open file \"{}\"\n".format(path.value) + str(exception),
+                self.start_pos, self.end_pos,
+                exec_context))
+        return RuntimeResult().success(file_)
+
+    execute_open.arg_names = ["path", "mapped"]
+    execute_open.optional_arg_count = 1
+
+    def execute_read_line(self, exec_context):
+        file_ = exec_context.symbol_table.get("file")
+        failure = self.check_file(file_, exec_context)
+        if failure:
+            return failure
+        line = file_.read_line()
+        return RuntimeResult().success(Number(0) if line is None else String(line))
+
+    execute_read_line.arg_names = ["file"]
+
+    def execute_seek(self, exec_context):
+        file_ = exec_context.symbol_table.get("file")
+        offset = exec_context.symbol_table.get("offset")
+        failure = self.check_file(file_, exec_context)
+        if failure:
+            return failure
+        if not isinstance(offset, Number) or not isinstance(offset.value, int):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Second argument must be integer",
+                self.start_pos, self.end_pos,
+                exec_context))
+        try:
+            file_.seek(offset.value)
+        except (OSError, ValueError):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Offset {} is outside of the file".format(offset.value),
+                self.start_pos, self.end_pos,
+                exec_context))
+        return RuntimeResult().success(Number(file_.tell()))
+
+    execute_seek.arg_names = ["file", "offset"]
+
+    def execute_tell(self, exec_context):
+        file_ = exec_context.symbol_table.get("file")
+        failure = self.check_file(file_, exec_context)
+        if failure:
+            return failure
+        return RuntimeResult().success(Number(file_.tell()))
+
+    execute_tell.arg_names = ["file"]
+
+    def execute_close(self, exec_context):
+        file_ = exec_context.symbol_table.get("file")
+        if not isinstance(file_, (File, CsvReader, CsvWriter)):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Argument must be file",
+                self.start_pos, self.end_pos,
+                exec_context))
+        try:
+            file_.close()
+        except OSError as exception:
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Failed to write file \"{}\"\n".format(file_.path) + str(exception),
+                self.start_pos, self.end_pos,
+                exec_context))
+        return RuntimeResult().success(Number(0))
+
+    execute_close.arg_names = ["file"]
+
+    def execute_csv_open(self, exec_context):
+        path = exec_context.symbol_table.get("path")
+        has_header = exec_context.symbol_table.get("header")
+        if not isinstance(path, String):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "First argument must be string",
+                self.start_pos, self.end_pos,
+                exec_context))
+        try:
+            reader = CsvReader.open(path.value, has_header.is_true())
+        except (OSError, ValueError) as exception:
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Failed to open file \"{}\"\n".format(path.value) + str(exception),
+                self.start_pos, self.end_pos,
+                exec_context))
+        return RuntimeResult().success(reader)
+
+    execute_csv_open.arg_names = ["path", "header"]
+    execute_csv_open.optional_arg_count = 1
+
+    def execute_csv_read(self, exec_context):
+        reader = exec_context.symbol_table.get("reader")
+        failure = self.check_file(reader, exec_context, CsvReader, "CSV reader")
+        if failure:
+            return failure
+        try:
+            row = reader.read_row()
+        except ValueError as exception:
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Failed to read file \"{}\"\n".format(reader.path) + str(exception),
+                self.start_pos, self.end_pos,
+                exec_context))
+        if row is None:
+            return RuntimeResult().success(Number(0))
+        failure = self.allocate(len(row.elements) * LIST_ELEMENT_SIZE, exec_context)
+        if failure:
+            return failure
+        return RuntimeResult().success(row)
+
+    execute_csv_read.arg_names = ["reader"]
+
+    def execute_csv_header(self, exec_context):
+        reader = exec_context.symbol_table.get("reader")
+        if not isinstance(reader, CsvReader):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Argument must be CSV reader",
+                self.start_pos, self.end_pos,
+                exec_context))
+        if reader.header is None:
+            return RuntimeResult().success(Number(0))
+        return RuntimeResult().success(reader.header.copy())
+
+    execute_csv_header.arg_names = ["reader"]
+
+    def execute_csv_create(self, exec_context):
+        path = exec_context.symbol_table.get("path")
+        if not isinstance(path, String):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Argument must be string",
+                self.start_pos, self.end_pos,
+                exec_context))
+        try:
+            writer = CsvWriter.create(path.value)
+        except OSError as exception:
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Failed to create file \"{}\"\n".format(path.value) + str(exception),
+                self.start_pos, self.end_pos,
+                exec_context))
+        if exec_context.engine is not None:
+            exec_context.engine.csv_writers.append(writer)  # Note: Rows left over are written after the run
+        return RuntimeResult().success(writer)
+
+    execute_csv_create.arg_names = ["path"]
+
+    def execute_csv_write(self, exec_context):
+        writer = exec_context.symbol_table.get("writer")
+        row = exec_context.symbol_table.get("row")
+        failure = self.check_file(writer, exec_context, CsvWriter, "CSV writer")
+        if failure:
+            return failure
+        if not isinstance(row, List):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Second argument must be list",
+                self.start_pos, self.end_pos,
+                exec_context))
+        try:
+            writer.write_row(row)
+        except OSError as exception:
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "Failed to write file \"{}\"\n".format(writer.path) + str(exception),
+                self.start_pos, self.end_pos,
+                exec_context))
+        return RuntimeResult().success(Number(0))
+
+    execute_csv_write.arg_names = ["writer", "row"]
+
+    def check_file(self, file_, exec_context, file_class=File, kind="file"):
+        """
+        Validates the file argument of READ_LINE, SEEK, TELL, CSV_READ and CSV_WRITE.
+        :param file_: Value passed as the file.
+        :param exec_context: Context of the builtin call.
+        :param file_class: Class the file must be an instance of.
+        :param kind: Name of the kind of file in error messages.
+        :return: Failed RuntimeResult unless the value is an open file, or None.
+        """
+        if not isinstance(file_, file_class):
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "First argument must be {}".format(kind),
+                self.start_pos, self.end_pos,
+                exec_context))
+        if file_.closed:
+            return RuntimeResult().failure(ActiveRuntimeError(
+                "File \"{}\" is closed".format(file_.path),
+                self.start_pos, self.end_pos,
+                exec_context))
+        return None
+
+    def allocate(self, size, exec_context):
+        """
+        Charges the memory a builtin allocates to the limits of the run, if any.
+        :param size: Approximate bytes the builtin allocates.
+        :param exec_context: Context of the builtin call.
+        :return: Failed RuntimeResult once the memory limit is exceeded, or None.
+        """
+        limits = exec_context.limits
+        error = limits.allocate(size) if limits is not None else None
+        if error:
+            return RuntimeResult().failure(ActiveRuntimeError(error, self.start_pos, self.end_pos, exec_context))
+        return None
+
+    def read_line(self, exec_context):
+        """
+        Reads a line for INPUT and INPUT_INT from the input of the Engine.
+        :param exec_context: Context of the builtin call.
+        :return: Line without its newline, or None once the input is exhausted.
+        """
+        exec_context.engine.flush()  # Note: Prompts must be shown before waiting for the answer
+        input_file = exec_context.engine.input
+        if input_file is None:  # Read from the terminal
+            try:
+                return input()
+            except EOFError:
+                return None
+        line = input_file.readline()
+        return line[:-1] if line.endswith('\n') else line or None
+
+    def sort_order(self, list_, key_func, exec_context):
+        """
+        Validates the arguments of SORT and computes the sort keys.
+        The key function is called exactly once per element and the
+        elements are then ordered by their decorated keys with Timsort.
+        :param list_: List instance to be sorted.
+        :param key_func: Optional key function, NULL when omitted.
+        :param exec_context: Context of the SORT call.
+        :return: Sorted element indices, or None if the elements are their own keys.
+        """
+        runtime_result = RuntimeResult()
+        if not isinstance(list_, List):
+            return runtime_result.failure(ActiveRuntimeError(
+                "First argument must be list",
+                self.start_pos, self.end_pos,
+                exec_context))
+        # Note: Only NULL stands for no key, as falsy values like [] must not sort silently
+        is_null = isinstance(key_func, Number) and not key_func.is_true()
+        if not isinstance(key_func, BaseFunction) and not is_null:
+            return runtime_result.failure(ActiveRuntimeError(
+                "Second argument must be function or NULL",
+                self.start_pos, self.end_pos,
+                exec_context))
+        keys = list_.elements
+        if isinstance(key_func, BaseFunction):
+            keys = []
+            for element in list_.elements:
+                keys.append(runtime_result.register(key_func.execute([element.copy()])))
+                if runtime_result.error:
+                    return runtime_result
+
+        # Note: Numbers and Strings are compared on their native Python values,
+        #       so a mix of both cannot be ordered and is rejected up-front.
+        key_types = {type(key) for key in keys}
+        if not (key_types <= {Number} or key_types <= {String}):
+            return runtime_result.failure(ActiveRuntimeError(
+                "Sort keys must be all numbers or all strings",
+                self.start_pos, self.end_pos,
+                exec_context))
+        if keys is list_.elements:
+            return runtime_result.success(None)
+        key_values = [key.value for key in keys]
+        return runtime_result.success(sorted(range(len(key_values)), key=key_values.__getitem__))
+
 
 #######################################
 # EVERY BUILT IN FUNCTION  DEFINITION #
 #######################################
 
-BuiltInFunction.print = BuiltInFunction("print")
-BuiltInFunction.print_ret = BuiltInFunction("print_ret")
-BuiltInFunction.input = BuiltInFunction("input")
-BuiltInFunction.input_int = BuiltInFunction("input_int")
-BuiltInFunction.clear = BuiltInFunction("clear")
-BuiltInFunction.is_number = BuiltInFunction("is_number")
-BuiltInFunction.is_string = BuiltInFunction("is_string")
-BuiltInFunction.is_list = BuiltInFunction("is_list")
-BuiltInFunction.is_function = BuiltInFunction("is_function")
-BuiltInFunction.append = BuiltInFunction("append")
-BuiltInFunction.pop = BuiltInFunction("pop")
-BuiltInFunction.extend = BuiltInFunction("extend")
-BuiltInFunction.len = BuiltInFunction("len")
-BuiltInFunction.run = BuiltInFunction("run")
-
-##############################################
-# MAP ALL BUILT IN FUNCTIONS TO SYMBOL TABLE #
-##############################################
-
-global_symbol_table.set("NULL", Number.null)
-global_symbol_table.set("FALSE", Number.false)
-global_symbol_table.set("TRUE", Number.true)
-global_symbol_table.set("MATH_PI", Number.math_PI)
-global_symbol_table.set("PRINT", BuiltInFunction.print)
-global_symbol_table.set("PRINT_RET", BuiltInFunction.print_ret)
-global_symbol_table.set("INPUT", BuiltInFunction.input)
-global_symbol_table.set("INPUT_INT", BuiltInFunction.input_int)
-global_symbol_table.set("CLEAR", BuiltInFunction.clear)
-global_symbol_table.set("CLS", BuiltInFunction.clear)
-global_symbol_table.set("IS_NUM", BuiltInFunction.is_number)
-global_symbol_table.set("IS_STR", BuiltInFunction.is_string)
-global_symbol_table.set("IS_LIST", BuiltInFunction.is_list)
-global_symbol_table.set("IS_FUNC", BuiltInFunction.is_function)
-global_symbol_table.set("APPEND", BuiltInFunction.append)
-global_symbol_table.set("POP", BuiltInFunction.pop)
-global_symbol_table.set("EXTEND", BuiltInFunction.extend)
-global_symbol_table.set("LEN", BuiltInFunction.len)
-global_symbol_table.set("RUN", BuiltInFunction.run)
+# Note: Variable names mapped to the name of their built-in function.
+#       The BuiltInFunction instances are only created once a program
+#       looks them up, so programs only pay for the builtins they use.
+BUILT_IN_FUNCTIONS = {"PRINT": "print",
+                     "PRINT_RET": "print_ret",
+                     "FLUSH": "flush",
+                     "INPUT": "input",
+                     "INPUT_INT": "input_int",
+                     "CLEAR": "clear",
+                     "CLS": "clear",
+                     "IS_NUM": "is_number",
+                     "IS_STR": "is_string",
+                     "IS_LIST": "is_list",
+                     "IS_FUNC": "is_function",
+                     "APPEND": "append",
+                     "POP": "pop",
+                     "EXTEND": "extend",
+                     "LEN": "len",
+                     "RUN": "run",
+                     "SORT": "sort",
+                     "SORT_IN_PLACE": "sort_in_place",
+                     "MEM_SNAPSHOT": "mem_snapshot",
+                     "SPAWN": "spawn",
+                     "AWAIT": "await",
+                     "OPEN": "open",
+                     "READ_LINE": "read_line",
+                     "SEEK": "seek",
+                     "TELL": "tell",
+                     "CLOSE": "close",
+                     "CSV_OPEN": "csv_open",
+                     "CSV_READ": "csv_read",
+                     "CSV_HEADER": "csv_header",
+                     "CSV_CREATE": "csv_create",
+                     "CSV_WRITE": "csv_write"}
+
+
+def load_built_in_function(variable_name):
+    """
+    Creates the BuiltInFunction of a variable on its first lookup.
+    :param variable_name: Name of the variable mapped to the built-in function.
+    :return: BuiltInFunction instance.
+    """
+    return BuiltInFunction(BUILT_IN_FUNCTIONS[variable_name])
+
+
+###############################################
+# MAP ALL BUILT IN FUNCTIONS TO SYMBOL TABLE  #
+# FROZEN AND SHARED BY THE GLOBALS OF ENGINES #
+###############################################
+
+base_symbol_table = SymbolTable()
+base_symbol_table.set("NULL", Number.null)
+base_symbol_table.set("FALSE", Number.false)
+base_symbol_table.set("TRUE", Number.true)
+base_symbol_table.set("MATH_PI", Number.math_PI)
+for built_in_name in BUILT_IN_FUNCTIONS:
+    base_symbol_table.set_lazy(built_in_name, load_built_in_function)
+base_symbol_table = FrozenSymbolTable(base_symbol_table)
+
+
+###############################
+# PYTHON VALUE CONVERSIONS    #
+# USED TO CALL INTO FUNCTIONS #
+###############################
+
+def to_value(python_value):
+    """
+    Converts a Python value into a SimpleScript Value.
+    :param python_value: Boolean, number, string, list, tuple or Value.
+    :return: Value instance.
+    """
+    if isinstance(python_value, Value):
+        return python_value
+    if isinstance(python_value, bool):
+        return Number(int(python_value))
+    if isinstance(python_value, (int, float)):
+        return Number(python_value)
+    if isinstance(python_value, str):
+        return String(python_value)
+    if isinstance(python_value, (list, tuple)):
+        return List([to_value(element) for element in python_value])
+    raise TypeError('Cannot convert {} to a SimpleScript value'.format(type(python_value).__name__))
+
+
+def to_python(value, engine):
+    """
+    Converts a SimpleScript Value into a Python value.
+    :param value: Value instance.
+    :param engine: Engine which functions are called in.
+    :return: Number, string, list or ScriptFunction.
+    """
+    if isinstance(value, (Number, String)):
+        return value.value
+    if isinstance(value, List):
+        return [to_python(element, engine) for element in value.elements]
+    if isinstance(value, BaseFunction):
+        return ScriptFunction(engine, value)
+    return value
+
+
+class ScriptFunction:
+    """Python callable of a SimpleScript function."""
+
+    def __init__(self, engine, function):
+        """
+        Initializes a ScriptFunction instance.
+        :param engine: Engine the function is called in.
+        :param function: BaseFunction instance to call.
+        """
+        self.engine = engine
+        self.function = function
+
+    def __repr__(self):
+        return repr(self.function)
+
+    def __call__(self, *args):
+        return self.engine.call_function(self.function, args)
+
+
+##########################################
+# ENGINE OWNING THE GLOBAL ENVIRONMENT   #
+# EVERY RUN OF AN ENGINE SHARES GLOBALS  #
+##########################################
+
+class Engine:
+    """
+    Runs programs in a global environment of its own.
+    Engines never share variables, so separate engines can run
+    on separate threads, and each one can be reused for many runs.
+    The builtins and constants live in the frozen base_symbol_table,
+    which every engine shares as the parent of its own globals.
+    """
+
+    def __init__(self, output=None, argv=(), input=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Initializes an Engine with empty globals.
+        :param output: File PRINT writes to, defaults to the current sys.stdout.
+        :param argv: Strings exposed to programs in the ARGV list.
+        :param input: File INPUT reads lines from, defaults to the terminal.
+        :param buffer_size: Characters PRINT collects before writing them, 0 to write at once.
+        """
+        self.channel = OutputChannel(output, buffer_size)
+        self.input = input
+        self.executor = None  # Threads running the tasks of SPAWN, started on the first one
+        self.tasks = set()  # Futures of the tasks which haven't finished yet
+        self.csv_writers = []  # CsvWriters created by CSV_CREATE, flushed after every run
+        self.process_pool = None  # Processes running PARALLEL FOR loops, started on the first one
+        self.parallel = True  # False to run PARALLEL FOR loops like any other loop
+        self.explicit_stack = False  # True to evaluate on a stack of its own, immune to Python's recursion limit
+        self.argv = list(argv)
+        self.symbol_table = SymbolTable(base_symbol_table)
+        self.symbol_table.set("ARGV", List([String(value) for value in self.argv]))
+
+    @property
+    def output(self):
+        """File PRINT writes to, or None for the current sys.stdout."""
+        return self.channel.sink
+
+    @output.setter
+    def output(self, sink):
+        self.channel.redirect(sink)
+
+    def flush(self):
+        """
+        Writes the output collected by PRINT to the output file, and the
+        rows collected by CSV writers which are still open to their files.
+        So scripts which never CLOSE a CSV writer still write every row.
+        """
+        self.channel.flush()
+        if self.csv_writers:
+            for writer in self.csv_writers:
+                writer.flush()
+            self.csv_writers = [writer for writer in self.csv_writers if not writer.closed]
+
+    def reset(self):
+        """
+        Discards every global defined by earlier runs, restoring the
+        builtins and special variables. The frozen base is never changed,
+        so nothing needs to be copied back however many globals were defined.
+        Tasks spawned by earlier runs which haven't started yet are cancelled.
+        """
+        self.cancel_tasks()
+        self.symbol_table.clear()
+        self.symbol_table.set("ARGV", List([String(value) for value in self.argv]))
+
+    def run(self, fn, stream, hooks=None, metrics=None, limits=None):
+        """
+        Lexes, parses and interprets a program in the global environment.
+        :param fn: File name where stream originates.
+        :param stream: Input text stream to parse.
+        :param hooks: Optional list of ExecutionHook instances notified during the run.
+        :param metrics: Optional RunMetrics instance measuring the run.
+        :param limits: Optional Limits instance the run must stay within.
+        :return: Tuple of the resulting value and error.
+        """
+        node, error = self.compile(fn, stream, metrics)
+        if error:
+            return None, error
+        return self.execute(node, hooks, metrics, limits)
+
+    def compile(self, fn, stream, metrics=None):
+        """
+        Lexes and parses a program into an AST.
+        The AST may be cached and executed any number of times, by any
+        Engine. Running it does write the inline caches of its nodes:
+        where VarAccessNodes found their variables and the specialized
+        versions of BinOpNodes. Every cache is checked against the
+        SymbolTable or operand types at hand before it is used, so
+        Engines and SPAWN tasks running the same AST at once get the
+        right results, but keep replacing each other's caches, which
+        makes them slower than separate ASTs would.
+        :param fn: File name where stream originates.
+        :param stream: Input text stream to parse.
+        :param metrics: Optional RunMetrics instance measuring the run.
+        :return: Tuple of the root Node of the AST and the error.
+        """
+        if metrics is not None:
+            metrics.runs += 1
+            start_time = perf_counter()
+
+        # Lex the input stream
+        lexer = Lexer(stream, fn)
+        tokens, error = lexer.tokenize()
+        if metrics is not None:
+            metrics.lex_time += perf_counter() - start_time
+            metrics.token_count += len(tokens)
+        if error:  # Don't create the AST
+            return None, error  # Tokenization failure
+
+        # Parse the tokens
+        if metrics is not None:
+            start_time = perf_counter()
+        parser = Parser(tokens, self.explicit_stack)
+        ast = parser.parse()
+        if metrics is not None:
+            metrics.parse_time += perf_counter() - start_time
+        return ast.node, ast.error
+
+    def execute(self, node, hooks=None, metrics=None, limits=None):
+        """
+        Interprets the AST of a program in the global environment.
+        :param node: Root Node of the AST.
+        :param hooks: Optional list of ExecutionHook instances notified during the run.
+        :param metrics: Optional RunMetrics instance measuring the run.
+        :param limits: Optional Limits instance the run must stay within.
+        :return: Tuple of the resulting value and error.
+        """
+        if metrics is not None:
+            hooks = list(hooks or [])
+            if metrics not in hooks:  # Nested runs already inherit the metrics
+                hooks.append(metrics)
+
+        context = Context('<program>')
+        context.symbol_table = self.symbol_table
+        context.engine = self
+        context.metrics = metrics
+        context.limits = limits
+        if hooks:  # Only pay for the notifications when they are needed
+            context.hooks = Hooks(hooks)
+        interpreter = interpreter_for(context)
+        if limits is None:
+            try:
+                return self.visit_program(interpreter, node, context)
+            finally:
+                self.flush()
+
+        # Note: Nested RUN calls share the limits of the outermost run
+        nested = limits.active
+        if not nested:
+            limits.start()
+        try:
+            return self.visit_program(interpreter, node, context)
+        except RecursionError:  # Deep recursion below the depth limit must not crash the host either
+            return None, ActiveRuntimeError('Python recursion limit reached, set a call depth limit',
+                                            node.start_pos, node.end_pos, context)
+        finally:
+            if not nested:
+                limits.stop()
+            self.flush()
+
+    @staticmethod
+    def visit_program(interpreter, node, context):
+        """
+        Interprets the AST of a program, measuring it when metrics are collected.
+        :param interpreter: Interpreter instance for the hooks and limits of the run.
+        :param node: Root Node of the AST.
+        :param context: Context of the program.
+        :return: Tuple of the resulting value and error.
+        """
+        metrics = context.metrics
+        if metrics is None:
+            result = interpreter.visit(node, context)
+        else:
+            from bin.metrics import count_nodes  # Note: Only imported once a run is measured
+            metrics.node_count += count_nodes(node)
+            nested_time = metrics.lex_time + metrics.parse_time + metrics.execute_time
+            metrics.enter_context()
+            start_time = perf_counter()
+            result = interpreter.visit(node, context)
+            execute_time = perf_counter() - start_time
+            metrics.exit_context()
+
+            # Note: Nested RUN calls have already added their own phases,
+            #       which must not be counted again as execution time.
+            nested_time = metrics.lex_time + metrics.parse_time + metrics.execute_time - nested_time
+            metrics.execute_time += execute_time - nested_time
+
+        return result.value, result.error
+
+    def spawn(self, function, args):
+        """
+        Calls a function on a background thread of the Engine.
+        Note: Only the tasks themselves may spawn tasks concurrently,
+              which can't happen before the thread pool exists.
+        :param function: BaseFunction instance to call.
+        :param args: List of the argument values.
+        :return: Future of the RuntimeResult of the call.
+        """
+        if function.context is not None and (function.context.hooks is not None
+                                              or function.context.metrics is not None):
+            # Note: Hooks and metrics keep stacks of the calls in progress, which
+            #       calls on other threads would corrupt, so tasks run without them.
+            context = Context('<task {}>'.format(function.name), function.context)
+            context.symbol_table = function.context.symbol_table
+            context.hooks = None
+            context.metrics = None
+            function = function.copy().set_context(context)
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(thread_name_prefix='simplescript-task')
+        future = self.executor.submit(function.execute, args)
+        self.tasks.add(future)
+        future.add_done_callback(self.tasks.discard)
+        return future
+
+    def cancel_tasks(self):
+        """
+        Cancels the spawned tasks which haven't started yet, and stops the thread pool.
+        Note: Python threads can't be interrupted, so tasks already running
+              keep running until they finish on their own.
+        :return: Number of tasks still running.
+        """
+        if self.executor is None:
+            return 0
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None  # Note: The next SPAWN starts a fresh thread pool
+        return sum(1 for future in list(self.tasks) if not future.done())
+
+    def close(self):
+        """
+        Releases the threads and processes of the Engine once it is no longer used.
+        Tasks which haven't started are cancelled, the worker processes
+        of PARALLEL FOR loops are stopped, and CSV writers left open are
+        closed, writing their rows.
+        :return: Number of tasks still running, see cancel_tasks().
+        """
+        running = self.cancel_tasks()
+        for writer in self.csv_writers:
+            writer.close()
+        self.csv_writers = []
+        if self.process_pool is not None:
+            self.process_pool.shutdown(cancel_futures=True)
+            self.process_pool = None
+        return running
+
+    def process_count(self):
+        """
+        Counts the worker processes PARALLEL FOR loops run on.
+        :return: Number of worker processes.
+        """
+        return os.cpu_count() or 1
+
+    def map_processes(self, function, payloads):
+        """
+        Calls a function for every payload on the worker processes of the Engine.
+        :param function: Module-level function to call.
+        :param payloads: List of the arguments of every call.
+        :return: List of the results, in the order of the payloads.
+        """
+        if self.process_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self.process_pool = ProcessPoolExecutor(self.process_count())
+        return list(self.process_pool.map(function, payloads))
+
+    def function(self, name):
+        """
+        Looks up a global function to be called from Python.
+        :param name: Name of the function in the global environment.
+        :return: ScriptFunction instance.
+        """
+        function = self.symbol_table.get(name)
+        if function is None:
+            raise KeyError(name)
+        if not isinstance(function, BaseFunction):
+            raise TypeError('"{}" is not a function'.format(name))
+        return ScriptFunction(self, function)
+
+    def call_function(self, function, args):
+        """
+        Calls a function with Python arguments.
+        :param function: BaseFunction instance to call.
+        :param args: Python values of the arguments.
+        :return: Python value of the result.
+        """
+        context = Context('<python>')
+        context.symbol_table = self.symbol_table
+        context.engine = self
+        function = function.copy().set_context(context)
+        result = function.execute([to_value(arg) for arg in args])
+        self.flush()
+        if result.error:
+            raise ScriptError(result.error)
+        return to_python(result.value, self)
 
 
 ##########################
 # EXECUTE INTERPRETATION #
 ##########################
 
-def run(fn, stream):
+# Note: The module-level run() and global_symbol_table
+#       belong to the default Engine of the process.
+default_engine = Engine()
+global_symbol_table = default_engine.symbol_table
+
+
+def exit_process(exit_code):
+    """
+    Ends the process once the script of the default Engine is done.
+    Spawned tasks which were never awaited don't keep the process alive:
+    those which haven't started are cancelled, and those still running
+    are abandoned, since Python would otherwise wait for their threads.
+    :param exit_code: Exit code of the process.
+    """
+    default_engine.flush()
+    if default_engine.close():
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
+    sys.exit(exit_code)
+
+
+def run(fn, stream, hooks=None, metrics=None, limits=None):
     """
     Execute the Lexer on the text stream.
     Three main steps here: lexing, parsing, and interpreting.
@@ -302,25 +1089,140 @@ def run(fn, stream):
     transforms executes the AST.
     :param fn: File name where stream originates.
     :param stream: Input text stream to parse.
+    :param hooks: Optional list of ExecutionHook instances notified during the run.
+    :param metrics: Optional RunMetrics instance measuring the run.
+    :param limits: Optional Limits instance the run must stay within.
     :return: Stream of Token objects and Error messages.
     """
+    return default_engine.run(fn, stream, hooks, metrics, limits)
+
+
+#######################
+# COMMAND LINE RUNNER #
+#######################
+
+USAGE = ('usage: python -m simplescript [--profile [--profile-output FILE]] [--sample FILE]\n'
+         '                              [--lines] [--metrics] [--memory] [--stack] [--max-steps N]\n'
+         '                              [--max-time SECONDS] [--max-memory BYTES] [--max-depth N]\n'
+         '                              file [args ...]')
+
+# Note: Flags mirror those of the interactive shell. Every flag
+#       which takes a value is listed here with its value's name.
+RUNNER_FLAGS = {'--profile': None, '--profile-output': 'FILE', '--sample': 'FILE',
+                '--lines': None, '--metrics': None, '--memory': None, '--stack': None, '--max-steps': 'N',
+                '--max-time': 'SECONDS', '--max-memory': 'BYTES', '--max-depth': 'N'}
+
+# Note: Limit flags mapped to the Limits argument and the type of their value
+LIMIT_FLAGS = {'--max-steps': ('max_steps', int), '--max-time': ('max_time', float),
+               '--max-memory': ('max_memory', int), '--max-depth': ('max_depth', int)}
+
+
+def parse_arguments(argv):
+    """
+    Splits the command line into runner flags, script file and script arguments.
+    Note: Deliberately not argparse, which costs more to import than
+          most scripts take to run.
+    :param argv: Command line arguments, without the program name.
+    :return: Tuple of the flags dictionary, file name and script arguments.
+    """
+    flags = dict()
+    index = 0
+    while index < len(argv) and argv[index].startswith('--'):
+        flag = argv[index]
+        if flag not in RUNNER_FLAGS:
+            raise ValueError('unknown flag {}'.format(flag))
+        if RUNNER_FLAGS[flag] is None:
+            flags[flag] = True
+        elif index + 1 < len(argv):
+            index += 1
+            flags[flag] = argv[index]
+        else:
+            raise ValueError('flag {} expects {}'.format(flag, RUNNER_FLAGS[flag]))
+        index += 1
+    for flag, (_, value_type) in LIMIT_FLAGS.items():
+        if flag in flags:
+            try:
+                flags[flag] = value_type(flags[flag])
+            except ValueError:
+                raise ValueError('flag {} expects a number'.format(flag))
+    if index == len(argv):
+        raise ValueError('missing script file')
+    return flags, argv[index], argv[index + 1:]
+
+
+def main(argv=None):
+    """
+    Runs a script file from the command line.
+    The script finds its file name and arguments in the ARGV list.
+    :param argv: Command line arguments, defaults to those of the process.
+    :return: Exit code, 0 on success, 1 on script errors and 2 on usage errors.
+    """
+    try:
+        flags, file_name, arguments = parse_arguments(sys.argv[1:] if argv is None else argv)
+    except ValueError as exception:
+        print('{}\nerror: {}'.format(USAGE, exception), file=sys.stderr)
+        return 2
+    try:
+        with open(file_name, 'r') as f:
+            script = f.read()
+    except OSError as exception:
+        print('error: can\'t open file "{}": {}'.format(file_name, exception), file=sys.stderr)
+        return 2
+    default_engine.argv = [file_name] + arguments
+    default_engine.reset()
+    default_engine.explicit_stack = '--stack' in flags
+
+    # Note: The profiling tools are only imported when asked for,
+    #       keeping the start of plain runs as fast as possible.
+    hooks = []
+    profiler = line_profiler = memory_diagnostics = metrics = sampler = None
+    if '--profile' in flags:
+        from bin.profiler import Profiler
+        profiler = Profiler()
+        hooks.append(profiler)
+    if '--lines' in flags:
+        from bin.line_profiler import LineProfiler
+        line_profiler = LineProfiler()
+        hooks.append(line_profiler)
+    if '--memory' in flags:
+        from bin.memory import MemoryDiagnostics
+        memory_diagnostics = MemoryDiagnostics()
+        hooks.append(memory_diagnostics)
+        memory_diagnostics.start()
+    if '--metrics' in flags:
+        from bin.metrics import RunMetrics
+        metrics = RunMetrics()
+    if '--sample' in flags:
+        from bin.sampling_profiler import SamplingProfiler
+        sampler = SamplingProfiler()
+        sampler.start()
+    limits = None
+    if any(flag in flags for flag in LIMIT_FLAGS):
+        limits = Limits(**{name: flags[flag] for flag, (name, _) in LIMIT_FLAGS.items() if flag in flags})
+
+    _, error = run(file_name, script, hooks, metrics, limits)
+
+    if sampler:
+        sampler.stop()
+        sampler.write_collapsed(flags['--sample'])
+    if memory_diagnostics:
+        memory_diagnostics.stop()
+    # Note: Reports go to stderr so they never mix with the output of the script
+    if profiler:
+        print(profiler.report(), file=sys.stderr)
+        if '--profile-output' in flags:
+            profiler.dump_stats(flags['--profile-output'])
+    if line_profiler:
+        print(line_profiler.report(), file=sys.stderr)
+    if metrics:
+        print(metrics.to_json(), file=sys.stderr)
+    if memory_diagnostics:
+        print(memory_diagnostics.report(), file=sys.stderr)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
 
-    # Lex the input stream
-    lexer = Lexer(stream, fn)
-    tokens, error = lexer.tokenize()
-    if error:  # Don't create the AST
-        return None, error  # Tokenization failure
-
-    # Parse the tokens
-    parser = Parser(tokens)
-    ast = parser.parse()
-    if ast.error:
-        return None, ast.error
-
-    # Interpret the AST
-    interpreter = Interpreter()
-    context = Context('<program>')
-    context.symbol_table = global_symbol_table
-    result = interpreter.visit(ast.node, context)
-
-    return result.value, result.error
+if __name__ == '__main__':
+    exit_process(main())
@@ -0,0 +1,54 @@
+# coding=utf-8
+"""Tests of the rows CsvWriters collect before writing them."""
+
+import io
+import os
+import tempfile
+import unittest
+
+from simplescript import Engine
+
+
+class CsvWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'out.csv').replace('\\', '/')
+        self.engine = Engine(output=io.StringIO())
+
+    def tearDown(self):
+        self.engine.close()
+        self.directory.cleanup()
+
+    def run_program(self, source):
+        _, error = self.engine.run('<test>', source.replace('PATH', '"{}"'.format(self.path)))
+        self.assertIsNone(error)
+
+    def read_file(self):
+        with open(self.path, 'r', newline='') as f:
+            return f.read()
+
+    def test_rows_written_without_close(self):
+        self.run_program('VAR out = CSV_CREATE(PATH)\nCSV_WRITE(out, [1, "a"])\nCSV_WRITE(out, [2, "b"])')
+        self.assertEqual(self.read_file(), '1,a\r\n2,b\r\n')
+        self.run_program('CSV_WRITE(out, [3, "c"])')
+        self.assertEqual(self.read_file(), '1,a\r\n2,b\r\n3,c\r\n')
+
+    def test_close_of_engine_closes_writer(self):
+        self.run_program('VAR out = CSV_CREATE(PATH)\nCSV_WRITE(out, [1])')
+        writer = self.engine.symbol_table.get('out')
+        self.engine.close()
+        self.assertTrue(writer.closed)
+        self.assertEqual(self.read_file(), '1\r\n')
+
+    def test_copies_share_writer(self):
+        self.run_program('VAR out = CSV_CREATE(PATH)\nVAR alias = out\nCSV_WRITE(alias, [1])\nCSV_WRITE(out, [2])')
+        writer, alias = self.engine.symbol_table.get('out'), self.engine.symbol_table.get('alias')
+        self.assertIs(writer.writer, alias.writer)
+        self.assertIs(writer.pending, alias.pending)
+        self.run_program('CLOSE(alias)')
+        self.assertEqual(self.read_file(), '1\r\n2\r\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
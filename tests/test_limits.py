@@ -0,0 +1,68 @@
+# coding=utf-8
+"""Tests of runs within Limits, which must fail with runtime errors rather than crash the host."""
+
+import io
+import unittest
+
+from bin.hooks import ExecutionHook
+from bin.limits import Limits
+from simplescript import Engine
+
+# Recurses once per level, with a statement body taking many Python frames per call
+RECURSIVE_FUNCTION = ('FUNC f(n)\n'
+                      '\tIF n > 0 THEN\n'
+                      '\t\tVAR x = f(n - 1) + 1\n'
+                      '\t\tRETURN x\n'
+                      '\tEND\n'
+                      '\tRETURN 0\n'
+                      'END\n')
+
+
+class NodeBalanceHook(ExecutionHook):
+    """Counts the Nodes entered but not returned from yet."""
+
+    def __init__(self):
+        self.open_nodes = 0
+
+    def on_node(self, node, context):
+        self.open_nodes += 1
+
+    def on_node_return(self, node, result, context):
+        self.open_nodes -= 1
+
+
+class LimitsTest(unittest.TestCase):
+
+    def run_program(self, source, limits=None, hooks=None, explicit_stack=False):
+        engine = Engine(output=io.StringIO())
+        engine.explicit_stack = explicit_stack
+        return engine.run('<test>', source, hooks, limits=limits)
+
+    def assert_fails(self, source, message, limits=None, **kwargs):
+        _, error = self.run_program(source, limits, **kwargs)
+        self.assertIsNotNone(error)
+        self.assertEqual(error.error_details, 'Runtime error encountered ({}).'.format(message))
+
+    def test_float_power_overflow(self):
+        for source in ('2 ^ 99999999.0', '2.5 ^ 99999'):
+            self.assert_fails(source, 'Result of power too large')
+            self.assert_fails(source, 'Result of power too large', Limits(max_memory=10000))
+
+    def test_depth_limit_above_python_stack(self):
+        for max_depth in (200, 5000):
+            self.assert_fails(RECURSIVE_FUNCTION + 'f(100000)', 'Call depth limit of {} exceeded'.format(max_depth),
+                              Limits(max_depth=max_depth))
+        value, error = self.run_program(RECURSIVE_FUNCTION + 'f(150)', Limits(max_depth=200))
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[-1].value, 150)
+
+    def test_allocation_failure_keeps_hooks_balanced(self):
+        hook = NodeBalanceHook()
+        _, error = self.run_program('VAR x = [1, 2, 3, 4, 5, 6, 7, 8]', Limits(max_memory=16), [hook],
+                                    explicit_stack=True)
+        self.assertIn('Memory limit of 16 bytes exceeded', error.error_details)
+        self.assertEqual(hook.open_nodes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# coding=utf-8
+"""Tests of the instance creations counted by MemoryDiagnostics."""
+
+import io
+import unittest
+
+from bin.memory import MemoryDiagnostics
+from bin.nodes import ForNode, ParallelForNode
+from simplescript import Engine
+
+
+class MemoryDiagnosticsTest(unittest.TestCase):
+
+    def test_inherited_constructor_counted(self):
+        classes = MemoryDiagnostics().classes
+        self.assertIn(ParallelForNode, classes)
+        self.assertNotIn('__init__', vars(ParallelForNode))
+        engine = Engine(output=io.StringIO())
+        engine.parallel = False
+        with MemoryDiagnostics() as diagnostics:
+            _, error = engine.run('<test>', 'PARALLEL FOR i = 0 TO 3 THEN i\nFOR j = 0 TO 3 THEN j')
+            self.assertIsNone(error)
+        self.assertEqual(diagnostics.creations[('<program>', 'ParallelForNode')], 1)
+        self.assertEqual(diagnostics.creations[('<program>', 'ForNode')], 1)
+
+    def test_constructors_restored(self):
+        for_init = vars(ForNode)['__init__']
+        with MemoryDiagnostics():
+            self.assertIsNot(vars(ForNode)['__init__'], for_init)
+            self.assertIn('__init__', vars(ParallelForNode))
+        self.assertIs(vars(ForNode)['__init__'], for_init)
+        self.assertNotIn('__init__', vars(ParallelForNode))
+
+    def test_one_started_at_a_time(self):
+        with MemoryDiagnostics():
+            with self.assertRaises(RuntimeError):
+                MemoryDiagnostics().start()
+        with MemoryDiagnostics():  # Note: Stopping the first allows another
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+# coding=utf-8
+"""Tests of PARALLEL FOR loops in runs with execution hooks."""
+
+import io
+import unittest
+
+from bin.hooks import ExecutionHook
+from simplescript import Engine
+
+
+class CallCounter(ExecutionHook):
+    """Counts the calls of every function."""
+
+    def __init__(self):
+        self.calls = dict()
+
+    def on_call(self, function, args, context):
+        self.calls[function.name] = self.calls.get(function.name, 0) + 1
+
+
+class ParallelForHooksTest(unittest.TestCase):
+
+    def test_hooks_see_every_iteration(self):
+        hook = CallCounter()
+        engine = Engine(output=io.StringIO())
+        value, error = engine.run('<test>',
+                                  'FUNC double(x) -> x * 2\n'
+                                  'PARALLEL FOR i = 0 TO 20 THEN double(i)',
+                                  [hook])
+        self.assertIsNone(error)
+        self.assertIsNone(engine.process_pool)  # Note: Run serially, without worker processes
+        self.assertEqual(hook.calls['double'], 20)
+        self.assertEqual([element.value for element in value.elements[-1].elements], list(range(0, 40, 2)))
+        engine.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
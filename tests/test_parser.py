@@ -0,0 +1,75 @@
+# coding=utf-8
+"""Tests of the recursive Parser and the StackParser built from its rules."""
+
+import glob
+import os
+import unittest
+
+from bin import parser
+from bin.lexer import Lexer
+from bin.parser import GRAMMAR_RULES, Parser, stack_parser_class
+
+BENCH_PROGRAMS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench', 'programs')
+
+
+def dump(value):
+    """
+    Describes a Node and everything below it, for comparing ASTs.
+    :param value: Node, Token, Position or plain value.
+    :return: Nested tuples and lists of plain values.
+    """
+    if isinstance(value, (list, tuple)):
+        return [dump(item) for item in value]
+    if hasattr(value, '__dict__'):
+        return (type(value).__name__,) + tuple((name, dump(item)) for name, item in sorted(vars(value).items()))
+    return value
+
+
+def tokenize(source):
+    tokens, error = Lexer(source, '<test>').tokenize()
+    assert error is None, error
+    return tokens
+
+
+class ParserTest(unittest.TestCase):
+
+    def test_stack_rules_are_generators(self):
+        stack_parser = stack_parser_class()
+        self.assertTrue(issubclass(stack_parser, Parser))
+        for rule in GRAMMAR_RULES:
+            self.assertIsNot(getattr(stack_parser, rule), getattr(Parser, rule), rule)
+
+    def test_same_ast_on_both(self):
+        for file_name in sorted(glob.glob(os.path.join(BENCH_PROGRAMS, '*.simple'))):
+            with open(file_name, 'r') as f:
+                tokens = tokenize(f.read())
+            recursive, on_stack = Parser(tokens).parse(), Parser(tokens, explicit_stack=True).parse()
+            self.assertIsNone(recursive.error, file_name)
+            self.assertEqual(dump(recursive.node), dump(on_stack.node), file_name)
+
+    def test_same_error_on_both(self):
+        tokens = tokenize('VAR x = 1 + (2')
+        recursive, on_stack = Parser(tokens).parse(), Parser(tokens, explicit_stack=True).parse()
+        self.assertEqual(recursive.error.error_details, on_stack.error.error_details)
+
+    def test_deep_nesting_parsed_again_on_stack(self):
+        built = []
+        original = parser.stack_parser_class
+
+        def counting_class():
+            built.append(True)
+            return original()
+
+        parser.stack_parser_class = counting_class
+        try:
+            self.assertIsNone(Parser(tokenize('VAR x = 1 + 2')).parse().error)
+            self.assertEqual(built, [])
+            result = Parser(tokenize('VAR x = ' + '(' * 3000 + '1' + ')' * 3000)).parse()
+            self.assertIsNone(result.error)
+            self.assertEqual(built, [True])
+        finally:
+            parser.stack_parser_class = original
+
+
+if __name__ == '__main__':
+    unittest.main()
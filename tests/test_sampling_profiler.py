@@ -0,0 +1,48 @@
+# coding=utf-8
+"""Tests of the SamplingProfiler on both interpreters."""
+
+import io
+import unittest
+
+from bin.sampling_profiler import SamplingProfiler
+from simplescript import Engine
+
+# Spends nearly all of its time inside spin()
+SPIN_PROGRAM = ('FUNC spin(n)\n'
+                '\tVAR total = 0\n'
+                '\tFOR i = 0 TO n THEN VAR total = total + i\n'
+                '\tRETURN total\n'
+                'END\n'
+                'spin(40000)\n')
+
+
+class SamplingProfilerTest(unittest.TestCase):
+
+    def sample_spin(self, explicit_stack):
+        """
+        Samples SPIN_PROGRAM.
+        :param explicit_stack: True to run it on the StackInterpreter.
+        :return: Tuple of the number of samples and of those inside spin().
+        """
+        engine = Engine(output=io.StringIO())
+        engine.explicit_stack = explicit_stack
+        with SamplingProfiler(interval=0.002) as sampler:
+            _, error = engine.run('<spin>', SPIN_PROGRAM)
+        self.assertIsNone(error)
+        inside = sum(count for stack, count in sampler.samples.items() if stack[-1].startswith('spin '))
+        return sampler.sample_count, inside
+
+    def test_samples_land_in_function(self):
+        sample_count, inside = self.sample_spin(explicit_stack=False)
+        self.assertGreater(sample_count, 0)
+        self.assertGreater(inside, sample_count * 0.8)
+
+    def test_samples_land_in_function_on_explicit_stack(self):
+        # Note: Functions run on the explicit stack have no visit_ frames to find
+        sample_count, inside = self.sample_spin(explicit_stack=True)
+        self.assertGreater(sample_count, 0)
+        self.assertGreater(inside, sample_count * 0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# coding=utf-8
+"""Tests of the checks the execution server makes on requests before running them."""
+
+import threading
+import time
+import unittest
+
+from server import ExecutionServer
+
+
+class RequestErrorTest(unittest.TestCase):
+
+    def test_valid_requests(self):
+        self.assertIsNone(ExecutionServer.find_request_error({'source': 'PRINT(1)'}))
+        self.assertIsNone(ExecutionServer.find_request_error({'script_id': 'abc', 'timeout': 0.5,
+                                                              'argv': ['a', 1], 'input': 'x'}))
+
+    def test_payload_not_an_object(self):
+        for request in ([], 'PRINT(1)', 1, None):
+            self.assertEqual(ExecutionServer.find_request_error(request), 'expected a JSON object')
+
+    def test_invalid_fields(self):
+        for request in ({'source': 1}, {}, {'script_id': 5}, {'source': '', 'timeout': '1'},
+                        {'source': '', 'timeout': True}, {'source': '', 'timeout': 0},
+                        {'source': '', 'timeout': -1}, {'source': '', 'timeout': float('nan')},
+                        {'source': '', 'argv': 'a b'}, {'source': '', 'input': 1}):
+            self.assertIsNotNone(ExecutionServer.find_request_error(request), request)
+
+    def test_failure_returned_instead_of_raised(self):
+        server = ExecutionServer(workers=1)
+        try:
+            response = server.handle({'source': 'PRINT(1)', 'timeout': 0})
+            self.assertFalse(response['ok'])
+            self.assertTrue(response['error'].startswith('Bad request'))
+            response = server.handle({'source': '1 + 1', 'timeout': 100})
+            self.assertTrue(response['ok'], response['error'])
+        finally:
+            server.close()
+
+
+
+class CloseTest(unittest.TestCase):
+
+    def test_close_stops_busy_workers(self):
+        server = ExecutionServer(workers=1)
+        worker, = server.workers
+        responses = []
+        thread = threading.Thread(target=lambda: responses.append(
+            server.handle({'source': 'WHILE TRUE THEN VAR x = 1', 'timeout': 30})))
+        thread.start()
+        while not server.idle_workers.empty():  # Note: Wait until the worker is busy
+            time.sleep(0.01)
+        server.close()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(worker.process.is_alive())
+        self.assertEqual(responses[0]['error'], 'Worker crashed')
+        self.assertEqual(server.workers, set())
+        self.assertTrue(server.idle_workers.empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
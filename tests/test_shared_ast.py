@@ -0,0 +1,78 @@
+# coding=utf-8
+"""Tests of one compiled AST run by several Engines, whose inline caches it holds."""
+
+import io
+import threading
+import unittest
+
+from simplescript import Engine
+
+# total() reads the globals scale and offset through the inline caches of its VarAccessNodes
+PROGRAM = ('FUNC total(n)\n'
+           '\tVAR sum = 0\n'
+           '\tFOR i = 0 TO n THEN VAR sum = sum + i * scale + offset\n'
+           '\tRETURN sum\n'
+           'END\n'
+           'total(200)\n')
+
+
+def expected_total(scale, offset):
+    return sum(i * scale + offset for i in range(200))
+
+
+class SharedAstTest(unittest.TestCase):
+
+    def setUp(self):
+        node, error = Engine(output=io.StringIO()).compile('<shared>', PROGRAM)
+        self.assertIsNone(error)
+        self.node = node
+
+    def run_on(self, engine):
+        """
+        Runs the shared AST on an Engine.
+        :param engine: Engine whose globals hold scale and offset.
+        :return: Python value of the last statement.
+        """
+        value, error = engine.execute(self.node)
+        self.assertIsNone(error)
+        return value.elements[-1].value
+
+    def make_engine(self, scale, offset):
+        engine = Engine(output=io.StringIO())
+        _, error = engine.run('<setup>', 'VAR scale = {}\nVAR offset = {}'.format(scale, offset))
+        self.assertIsNone(error)
+        return engine
+
+    def test_engines_taking_turns(self):
+        integers, floats = self.make_engine(2, 1), self.make_engine(0.5, 0.25)
+        for _ in range(3):
+            self.assertEqual(self.run_on(integers), expected_total(2, 1))
+            self.assertEqual(self.run_on(floats), expected_total(0.5, 0.25))
+
+    def test_reset_between_runs(self):
+        engine = self.make_engine(2, 1)
+        self.assertEqual(self.run_on(engine), expected_total(2, 1))
+        engine.reset()
+        _, error = engine.run('<setup>', 'VAR scale = 3\nVAR offset = 0')
+        self.assertIsNone(error)
+        self.assertEqual(self.run_on(engine), expected_total(3, 0))
+
+    def test_engines_at_once(self):
+        settings = [(scale, scale % 3) for scale in range(1, 7)]
+        engines = [self.make_engine(scale, offset) for scale, offset in settings]
+        results = dict()
+
+        def run_repeatedly(index):
+            results[index] = [self.run_on(engines[index]) for _ in range(5)]
+
+        threads = [threading.Thread(target=run_repeatedly, args=(index,)) for index in range(len(engines))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for index, (scale, offset) in enumerate(settings):
+            self.assertEqual(results[index], [expected_total(scale, offset)] * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
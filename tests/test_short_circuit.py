@@ -0,0 +1,94 @@
+# coding=utf-8
+"""Tests of AND and OR, which skip their right side once the left decides."""
+
+import io
+import unittest
+
+from bin.context import Context
+from bin.interpreter import Interpreter, StackInterpreter, interpreter_for
+from simplescript import Engine
+
+# hit() records every call, so skipped calls leave no trace in calls
+HIT_FUNCTION = ('VAR calls = []\n'
+                'FUNC hit(value)\n'
+                '\tAPPEND(calls, value)\n'
+                '\tRETURN value\n'
+                'END\n')
+
+
+class ShortCircuitTest(unittest.TestCase):
+    explicit_stack = False
+
+    def run_program(self, source):
+        """
+        Runs a program in a fresh Engine.
+        :param source: Source of the program.
+        :return: Tuple of the Engine and the value of the last statement.
+        """
+        engine = Engine(output=io.StringIO())
+        engine.explicit_stack = self.explicit_stack
+        value, error = engine.run('<test>', HIT_FUNCTION + source)
+        self.assertIsNone(error)
+        return engine, value.elements[-1]
+
+    def calls(self, engine):
+        return [element.value for element in engine.symbol_table.get('calls').elements]
+
+    def test_interpreter_class(self):
+        context = Context('<test>')
+        context.engine = Engine(output=io.StringIO())
+        context.engine.explicit_stack = self.explicit_stack
+        self.assertIs(type(interpreter_for(context)), StackInterpreter if self.explicit_stack else Interpreter)
+
+    def test_and_skips_right_side_when_left_is_false(self):
+        engine, value = self.run_program('0 AND hit(1)')
+        self.assertEqual(value.value, 0)
+        self.assertEqual(self.calls(engine), [])
+
+    def test_or_skips_right_side_when_left_is_true(self):
+        engine, value = self.run_program('5 OR hit(1)')
+        self.assertEqual(value.value, 1)
+        self.assertEqual(self.calls(engine), [])
+
+    def test_right_side_runs_when_left_does_not_decide(self):
+        engine, value = self.run_program('[1 AND hit(2), 0 OR hit(0), 1 AND hit(0), 0 OR hit(3)]')
+        self.assertEqual([element.value for element in value.elements], [1, 0, 0, 1])
+        self.assertEqual(self.calls(engine), [2, 0, 0, 3])
+
+    def test_results_are_true_or_false(self):
+        _, value = self.run_program('[2 AND 1, 1 OR 2, 0.5 AND 3, 0 OR 0, 0 AND 0, 2 OR 0]')
+        self.assertEqual([element.value for element in value.elements], [1, 1, 1, 0, 0, 1])
+
+    def test_chained_guards(self):
+        engine, value = self.run_program('hit(0) AND hit(1) OR hit(2) AND hit(0)')
+        self.assertEqual(value.value, 0)
+        self.assertEqual(self.calls(engine), [0, 2, 0])
+
+    def test_guard_skips_failing_side(self):
+        _, value = self.run_program('VAR xs = [5]\n'
+                                    '[0 < LEN(xs) AND xs / 0 > 1, 3 < LEN(xs) AND xs / 3 > 1]')
+        self.assertEqual([element.value for element in value.elements], [1, 0])
+
+    def test_guard_in_loop(self):
+        engine, value = self.run_program('VAR count = 0\n'
+                                         'FOR i = 0 TO 10 THEN IF i % 5 == 0 AND hit(i) >= 0 THEN '
+                                         'VAR count = count + 1\n'
+                                         'count')
+        self.assertEqual(value.value, 2)
+        self.assertEqual(self.calls(engine), [0, 5])
+
+    def test_left_side_error_skips_right_side(self):
+        engine = Engine(output=io.StringIO())
+        engine.explicit_stack = self.explicit_stack
+        _, error = engine.run('<test>', HIT_FUNCTION + 'undefined AND hit(1)\n')
+        self.assertIsNotNone(error)
+        self.assertIn('undefined', error.error_details)
+        self.assertEqual(self.calls(engine), [])
+
+
+class StackShortCircuitTest(ShortCircuitTest):
+    explicit_stack = True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+# coding=utf-8
+"""Tests of SORT and SORT_IN_PLACE, with and without key functions."""
+
+import io
+import unittest
+
+from simplescript import Engine
+
+# rank() puts the numbers above 2 first and counts its calls,
+# so keys computed more than once show up in calls
+RANK_FUNCTION = ('VAR calls = []\n'
+                 'FUNC rank(value)\n'
+                 '\tAPPEND(calls, value)\n'
+                 '\tRETURN IF value > 2 THEN 0 ELSE 1\n'
+                 'END\n')
+
+
+class SortTest(unittest.TestCase):
+
+    def run_program(self, source):
+        """
+        Runs a program in a fresh Engine.
+        :param source: Source of the program.
+        :return: Tuple of the Engine and the Error of the run, if any.
+        """
+        engine = Engine(output=io.StringIO())
+        _, error = engine.run('<test>', RANK_FUNCTION + source)
+        engine.close()
+        return engine, error
+
+    def values(self, engine, variable_name):
+        """
+        Gets the native values of the elements of a list variable.
+        :param engine: Engine which ran the program.
+        :param variable_name: Name of the list variable.
+        :return: List of the values.
+        """
+        return [element.value for element in engine.symbol_table.get(variable_name).elements]
+
+    def test_sort_numbers(self):
+        engine, error = self.run_program('VAR items = [3, 1, 2]\nVAR result = SORT(items)')
+        self.assertIsNone(error)
+        self.assertEqual(self.values(engine, 'result'), [1, 2, 3])
+        self.assertEqual(self.values(engine, 'items'), [3, 1, 2])
+
+    def test_sort_strings(self):
+        engine, error = self.run_program('VAR result = SORT(["pear", "apple", "fig"])')
+        self.assertIsNone(error)
+        self.assertEqual(self.values(engine, 'result'), ['apple', 'fig', 'pear'])
+
+    def test_sort_with_key_function(self):
+        engine, error = self.run_program('VAR result = SORT([1, 5, 2, 4], rank)')
+        self.assertIsNone(error)
+        self.assertEqual(self.values(engine, 'result'), [5, 4, 1, 2])  # Stable for equal keys
+        self.assertEqual(len(self.values(engine, 'calls')), 4)
+
+    def test_sort_with_null_key(self):
+        engine, error = self.run_program('VAR result = SORT([3, 1, 2], NULL)')
+        self.assertIsNone(error)
+        self.assertEqual(self.values(engine, 'result'), [1, 2, 3])
+
+    def test_sort_rejects_key_which_is_not_function(self):
+        for key in ('[1]', '[]', '""', '"key"', '1'):
+            with self.subTest(key=key):
+                _, error = self.run_program('SORT([3, 1], {})'.format(key))
+                self.assertIsNotNone(error)
+                self.assertIn('Second argument must be function or NULL', error.error_details)
+
+    def test_sort_rejects_mixed_types(self):
+        _, error = self.run_program('SORT([1, "a"])')
+        self.assertIsNotNone(error)
+        self.assertIn('Sort keys must be all numbers or all strings', error.error_details)
+
+    def test_sort_rejects_mixed_keys(self):
+        _, error = self.run_program('FUNC key(value) -> IF value == 1 THEN "a" ELSE value\nSORT([1, 2], key)')
+        self.assertIsNotNone(error)
+        self.assertIn('Sort keys must be all numbers or all strings', error.error_details)
+
+    def test_sort_in_place(self):
+        engine, error = self.run_program('VAR items = [3, 1, 2]\n'
+                                         'VAR alias = items\n'
+                                         'SORT_IN_PLACE(items)')
+        self.assertIsNone(error)
+        self.assertEqual(self.values(engine, 'items'), [1, 2, 3])
+        self.assertIs(engine.symbol_table.get('alias').elements, engine.symbol_table.get('items').elements)
+
+    def test_sort_in_place_with_key_function(self):
+        engine, error = self.run_program('VAR items = [1, 5, 2]\nSORT_IN_PLACE(items, rank)')
+        self.assertIsNone(error)
+        self.assertEqual(self.values(engine, 'items'), [5, 1, 2])
+        self.assertEqual(len(self.values(engine, 'calls')), 3)
+
+    def test_sort_in_place_leaves_list_on_error(self):
+        engine, error = self.run_program('VAR items = [3, "a", 1]\nSORT_IN_PLACE(items)')
+        self.assertIsNotNone(error)
+        self.assertEqual(self.values(engine, 'items'), [3, 'a', 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
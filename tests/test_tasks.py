@@ -0,0 +1,102 @@
+# coding=utf-8
+"""Tests of what happens to spawned tasks when their Engine is closed."""
+
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+
+from bin.hooks import ExecutionHook
+from bin.task import Task
+from simplescript import Engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The task of forever() never finishes, and is never awaited
+ENDLESS_PROGRAM = ('FUNC forever()\n'
+                   '\tWHILE TRUE THEN VAR x = 1\n'
+                   'END\n'
+                   'VAR task = SPAWN(forever)\n'
+                   'PRINT("done")\n')
+
+
+class TaskTest(unittest.TestCase):
+
+    def test_close_reports_running_task(self):
+        read_end, write_end = os.pipe()
+        with os.fdopen(read_end) as input_file, os.fdopen(write_end, 'w') as feed:
+            engine = Engine(output=io.StringIO(), input=input_file)
+            _, error = engine.run('<test>', 'FUNC wait() -> INPUT()\nVAR task = SPAWN(wait)')
+            self.assertIsNone(error)
+            task = engine.symbol_table.get('task')
+            self.assertEqual(engine.close(), 1)
+            self.assertIsNone(engine.executor)
+            feed.write('line\n')  # Note: Lets the task finish, so no thread outlives the test
+            feed.flush()
+            self.assertEqual(task.future.result(timeout=5).value.value, 'line')
+        self.assertEqual(engine.close(), 0)
+
+    def test_script_exits_with_task_running(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.simple', delete=False) as f:
+            f.write(ENDLESS_PROGRAM)
+        try:
+            completed = subprocess.run([sys.executable, os.path.join(ROOT, 'simplescript.py'), f.name],
+                                       capture_output=True, text=True, timeout=30)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(completed.stdout, 'done\n')
+
+
+class CallThreads(ExecutionHook):
+    """Records the thread of every call."""
+
+    def __init__(self):
+        self.threads = set()
+
+    def on_call(self, function, args, context):
+        self.threads.add(threading.current_thread())
+
+
+class AwaitTest(unittest.TestCase):
+
+    def await_future(self, future):
+        engine = Engine(output=io.StringIO())
+        engine.symbol_table.set('task', Task('work', future))
+        _, error = engine.run('<test>', 'AWAIT(task)')
+        engine.close()
+        return error
+
+    def test_await_cancelled_task(self):
+        future = Future()
+        future.cancel()
+        error = self.await_future(future)
+        self.assertIsNotNone(error)
+        self.assertIn('Task work was cancelled before it started', error.error_details)
+
+    def test_await_crashed_task(self):
+        future = Future()
+        future.set_exception(ValueError('boom'))
+        error = self.await_future(future)
+        self.assertIsNotNone(error)
+        self.assertIn("ValueError('boom')", error.error_details)
+
+    def test_tasks_run_without_hooks(self):
+        hook = CallThreads()
+        engine = Engine(output=io.StringIO())
+        _, error = engine.run('<test>',
+                              'FUNC work(x) -> x * 2\n'
+                              'VAR result = AWAIT(SPAWN(work, [21]))',
+                              [hook])
+        engine.close()
+        self.assertIsNone(error)
+        self.assertEqual(engine.symbol_table.get('result').value, 42)
+        self.assertEqual(hook.threads, {threading.current_thread()})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+# coding=utf-8
+"""Tests of the strings written to binary trace files."""
+
+import os
+import tempfile
+import unittest
+
+from bin.trace import EVENT_CALL, BinaryTraceHook, read_trace
+
+
+class TraceStringTest(unittest.TestCase):
+
+    def trace_name(self, name):
+        """
+        Writes a call of a function with a name to a trace file and reads it back.
+        :param name: Name of the function.
+        :return: Name read from the trace file.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'test.trace')
+            with BinaryTraceHook(file_name) as hook:
+                hook.write(EVENT_CALL, name, None)
+            (_, traced_name, _, _, _), = read_trace(file_name)
+        return traced_name
+
+    def test_short_name(self):
+        self.assertEqual(self.trace_name('fé'), 'fé')
+
+    def test_long_name_cut_on_character(self):
+        name = 'é' * 40000  # Note: 80000 bytes, and 0xFFFF falls inside a character
+        traced_name = self.trace_name(name)
+        self.assertEqual(traced_name, name[:0xFFFF // 2])
+
+
+if __name__ == '__main__':
+    unittest.main()